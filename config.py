@@ -19,4 +19,15 @@ KLINE_PERIOD = "90 day ago UTC"
 # Activa o desactiva el envío de notificaciones a Telegram
 TELEGRAM_ENABLED = True
 
+# --- CONFIGURACIÓN DEL MOTOR DE EJECUCIÓN ---
+# 'schedule': ejecuta todas las estrategias una vez por hora.
+# 'events': cada estrategia reacciona a los precios y velas de su símbolo (stop loss en segundos).
+EXECUTION_ENGINE = "schedule"
+
+# Cada cuántos segundos se consulta el precio de los símbolos activos en modo 'events'.
+PRICE_POLL_SECONDS = 2
+
+# Duración (segundos) de las velas que agrega el motor de eventos; al cerrar cada una se ejecuta la estrategia.
+EVENT_CANDLE_SECONDS = 3600
+
 # Puedes añadir más configuraciones aquí en el futuro
\ No newline at end of file
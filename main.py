@@ -2,38 +2,109 @@ import sys
 import os
 import time
 import schedule
+from dotenv import load_dotenv
 
 # Esta línea es CRUCIAL para que Python encuentre tus módulos en la carpeta 'src'.
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+import config
 from src.bot.strategy_manager import StrategyManager
+from src.bot.event_engine import EventEngine, PollingPriceSource
 from src.bot.logger import configurar_logger
 
 # Configurar el logger al inicio de todo.
 logger = configurar_logger()
 
-def job():
+def crear_manager() -> StrategyManager:
+    """
+    Crea el gestor de estrategias UNA SOLA VEZ para todo el proceso.
+    El adaptador del exchange y el estado de las estrategias sobreviven entre ciclos.
+    """
+    load_dotenv()
+    return StrategyManager(
+        'strategies.yaml',
+        api_key=os.getenv("BINANCE_API_KEY"),
+        api_secret=os.getenv("BINANCE_SECRET_KEY")
+    )
+
+def job(manager: StrategyManager):
     """
     Función que será ejecutada por el planificador (scheduler).
+    Aplica los cambios de strategies.yaml (si los hay) y ejecuta un ciclo.
     """
     logger.info("🚀 Iniciando ciclo de ejecución de estrategias...")
     try:
-        manager = StrategyManager('strategies.yaml')
-        manager.run_strategies()
+        manager.reload_if_changed()
+        manager.run_all()
         logger.info("✅ Ciclo de estrategias completado exitosamente.")
     except Exception as e:
         logger.error(f"💥 Ocurrió un error durante la ejecución del job: {e}", exc_info=True)
 
 
+def run_event_mode(manager: StrategyManager):
+    """
+    Modo dirigido por eventos: las estrategias se invocan cuando su símbolo
+    recibe un nuevo precio o cierra una vela, en lugar de una vez por hora.
+    """
+    engine = EventEngine()
+    manager.attach_to_engine(engine)
+
+    # Con stream de mercado (market_data.source: websocket) los eventos llegan del websocket.
+    if hasattr(manager.exchange_adapter, 'attach_engine'):
+        manager.exchange_adapter.attach_engine(engine)
+        engine.start()
+        logger.info(f"⚡ Motor de eventos activo por websocket para {manager.symbols()}. Presiona Ctrl+C para detener.")
+        while True:
+            try:
+                time.sleep(60)
+                manager.reload_if_changed() # El stream se resuscribe a los nuevos símbolos.
+            except KeyboardInterrupt:
+                logger.warning("🛑 Deteniendo el bot...")
+                engine.stop()
+                manager.shutdown()
+                return
+
+    def _start_source():
+        source = PollingPriceSource(
+            manager.exchange_adapter, manager.symbols(),
+            poll_seconds=config.PRICE_POLL_SECONDS, candle_seconds=config.EVENT_CANDLE_SECONDS
+        )
+        engine.run_source(source)
+        return source
+
+    source = _start_source()
+    logger.info(f"⚡ Motor de eventos activo para {manager.symbols()}. Presiona Ctrl+C para detener.")
+
+    while True:
+        try:
+            time.sleep(60)
+            # Si cambió strategies.yaml, la fuente se reinicia con los nuevos símbolos.
+            if manager.reload_if_changed() and manager.symbols() != source.symbols:
+                source.stop()
+                source = _start_source()
+        except KeyboardInterrupt:
+            logger.warning("🛑 Deteniendo el bot...")
+            source.stop()
+            engine.stop()
+            manager.shutdown()
+            break
+
+
 if __name__ == "__main__":
     logger.info("🤖 Bot de Inversión iniciado. Ejecutando el primer ciclo ahora...")
     
+    manager = crear_manager()
+
+    if config.EXECUTION_ENGINE == "events":
+        run_event_mode(manager)
+        sys.exit(0)
+
     # Ejecuta el job una vez al iniciar
-    job()
+    job(manager)
 
     # Configura la ejecución periódica (ej. cada hora)
     # Puedes ajustar el tiempo según tus necesidades en config.py o aquí.
-    schedule.every(1).hour.do(job)
+    schedule.every(1).hour.do(job, manager)
     
     logger.info("🕒 El bot está en modo de espera, ejecutará las estrategias periódicamente. Presiona Ctrl+C para detener.")
 
@@ -43,4 +114,5 @@ if __name__ == "__main__":
             time.sleep(1)
         except KeyboardInterrupt:
             logger.warning("🛑 Deteniendo el bot...")
+            manager.shutdown()
             break
@@ -0,0 +1,83 @@
+# src/bot/account_snapshot.py
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+QUOTE_CURRENCY = 'USDT'
+# Antigüedad máxima de la instantánea. Sin ciclos (modo por eventos) nadie llama a
+# begin_cycle, y los cambios hechos fuera del bot (fills LIMIT, depósitos) solo se
+# ven al volver a consultar.
+DEFAULT_MAX_AGE_SECONDS = 30.0
+
+
+class AccountSnapshot:
+    """
+    Instantánea del balance de la cuenta con alcance de ciclo: se consulta al
+    exchange una sola vez por tick, se actualiza localmente con nuestras
+    propias ejecuciones y se invalida ante eventos de órdenes que no podemos
+    reflejar con precisión (órdenes LIMIT, cancelaciones, errores). Nunca se
+    sirve con más de `max_age_seconds` de antigüedad (None = sin límite).
+    """
+
+    def __init__(self, fetch_balances: Callable[[], Dict[str, Dict[str, float]]],
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.fetch_balances = fetch_balances
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._balances = None
+        self._fetched_at = 0.0
+        self.stats = {"fetches": 0, "hits": 0, "local_updates": 0, "invalidations": 0}
+
+    def get(self) -> Dict[str, Dict[str, float]]:
+        """Devuelve el balance (copia); solo consulta al exchange si la instantánea no es válida."""
+        with self._lock:
+            expired = (self.max_age_seconds is not None
+                       and time.monotonic() - self._fetched_at > self.max_age_seconds)
+            if self._balances is None or expired:
+                self._balances = {asset: dict(values) for asset, values in self.fetch_balances().items()}
+                self._fetched_at = time.monotonic()
+                self.stats["fetches"] += 1
+            else:
+                self.stats["hits"] += 1
+            return {asset: dict(values) for asset, values in self._balances.items()}
+
+    def begin_cycle(self):
+        """Descarta la instantánea: el primer `get` del ciclo vuelve a consultar la cuenta."""
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            if self._balances is not None:
+                self.stats["invalidations"] += 1
+            self._balances = None
+
+    def apply_order(self, symbol: str, side: str, quantity: float, price: float, order: Dict[str, Any]):
+        """
+        Refleja localmente una orden propia. Solo las órdenes completamente
+        ejecutadas se aplican; cualquier otro estado invalida la instantánea.
+        """
+        if not isinstance(order, dict) or order.get('status') != 'FILLED':
+            self.invalidate()
+            return
+
+        executed_qty = float(order.get('executedQty', quantity) or 0)
+        quote_qty = order.get('cummulativeQuoteQty')
+        quote_qty = float(quote_qty) if quote_qty is not None else executed_qty * (price or 0)
+        if not executed_qty or not quote_qty:
+            self.invalidate()
+            return
+
+        base = symbol.upper().replace(QUOTE_CURRENCY, '')
+        sign = 1 if side.upper() == 'BUY' else -1
+        with self._lock:
+            if self._balances is None:
+                return
+            for asset, delta in ((base, sign * executed_qty), (QUOTE_CURRENCY, -sign * quote_qty)):
+                entry = self._balances.setdefault(asset, {"free": 0.0, "locked": 0.0})
+                entry["free"] = entry.get("free", 0.0) + delta
+            self.stats["local_updates"] += 1
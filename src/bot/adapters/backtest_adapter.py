@@ -0,0 +1,295 @@
+# src/bot/adapters/backtest_adapter.py
+
+import bisect
+import itertools
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any
+
+from .base_exchange import BaseExchangeAdapter
+
+QUOTE_CURRENCY = 'USDT'
+
+class BacktestExchangeAdapter(BaseExchangeAdapter):
+    """
+    Adaptador que reproduce velas guardadas (p. ej. de KlineStore) como si
+    fueran el mercado en vivo. El reloj avanza vela a vela con `advance()`:
+
+    - Las órdenes MARKET se ejecutan al cierre de la vela actual.
+    - Las órdenes LIMIT quedan abiertas y se ejecutan en la siguiente vela cuyo
+      rango las toque: BUY si low <= precio, SELL si high >= precio. Si la vela
+      abre ya más allá del precio límite, se ejecuta a la apertura.
+
+    Todo es determinista: la misma historia produce siempre los mismos fills.
+    """
+
+    def __init__(self, candles: Dict[str, pd.DataFrame], initial_balances: Dict[str, float] = None,
+                 fee_rate: float = 0.001):
+        self._series = {}
+        for symbol, df in candles.items():
+            df = df.sort_values('open_time')
+            times = df['close_time'] if 'close_time' in df.columns else df['open_time']
+            self._series[symbol.upper()] = {
+                'time': times.to_numpy(dtype=np.int64),
+                'open_time': df['open_time'].to_numpy(dtype=np.int64),
+                'open': df['open'].to_numpy(dtype=float),
+                'high': df['high'].to_numpy(dtype=float),
+                'low': df['low'].to_numpy(dtype=float),
+                'close': df['close'].to_numpy(dtype=float),
+            }
+        # Línea de tiempo común: unión de los instantes de todas las series.
+        self.timeline = np.unique(np.concatenate([s['time'] for s in self._series.values()])) if self._series else np.array([], dtype=np.int64)
+        self.step = 0
+        self._positions = {symbol: 0 for symbol in self._series}
+
+        self.fee_rate = fee_rate
+        self._free = dict(initial_balances or {QUOTE_CURRENCY: 10000.0})
+        self._locked: Dict[str, float] = {}
+        self._open_orders: Dict[str, Dict[str, Any]] = {}
+        self._bounds = None
+        # Órdenes ejecutadas por símbolo, ordenadas por orderId (los ids aparte, para buscar con bisect),
+        # y en orden de ejecución con su instante, para servir solo las nuevas con `updated_since`.
+        self._executed: Dict[str, List[Dict[str, Any]]] = {}
+        self._executed_ids: Dict[str, List[int]] = {}
+        self._fills: Dict[str, List[Dict[str, Any]]] = {}
+        self._fill_times: Dict[str, List[int]] = {}
+        self._order_ids = itertools.count(1)
+        self.fees_paid = 0.0
+        super().__init__("backtest", "backtest")
+
+    def _create_client(self) -> Any:
+        return None
+
+    def verify_connection(self) -> bool:
+        return True
+
+    # --- Reloj ---
+    def current_time(self) -> float:
+        return self.timeline[self.step] / 1000.0 if len(self.timeline) else 0.0
+
+    def _index(self, symbol: str) -> int:
+        """Índice de la última vela del símbolo cerrada en el instante actual (-1 si aún no hay)."""
+        series = self._series[symbol]
+        pos = self._positions[symbol]
+        now = self.timeline[self.step]
+        while pos + 1 < len(series['time']) and series['time'][pos + 1] <= now:
+            pos += 1
+        self._positions[symbol] = pos
+        return pos if series['time'][pos] <= now else -1
+
+    def has_next(self) -> bool:
+        return self.step + 1 < len(self.timeline)
+
+    def advance(self) -> bool:
+        """Avanza a la siguiente vela y ejecuta las órdenes LIMIT que esta toque."""
+        if not self.has_next():
+            return False
+        self.step += 1
+        self._match_limit_orders()
+        return True
+
+    # --- Datos de mercado ---
+    def get_price(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        idx = self._index(symbol)
+        if idx < 0:
+            raise ValueError(f"Sin datos para {symbol} en el instante actual del backtest.")
+        return float(self._series[symbol]['close'][idx])
+
+    def get_all_prices(self) -> Dict[str, float]:
+        return {symbol: self.get_price(symbol) for symbol in self._series if self._index(symbol) >= 0}
+
+    def get_klines(self, symbol: str, interval: str = '1d', limit: int = 300) -> List[Dict[str, Any]]:
+        """Velas ya cerradas en el instante actual dentro de los últimos `limit` días."""
+        symbol = symbol.upper()
+        series = self._series[symbol]
+        idx = self._index(symbol)
+        start_ms = self.timeline[self.step] - limit * 86_400_000
+        first = int(np.searchsorted(series['open_time'], start_ms, side='left'))
+        return [
+            {
+                "open_time": int(series['open_time'][i]), "open": float(series['open'][i]),
+                "high": float(series['high'][i]), "low": float(series['low'][i]),
+                "close": float(series['close'][i]), "volume": 0.0, "close_time": int(series['time'][i]),
+            }
+            for i in range(first, idx + 1)
+        ]
+
+    # --- Cuenta ---
+    def get_account_balance(self) -> Dict[str, float]:
+        assets = set(self._free) | set(self._locked)
+        balances = {}
+        for asset in assets:
+            free, locked = self._free.get(asset, 0.0), self._locked.get(asset, 0.0)
+            if free > 0 or locked > 0:
+                balances[asset] = {"free": free, "locked": locked}
+        return balances
+
+    def equity(self) -> float:
+        """Valor total de la cuenta en USDT a los precios de cierre actuales."""
+        total = 0.0
+        for asset in set(self._free) | set(self._locked):
+            amount = self._free.get(asset, 0.0) + self._locked.get(asset, 0.0)
+            if asset == QUOTE_CURRENCY:
+                total += amount
+            elif amount:
+                total += amount * self.get_price(f"{asset}{QUOTE_CURRENCY}")
+        return total
+
+    def _move(self, asset: str, free_delta: float = 0.0, locked_delta: float = 0.0):
+        self._free[asset] = self._free.get(asset, 0.0) + free_delta
+        self._locked[asset] = self._locked.get(asset, 0.0) + locked_delta
+
+    # --- Órdenes ---
+    def _settle(self, order: Dict[str, Any], fill_price: float, from_locked: bool):
+        """Liquida una orden ejecutada: mueve balances, cobra comisión y la registra."""
+        base = order['symbol'].replace(QUOTE_CURRENCY, '')
+        qty = order['origQty']
+        notional = qty * fill_price
+        fee = notional * self.fee_rate
+        self.fees_paid += fee
+
+        if order['side'] == 'BUY':
+            reserved = qty * order['price'] if from_locked else 0.0
+            self._move(QUOTE_CURRENCY, free_delta=reserved - notional - fee, locked_delta=-reserved)
+            self._move(base, free_delta=qty)
+        else:
+            self._move(base, free_delta=0.0 if from_locked else -qty, locked_delta=-qty if from_locked else 0.0)
+            self._move(QUOTE_CURRENCY, free_delta=notional - fee)
+
+        order.update({
+            'status': 'FILLED', 'executedQty': qty, 'cummulativeQuoteQty': notional,
+            'fillPrice': fill_price, 'updateTime': int(self.timeline[self.step]),
+        })
+        ids = self._executed_ids.setdefault(order['symbol'], [])
+        pos = bisect.bisect(ids, order['orderId'])
+        ids.insert(pos, order['orderId'])
+        self._executed.setdefault(order['symbol'], []).insert(pos, order)
+        # El reloj del backtest solo avanza: las ejecuciones llegan ya ordenadas por instante.
+        self._fills.setdefault(order['symbol'], []).append(order)
+        self._fill_times.setdefault(order['symbol'], []).append(order['updateTime'])
+
+    def create_order(self, symbol: str, order_type: str, side: str, quantity: float, price: float = None) -> Dict[str, Any]:
+        symbol, order_type, side = symbol.upper(), order_type.upper(), side.upper()
+        base = symbol.replace(QUOTE_CURRENCY, '')
+        order = {
+            'symbol': symbol, 'orderId': next(self._order_ids), 'type': order_type, 'side': side,
+            'origQty': float(quantity), 'price': float(price) if price is not None else None,
+            'time': int(self.timeline[self.step]),
+        }
+
+        if order_type == 'MARKET':
+            fill_price = self.get_price(symbol)
+            if side == 'BUY' and self._free.get(QUOTE_CURRENCY, 0.0) < quantity * fill_price * (1 + self.fee_rate):
+                raise Exception("Fondos insuficientes en el backtest")
+            if side == 'SELL' and self._free.get(base, 0.0) < quantity - 1e-12:
+                raise Exception("Activo insuficiente en el backtest")
+            self._settle(order, fill_price, from_locked=False)
+            return dict(order)
+
+        if order_type != 'LIMIT' or price is None:
+            raise ValueError(f"Orden no soportada en el backtest: {order_type} (precio={price})")
+
+        # Las órdenes LIMIT reservan fondos hasta ejecutarse o cancelarse.
+        if side == 'BUY':
+            cost = quantity * price
+            if self._free.get(QUOTE_CURRENCY, 0.0) < cost:
+                raise Exception("Fondos insuficientes en el backtest")
+            self._move(QUOTE_CURRENCY, free_delta=-cost, locked_delta=cost)
+        else:
+            if self._free.get(base, 0.0) < quantity - 1e-12:
+                raise Exception("Activo insuficiente en el backtest")
+            self._move(base, free_delta=-quantity, locked_delta=quantity)
+
+        order['status'] = 'NEW'
+        self._open_orders[str(order['orderId'])] = order
+        self._bounds = None
+        return dict(order)
+
+    def _order_bounds(self) -> Dict[str, tuple]:
+        """Por símbolo, la compra abierta más alta y la venta abierta más baja (se recalcula solo si cambian las órdenes)."""
+        if self._bounds is None:
+            bounds = {}
+            for order in self._open_orders.values():
+                best_buy, best_sell = bounds.get(order['symbol'], (-np.inf, np.inf))
+                if order['side'] == 'BUY':
+                    best_buy = max(best_buy, order['price'])
+                else:
+                    best_sell = min(best_sell, order['price'])
+                bounds[order['symbol']] = (best_buy, best_sell)
+            self._bounds = bounds
+        return self._bounds
+
+    def _match_limit_orders(self):
+        # Cada símbolo se descarta en O(1) si su vela no alcanza ninguna orden; si no, se resuelve una sola vez por paso.
+        now = self.timeline[self.step]
+        bars = {}
+        for symbol, (best_buy, best_sell) in self._order_bounds().items():
+            idx = self._index(symbol)
+            if idx < 0:
+                continue
+            series = self._series[symbol]
+            if series['time'][idx] != now:
+                continue  # El símbolo no tiene vela nueva en este instante.
+            low, high = series['low'][idx], series['high'][idx]
+            if low <= best_buy or high >= best_sell:
+                bars[symbol] = (series['open'][idx], low, high)
+        if not bars:
+            return
+        for order_id, order in list(self._open_orders.items()):
+            bar = bars.get(order['symbol'])
+            if bar is None:
+                continue
+            bar_open, low, high = bar
+            if order['side'] == 'BUY' and low <= order['price']:
+                fill = min(order['price'], bar_open)
+            elif order['side'] == 'SELL' and high >= order['price']:
+                fill = max(order['price'], bar_open)
+            else:
+                continue
+            del self._open_orders[order_id]
+            self._bounds = None
+            self._settle(order, fill, from_locked=True)
+
+    def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        return [dict(o) for o in self._open_orders.values() if symbol is None or o['symbol'] == symbol.upper()]
+
+    def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        order = self._open_orders.pop(str(order_id), None)
+        if order is None:
+            raise Exception(f"Orden {order_id} no encontrada en el backtest")
+        self._bounds = None
+        base = order['symbol'].replace(QUOTE_CURRENCY, '')
+        if order['side'] == 'BUY':
+            reserved = order['origQty'] * order['price']
+            self._move(QUOTE_CURRENCY, free_delta=reserved, locked_delta=-reserved)
+        else:
+            self._move(base, free_delta=order['origQty'], locked_delta=-order['origQty'])
+        order['status'] = 'CANCELED'
+        return dict(order)
+
+    def create_orders(self, orders: List[Dict[str, Any]], max_workers: int = None) -> Dict[str, Any]:
+        return self._run_batch(lambda o: self.create_order(**o), orders, max_workers=1)
+
+    def cancel_all_orders(self, symbol: str, max_workers: int = None) -> Dict[str, Any]:
+        symbol = symbol.upper()
+        ids = [order_id for order_id, o in self._open_orders.items() if o['symbol'] == symbol]
+        return {"orders": [self.cancel_order(symbol, order_id) for order_id in ids], "errors": []}
+
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
+        """
+        Órdenes ejecutadas del símbolo por orderId. `from_order_id` y
+        `updated_since` se resuelven con búsqueda binaria, así que cada consulta
+        cuesta lo que las órdenes devueltas y no lo que todo el historial.
+        """
+        symbol = symbol.upper()
+        if updated_since is not None:
+            start = bisect.bisect_left(self._fill_times.get(symbol, []), int(updated_since))
+            recent = self._fills.get(symbol, [])[start:]
+            if from_order_id is not None:
+                recent = [o for o in recent if o['orderId'] >= int(from_order_id)]
+            return [dict(o) for o in sorted(recent, key=lambda o: o['orderId'])]
+        executed = self._executed.get(symbol, [])
+        start = 0 if from_order_id is None else bisect.bisect_left(self._executed_ids.get(symbol, []), int(from_order_id))
+        return [dict(o) for o in executed[start:]]
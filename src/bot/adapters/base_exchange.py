@@ -1,7 +1,12 @@
 # src/bot/adapters/base_exchange.py
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any
+
+# Peticiones simultáneas del modo por lotes genérico (create_orders / cancel_all_orders).
+DEFAULT_BATCH_WORKERS = 8
 
 class BaseExchangeAdapter(ABC):
     """
@@ -72,8 +77,74 @@ class BaseExchangeAdapter(ABC):
         pass
 
     @abstractmethod
-    def get_executed_orders(self, symbol: str) -> List[Dict[str, Any]]:
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
         """
         Obtiene las órdenes que fueron ejecutadas recientemente para un símbolo.
+        Con `from_order_id` solo se devuelven las órdenes con id mayor o igual.
+        `updated_since` (ms) es una pista: el adaptador puede omitir las
+        ejecutadas antes de ese instante, pero también puede devolverlas.
+        """
+        pass
+
+    def get_all_prices(self) -> Dict[str, float]:
+        """
+        Obtiene el precio de todos los símbolos con una sola llamada.
+        Es opcional: los adaptadores que no lo soporten lanzan NotImplementedError.
+        """
+        raise NotImplementedError
+
+    # --- Operaciones por lotes ---
+    @staticmethod
+    def _run_batch(func: Callable[[Dict[str, Any]], Dict[str, Any]], requests: List[Dict[str, Any]],
+                   max_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Any]:
+        """
+        Ejecuta `func` sobre cada petición en un pool de hilos. Devuelve
+        {'orders': [...], 'errors': [...]}: 'orders' está alineada con las
+        peticiones (None donde falló) y cada error es {'index', 'request', 'error'}.
+        """
+        orders: List[Any] = [None] * len(requests)
+        errors: List[Dict[str, Any]] = []
+
+        def _call(index: int):
+            try:
+                orders[index] = func(requests[index])
+            except Exception as e:
+                errors.append({"index": index, "request": requests[index], "error": str(e)})
+
+        if len(requests) <= 1 or max_workers <= 1:
+            for index in range(len(requests)):
+                _call(index)
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(requests)), thread_name_prefix="orders") as pool:
+                list(pool.map(_call, range(len(requests))))
+        errors.sort(key=lambda e: e["index"])
+        return {"orders": orders, "errors": errors}
+
+    def create_orders(self, orders: List[Dict[str, Any]], max_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Any]:
+        """
+        Crea varias órdenes. Cada elemento de `orders` lleva los mismos argumentos
+        que `create_order` (symbol, order_type, side, quantity y price opcional).
+        Un fallo no detiene al resto: se informa en 'errors' (ver `_run_batch`).
+        Por defecto se envían en paralelo; los adaptadores con un endpoint por
+        lotes lo sobrescriben.
+        """
+        return self._run_batch(lambda o: self.create_order(**o), orders, max_workers)
+
+    def cancel_all_orders(self, symbol: str, max_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Any]:
+        """
+        Cancela todas las órdenes abiertas de un símbolo. Devuelve
+        {'orders': [canceladas], 'errors': [...]}. Por defecto lista las órdenes
+        abiertas y las cancela en paralelo.
+        """
+        open_orders = self.get_open_orders(symbol)
+        result = self._run_batch(lambda o: self.cancel_order(symbol, o['orderId']), open_orders, max_workers)
+        result["orders"] = [o for o in result["orders"] if o is not None]
+        return result
+
+    def current_time(self) -> float:
+        """
+        Hora actual del mercado en segundos (epoch). En vivo es la hora del sistema;
+        los adaptadores de simulación la sobrescriben con su propio reloj.
         """
-        pass
\ No newline at end of file
+        return time.time()
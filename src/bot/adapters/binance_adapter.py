@@ -1,17 +1,25 @@
 # src/bot/adapters/binance_adapter.py
 
 import os
+import time
 from binance.client import Client
+from binance.exceptions import BinanceAPIException
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # ✅ Se corrige la ruta para importar la clase base
 from .base_exchange import BaseExchangeAdapter
 from ..logger import configurar_logger
+from ..kline_store import KlineStore, DEFAULT_KLINE_DIR, interval_to_ms
 
 load_dotenv()
 logger = configurar_logger()
 
+# Hilos para enviar órdenes en lote (Binance limita las órdenes por segundo).
+BINANCE_ORDER_WORKERS = 5
+# Máximo de órdenes por página de GET /api/v3/allOrders.
+BINANCE_ALL_ORDERS_LIMIT = 1000
+
 # ✅ Se corrige la herencia de la clase
 class BinanceAdapter(BaseExchangeAdapter):
     """
@@ -19,34 +27,80 @@ class BinanceAdapter(BaseExchangeAdapter):
     Hereda de BaseExchangeAdapter e implementa su funcionalidad.
     """
 
+    def __init__(self, api_key: str, api_secret: str, kline_cache_dir: Optional[str] = DEFAULT_KLINE_DIR):
+        """
+        :param kline_cache_dir: Directorio de la caché local de velas. None la desactiva.
+        """
+        self.kline_store = KlineStore(kline_cache_dir) if kline_cache_dir else None
+        super().__init__(api_key, api_secret)
+
     def _create_client(self) -> Client:
         """Crea el cliente de Binance usando las credenciales."""
         client = Client(self.api_key, self.api_secret)
         return client
 
+    @staticmethod
+    def _format_kline(k: list) -> Dict[str, Any]:
+        """Convierte una vela cruda de la API al formato del adaptador."""
+        return {
+            "open_time": k[0],
+            "open": float(k[1]),
+            "high": float(k[2]),
+            "low": float(k[3]),
+            "close": float(k[4]),
+            "volume": float(k[5]),
+            "close_time": k[6],
+        }
+
     def get_klines(self, symbol: str, interval: str = '1d', limit: int = 300) -> List[Dict[str, Any]]:
         """
         Obtiene datos de velas (k-lines) desde Binance.
+        Con la caché activa solo se descargan las velas posteriores al último
+        `close_time` guardado; el resto de la ventana se sirve desde disco.
         """
-        klines = self.client.get_historical_klines(symbol, interval, f"{limit} days ago UTC")
-        formatted_klines = []
-        for k in klines:
-            formatted_klines.append({
-                "open_time": k[0],
-                "open": float(k[1]),
-                "high": float(k[2]),
-                "low": float(k[3]),
-                "close": float(k[4]),
-                "volume": float(k[5]),
-                "close_time": k[6],
-            })
-        return formatted_klines
+        if self.kline_store is None:
+            klines = self.client.get_historical_klines(symbol, interval, f"{limit} days ago UTC")
+            return [self._format_kline(k) for k in klines]
+
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - limit * 86_400_000
+        interval_ms = interval_to_ms(interval)
+        stored = self.kline_store.time_range(symbol, interval)
+
+        # Lo guardado cubre el inicio de la ventana si llega hasta él o si empieza en la
+        # primera vela que existe (símbolo listado después del inicio de la ventana).
+        covers_start = stored is not None and (
+            stored[0] <= start_ms + interval_ms or self.kline_store.history_start(symbol, interval) == stored[0]
+        )
+        # Si no lo cubre (o hay un hueco) se descarga la ventana completa, una sola vez.
+        if not covers_start or stored[1] < start_ms:
+            fetch_from = start_ms
+        else:
+            fetch_from = stored[1] + 1
+
+        fresh = [self._format_kline(k) for k in self.client.get_historical_klines(symbol, interval, fetch_from)]
+
+        # Solo se persisten velas cerradas; la vela en curso se devuelve pero no se guarda.
+        closed = [k for k in fresh if k["close_time"] < now_ms]
+        in_progress = [k for k in fresh if k["close_time"] >= now_ms]
+        if fetch_from == start_ms and closed and closed[0]["open_time"] > start_ms + interval_ms:
+            # El exchange no tiene velas anteriores: la historia del símbolo empieza aquí.
+            self.kline_store.set_history_start(symbol, interval, closed[0]["open_time"])
+        added = self.kline_store.append(symbol, interval, closed)
+        logger.debug(f"Caché de velas {symbol} {interval}: {added} nuevas, desde {fetch_from}.")
+
+        window = self.kline_store.get_window(symbol, interval, start_ms)
+        return window.to_dict('records') + in_progress
 
     def get_price(self, symbol: str) -> float:
         """Obtiene el precio actual de un ticker desde Binance."""
         ticker = self.client.get_symbol_ticker(symbol=symbol)
         return float(ticker['price'])
 
+    def get_all_prices(self) -> Dict[str, float]:
+        """Obtiene el precio de todos los tickers de Binance en una sola llamada."""
+        return {t['symbol']: float(t['price']) for t in self.client.get_all_tickers()}
+
     def get_account_balance(self) -> Dict[str, float]:
         """Obtiene el balance de la cuenta de Binance."""
         account_info = self.client.get_account()
@@ -91,6 +145,44 @@ class BinanceAdapter(BaseExchangeAdapter):
         """Cancela una orden en Binance."""
         return self.client.cancel_order(symbol=symbol, orderId=order_id)
 
+    def create_orders(self, orders: List[Dict[str, Any]], max_workers: int = BINANCE_ORDER_WORKERS) -> Dict[str, Any]:
+        """
+        El spot de Binance no tiene un endpoint para crear órdenes en lote, así
+        que se envían en paralelo con menos hilos para respetar su límite de órdenes.
+        """
+        return super().create_orders(orders, max_workers=max_workers)
+
+    def cancel_all_orders(self, symbol: str, max_workers: int = BINANCE_ORDER_WORKERS) -> Dict[str, Any]:
+        """Cancela todas las órdenes abiertas del símbolo con una sola llamada (DELETE /api/v3/openOrders)."""
+        try:
+            canceled = self.client.cancel_all_open_orders(symbol=symbol)
+        except BinanceAPIException as e:
+            if e.code == -2011: # No había órdenes abiertas.
+                return {"orders": [], "errors": []}
+            return {"orders": [], "errors": [{"index": None, "request": {"symbol": symbol}, "error": str(e)}]}
+        return {"orders": canceled, "errors": []}
+
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene las órdenes ejecutadas (FILLED) de un símbolo. Con `from_order_id`
+        Binance solo devuelve las órdenes a partir de ese id, lo que evita
+        recorrer todo el historial en cada consulta; se pagina de
+        `BINANCE_ALL_ORDERS_LIMIT` en `BINANCE_ALL_ORDERS_LIMIT` hasta la más
+        reciente. Sin `from_order_id` solo se leen las últimas órdenes.
+        `updated_since` se ignora: allOrders no filtra por hora de ejecución.
+        """
+        params = {'symbol': symbol, 'limit': BINANCE_ALL_ORDERS_LIMIT}
+        if from_order_id is not None:
+            params['orderId'] = int(from_order_id)
+        filled = []
+        while True:
+            page = self.client.get_all_orders(**params)
+            filled.extend(o for o in page if o.get('status') == 'FILLED')
+            if from_order_id is None or len(page) < BINANCE_ALL_ORDERS_LIMIT:
+                return filled
+            params['orderId'] = int(page[-1]['orderId']) + 1
+
     def verify_connection(self) -> bool:
         """Verifica la conexión con la API de Binance."""
         try:
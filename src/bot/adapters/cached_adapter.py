@@ -0,0 +1,125 @@
+# src/bot/adapters/cached_adapter.py
+
+from typing import List, Dict, Any
+
+from .base_exchange import BaseExchangeAdapter
+from ..price_cache import PriceCache
+from ..account_snapshot import AccountSnapshot, DEFAULT_MAX_AGE_SECONDS
+from ..logger import configurar_logger
+
+logger = configurar_logger()
+
+class CachedExchangeAdapter(BaseExchangeAdapter):
+    """
+    Capa sobre cualquier adaptador que comparte una instantánea de precios
+    con TTL y una instantánea de balance por ciclo entre estrategias, webhooks
+    y órdenes. El resto de operaciones se delegan sin cambios al adaptador envuelto.
+    """
+
+    def __init__(self, inner: BaseExchangeAdapter, price_ttl_seconds: float = 5.0,
+                 balance_max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.inner = inner
+        self.price_cache = PriceCache(inner.get_price, inner.get_all_prices, ttl_seconds=price_ttl_seconds)
+        self.balance_snapshot = AccountSnapshot(inner.get_account_balance, max_age_seconds=balance_max_age_seconds)
+        super().__init__(inner.api_key, inner.api_secret)
+
+    def __getattr__(self, name):
+        # Métodos propios del adaptador envuelto (p. ej. get_balance del mock).
+        if name == 'inner':
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _create_client(self) -> Any:
+        return self.inner.client
+
+    def begin_cycle(self):
+        """
+        Al comienzo de cada ciclo: rellena los precios con una única llamada
+        masiva y marca el balance para volver a consultarse una sola vez.
+        """
+        self.balance_snapshot.begin_cycle()
+        loaded = self.price_cache.refresh_all()
+        if loaded:
+            logger.debug(f"Caché de precios: {loaded} precios cargados en bloque.")
+
+    def log_stats(self):
+        stats = self.price_cache.stats
+        logger.info(
+            f"💾 Caché de precios: {stats['hits']} aciertos, {stats['misses']} fallos, "
+            f"{stats['deduplicated']} deduplicadas, {stats['bulk_refreshes']} recargas en bloque "
+            f"(ratio {self.price_cache.hit_ratio():.0%})."
+        )
+        balance = self.balance_snapshot.stats
+        logger.info(
+            f"💾 Balance: {balance['fetches']} consultas, {balance['hits']} lecturas desde la instantánea, "
+            f"{balance['local_updates']} actualizaciones locales, {balance['invalidations']} invalidaciones."
+        )
+        if hasattr(self.inner, 'log_stats'):
+            self.inner.log_stats()
+
+    # --- Datos de mercado ---
+    def get_price(self, symbol: str) -> float:
+        return self.price_cache.get(symbol)
+
+    def get_all_prices(self) -> Dict[str, float]:
+        prices = self.inner.get_all_prices()
+        for symbol, price in prices.items():
+            self.price_cache.put(symbol, price, count=False)
+        return prices
+
+    def get_klines(self, symbol: str, interval: str, limit: int) -> List[Dict[str, Any]]:
+        return self.inner.get_klines(symbol, interval, limit)
+
+    # --- Cuenta y órdenes ---
+    def get_account_balance(self) -> Dict[str, float]:
+        return self.balance_snapshot.get()
+
+    def create_order(self, symbol: str, order_type: str, side: str, quantity: float, price: float = None) -> Dict[str, Any]:
+        # Las órdenes MARKET reutilizan el precio cacheado en lugar de volver a consultarlo.
+        if price is None and order_type.upper() == 'MARKET':
+            price = self.get_price(symbol)
+        try:
+            order = self.inner.create_order(symbol, order_type, side, quantity, price)
+        except Exception:
+            self.balance_snapshot.invalidate()
+            raise
+        self.balance_snapshot.apply_order(symbol, side, quantity, price, order)
+        return order
+
+    def create_orders(self, orders: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        orders = [
+            dict(o, price=self.get_price(o['symbol'])) if o.get('price') is None and o['order_type'].upper() == 'MARKET' else o
+            for o in orders
+        ]
+        result = self.inner.create_orders(orders, **kwargs)
+        if result["errors"]:
+            self.balance_snapshot.invalidate()
+        for request, order in zip(orders, result["orders"]):
+            if order is not None:
+                self.balance_snapshot.apply_order(request['symbol'], request['side'], request['quantity'], request.get('price'), order)
+        return result
+
+    def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        return self.inner.get_open_orders(symbol)
+
+    def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        try:
+            return self.inner.cancel_order(symbol, order_id)
+        finally:
+            self.balance_snapshot.invalidate()
+
+    def cancel_all_orders(self, symbol: str, **kwargs) -> Dict[str, Any]:
+        try:
+            return self.inner.cancel_all_orders(symbol, **kwargs)
+        finally:
+            self.balance_snapshot.invalidate()
+
+    def verify_connection(self) -> bool:
+        return self.inner.verify_connection()
+
+    def current_time(self) -> float:
+        return self.inner.current_time()
+
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
+        return self.inner.get_executed_orders(symbol, from_order_id=from_order_id, updated_since=updated_since)
@@ -1,9 +1,12 @@
 import os
+import time
 from binance.client import Client
+from binance.helpers import date_to_milliseconds
 from dotenv import load_dotenv
 
 # ✅ Se corrige la ruta del logger para que sea relativa
 from ..logger import configurar_logger
+from ..fetch_scheduler import FetchScheduler, klines_weight
 
 # Cargar variables de entorno y configurar logger
 load_dotenv()
@@ -31,4 +34,22 @@ def get_historical_klines(symbol, interval, start_str):
         return klines
     except Exception as e:
         logger.error(f"Error al obtener klines históricos para {symbol}: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_historical_klines_batch(symbols, interval, start_str, scheduler: FetchScheduler = None):
+    """
+    Obtiene datos históricos para varios símbolos de forma concurrente.
+    Devuelve un diccionario {símbolo: klines}; los que fallan quedan como lista vacía.
+    """
+    own_scheduler = scheduler is None
+    scheduler = scheduler or FetchScheduler()
+    days = max(0.0, (time.time() * 1000 - date_to_milliseconds(start_str)) / 86_400_000)
+    try:
+        results = scheduler.map(
+            lambda symbol: binance_client.get_historical_klines(symbol, interval, start_str),
+            symbols, bucket="binance", weight=klines_weight(interval, days), default=[]
+        )
+        return dict(zip(symbols, results))
+    finally:
+        if own_scheduler:
+            scheduler.shutdown()
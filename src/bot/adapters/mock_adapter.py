@@ -1,81 +1,357 @@
 # src/bot/adapters/mock_adapter.py
 
+import heapq
+import itertools
+import logging
 import random
+import threading
+import time
+from collections import deque
 from typing import List, Dict, Any
 
 # Se importa la clase base desde el archivo hermano 'base_exchange.py'
 from .base_exchange import BaseExchangeAdapter
 # Se importa el logger desde la carpeta 'bot' (subiendo un nivel)
 from ..logger import configurar_logger
+from ..kline_store import interval_to_ms
+
+QUOTE_CURRENCY = 'USDT'
+DEFAULT_PRICE = 50000.0
+
+
+class _OrderBook:
+    """
+    Órdenes LIMIT en reposo de un símbolo. Compras y ventas se guardan en
+    montículos por precio y orden de llegada (prioridad precio-tiempo); las
+    órdenes canceladas o ya ejecutadas se descartan al llegar a la cima.
+    """
+
+    __slots__ = ("bids", "asks")
+
+    def __init__(self):
+        self.bids: List[tuple] = []  # (-precio, secuencia, orden)
+        self.asks: List[tuple] = []  # (precio, secuencia, orden)
+
+    def add(self, order: Dict[str, Any], seq: int):
+        if order['side'] == 'BUY':
+            heapq.heappush(self.bids, (-order['price'], seq, order))
+        else:
+            heapq.heappush(self.asks, (order['price'], seq, order))
+
+    @staticmethod
+    def _top(heap: List[tuple]):
+        while heap and heap[0][2]['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def crossing(self, price: float):
+        """Itera las órdenes que el precio `price` ejecuta, en prioridad precio-tiempo."""
+        for heap, crosses in ((self.bids, lambda o: o['price'] >= price), (self.asks, lambda o: o['price'] <= price)):
+            while True:
+                order = self._top(heap)
+                if order is None or not crosses(order):
+                    break
+                yield order
+                if order['status'] == 'PARTIALLY_FILLED':
+                    break  # Sin liquidez para seguir en este lado del libro.
+
+    def depth(self, limit: int) -> Dict[str, List[List[float]]]:
+        """Libro agregado por nivel de precio: {'bids': [[precio, cantidad]], 'asks': [...]}."""
+        def _levels(heap, reverse):
+            levels: Dict[float, float] = {}
+            for _, _, order in heap:
+                if order['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                    levels[order['price']] = levels.get(order['price'], 0.0) + order['origQty'] - order['executedQty']
+            return [[p, q] for p, q in sorted(levels.items(), reverse=reverse)[:limit]]
+        return {'bids': _levels(self.bids, True), 'asks': _levels(self.asks, False)}
+
 
 class MockExchangeAdapter(BaseExchangeAdapter):
     """
-    Adaptador de simulación (mock) para pruebas.
-    No ejecuta órdenes reales. Simula la interacción con un exchange,
-    incluyendo balance, fluctuaciones de precio y ejecución de órdenes.
+    Exchange simulado en memoria, determinista y sin red. Es la implementación
+    de referencia de BaseExchangeAdapter para pruebas y benchmarks:
+
+    - Precios con paseo aleatorio a partir de una semilla (`volatility=0` los fija).
+    - IDs de orden secuenciales y un libro de órdenes por símbolo.
+    - Las órdenes LIMIT quedan en reposo reservando saldo y se ejecutan cuando
+      el precio las cruza, con ejecuciones parciales si la liquidez por
+      movimiento de precio (`liquidity_usd`) no alcanza.
+    - Registro de órdenes ejecutadas consultable con `get_executed_orders`.
+
+    Solo se registra a nivel DEBUG por orden, para no distorsionar las pruebas de carga.
     """
-    def __init__(self, api_key: str = "mock_key", api_secret: str = "mock_secret"):
+    def __init__(self, api_key: str = "mock_key", api_secret: str = "mock_secret", seed: int = 42,
+                 initial_balances: Dict[str, float] = None, initial_prices: Dict[str, float] = None,
+                 volatility: float = 0.01, liquidity_usd: float = None, fee_rate: float = 0.0,
+                 executed_history: int = 100_000):
         """
         Inicializa el adaptador simulado.
+
+        :param seed: Semilla del generador de precios; la misma semilla reproduce la misma sesión.
+        :param volatility: Variación máxima relativa del precio en cada consulta.
+        :param liquidity_usd: Volumen en USDT que cada movimiento de precio puede ejecutar
+                              contra el libro (None = ilimitado, sin ejecuciones parciales).
+        :param executed_history: Cuántas órdenes ejecutadas se conservan por símbolo.
         """
         self.logger = configurar_logger()
         self.logger.info("🔌 INICIANDO EN MODO SIMULACIÓN (MOCK) 🔌")
         super().__init__(api_key, api_secret)
-        
+
         # Atributos para la simulación
-        self._balances = {'USDT': 10000.0, 'BTC': 1.0, 'ETH': 10.0} # Saldo inicial
-        self._current_prices = {'BTCUSDT': 52000.0, 'ETHUSDT': 4500.0, 'SOLUSDT': 180.0}
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self.volatility = volatility
+        self.liquidity_usd = liquidity_usd
+        self.fee_rate = fee_rate
+        self._free = dict(initial_balances or {'USDT': 10000.0, 'BTC': 1.0, 'ETH': 10.0}) # Saldo inicial
+        self._locked: Dict[str, float] = {}
+        self._current_prices = dict(initial_prices or {'BTCUSDT': 52000.0, 'ETHUSDT': 4500.0, 'SOLUSDT': 180.0})
+
+        self._lock = threading.RLock()
+        self._order_ids = itertools.count(1)
+        self._books: Dict[str, _OrderBook] = {}
+        self._open: Dict[int, Dict[str, Any]] = {}
+        self._executed_history = executed_history
+        self._executed: Dict[str, deque] = {}
+        self.stats = {"orders": 0, "fills": 0, "partial_fills": 0, "canceled": 0, "rejected": 0}
+
+    def _create_client(self) -> Any:
+        return None
 
     def verify_connection(self) -> bool:
         self.logger.info("[MOCK] Verificando conexión... ¡Exitosa!")
         return True
 
-    def _update_mock_price(self, symbol: str):
-        """Simula una pequeña fluctuación aleatoria en el precio."""
-        price = self._current_prices.get(symbol, 50000)
-        change = price * random.uniform(-0.01, 0.01) # Fluctuación de +/- 1%
-        self._current_prices[symbol] = price + change
+    # --- Precios ---
+    def _update_mock_price(self, symbol: str) -> float:
+        """Mueve el precio con el generador sembrado y ejecuta las órdenes que cruce."""
+        price = self._current_prices.get(symbol, DEFAULT_PRICE)
+        if self.volatility:
+            price += price * self._rng.uniform(-self.volatility, self.volatility)
+        self._current_prices[symbol] = price
+        if symbol in self._books:
+            self._match(symbol, price)
+        return price
+
+    def set_price(self, symbol: str, price: float):
+        """Fija el precio de un símbolo (p. ej. para reproducir un escenario) y ejecuta lo que cruce."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._current_prices[symbol] = float(price)
+            if symbol in self._books:
+                self._match(symbol, float(price))
 
     def get_price(self, symbol: str) -> float:
-        self._update_mock_price(symbol)
-        price = self._current_prices.get(symbol)
-        self.logger.info(f"[MOCK] Precio de {symbol} es ${price:.2f} USDT")
+        symbol = symbol.upper()
+        with self._lock:
+            price = self._update_mock_price(symbol)
+        self.logger.debug(f"[MOCK] Precio de {symbol} es ${price:.2f} USDT")
         return price
 
+    def get_all_prices(self) -> Dict[str, float]:
+        """Un paso del paseo aleatorio para cada símbolo conocido, como un ticker masivo real."""
+        with self._lock:
+            return {symbol: self._update_mock_price(symbol) for symbol in list(self._current_prices)}
+
+    def get_klines(self, symbol: str, interval: str = '1d', limit: int = 300) -> List[Dict[str, Any]]:
+        """
+        Velas sintéticas de los últimos `limit` días que terminan en el precio
+        actual. Son deterministas para una misma semilla, símbolo e intervalo.
+        """
+        symbol = symbol.upper()
+        step_ms = interval_to_ms(interval)
+        count = max(1, limit * 86_400_000 // step_ms)
+        rng = random.Random(f"{self.seed}:{symbol}:{interval}")
+        with self._lock:
+            close = self._current_prices.get(symbol, DEFAULT_PRICE)
+        last_open = int(time.time() * 1000) // step_ms * step_ms
+
+        klines = []
+        for i in range(count):
+            change = rng.uniform(-self.volatility, self.volatility) if self.volatility else 0.0
+            open_ = close / (1 + change)
+            wick = abs(rng.gauss(0, self.volatility / 2)) if self.volatility else 0.0
+            open_time = last_open - i * step_ms
+            klines.append({
+                "open_time": open_time, "open": open_, "high": max(open_, close) * (1 + wick),
+                "low": min(open_, close) * (1 - wick), "close": close,
+                "volume": rng.uniform(10, 1000), "close_time": open_time + step_ms - 1,
+            })
+            close = open_
+        klines.reverse()
+        return klines
+
+    # --- Cuenta ---
+    def get_account_balance(self) -> Dict[str, float]:
+        """Devuelve el balance simulado con el mismo formato que BinanceAdapter."""
+        with self._lock:
+            assets = set(self._free) | set(self._locked)
+            return {
+                asset: {"free": self._free.get(asset, 0.0), "locked": self._locked.get(asset, 0.0)}
+                for asset in assets if self._free.get(asset, 0.0) > 0 or self._locked.get(asset, 0.0) > 0
+            }
+
     def get_balance(self, asset: str) -> float:
-        balance = self._balances.get(asset.upper(), 0.0)
-        self.logger.info(f"[MOCK] Balance de {asset}: {balance}")
-        return balance
+        with self._lock:
+            return self._free.get(asset.upper(), 0.0)
+
+    def _move(self, asset: str, free_delta: float = 0.0, locked_delta: float = 0.0):
+        if free_delta:
+            self._free[asset] = self._free.get(asset, 0.0) + free_delta
+        if locked_delta:
+            locked = self._locked.get(asset, 0.0) + locked_delta
+            self._locked[asset] = locked if abs(locked) > 1e-9 else 0.0 # Sin residuos de coma flotante.
+
+    # --- Órdenes ---
+    def _fill(self, order: Dict[str, Any], quantity: float, price: float, from_locked: bool):
+        """Aplica una ejecución (total o parcial) de `quantity` al precio `price`."""
+        base = order['symbol'].replace(QUOTE_CURRENCY, '')
+        notional = quantity * price
+        fee = notional * self.fee_rate
+        if order['side'] == 'BUY':
+            reserved = quantity * order['price'] if from_locked else 0.0
+            self._move(QUOTE_CURRENCY, free_delta=reserved - notional - fee, locked_delta=-reserved)
+            self._move(base, free_delta=quantity)
+        else:
+            self._move(base, free_delta=0.0 if from_locked else -quantity, locked_delta=-quantity if from_locked else 0.0)
+            self._move(QUOTE_CURRENCY, free_delta=notional - fee)
+
+        order['executedQty'] += quantity
+        order['cummulativeQuoteQty'] += notional
+        order['updateTime'] = int(time.time() * 1000)
+        if order['origQty'] - order['executedQty'] <= 1e-12:
+            order['status'] = 'FILLED'
+            self._open.pop(order['orderId'], None)
+            history = self._executed.get(order['symbol'])
+            if history is None:
+                history = self._executed[order['symbol']] = deque(maxlen=self._executed_history)
+            history.append(order)
+            self.stats["fills"] += 1
+        else:
+            order['status'] = 'PARTIALLY_FILLED'
+            self.stats["partial_fills"] += 1
+
+    def _match(self, symbol: str, price: float):
+        """Ejecuta contra el libro las órdenes en reposo que `price` cruza, hasta agotar la liquidez."""
+        liquidity = self.liquidity_usd
+        for order in self._books[symbol].crossing(price):
+            remaining = order['origQty'] - order['executedQty']
+            quantity = remaining if liquidity is None else min(remaining, liquidity / order['price'])
+            if quantity <= 0:
+                break
+            self._fill(order, quantity, order['price'], from_locked=True)
+            if liquidity is not None:
+                liquidity -= quantity * order['price']
+
+    def _reject(self, message: str):
+        self.stats["rejected"] += 1
+        self.logger.debug(f"[MOCK] Orden rechazada: {message}")
+        raise Exception(message)
 
     def create_order(self, symbol: str, order_type: str, side: str, quantity: float, price: float = None) -> Dict[str, Any]:
-        base_currency = symbol.replace('USDT', '')
-        quote_currency = 'USDT'
-        
-        order_price = price if price is not None else self.get_price(symbol)
-        order_cost = quantity * order_price
-
-        self.logger.info("="*50)
-        self.logger.info(f"SIMULACIÓN: Recibida orden {side.upper()} {order_type} para {quantity:.6f} {base_currency} a ~${order_price:.2f}")
-
-        if side.upper() == 'BUY':
-            if self.get_balance(quote_currency) >= order_cost:
-                self._balances[quote_currency] -= order_cost
-                self._balances[base_currency] = self.get_balance(base_currency) + quantity
-                self.logger.info("✅ ORDEN DE COMPRA SIMULADA EJECUTADA")
+        symbol, order_type, side = symbol.upper(), order_type.upper(), side.upper()
+        base_currency = symbol.replace(QUOTE_CURRENCY, '')
+        quantity = float(quantity)
+        if quantity <= 0 or side not in ('BUY', 'SELL'):
+            raise ValueError(f"Orden inválida: {side} {quantity} {symbol}")
+
+        with self._lock:
+            current = self._current_prices.setdefault(symbol, DEFAULT_PRICE)
+            order_id = next(self._order_ids)
+            now_ms = int(time.time() * 1000)
+            order = {
+                'symbol': symbol, 'orderId': order_id, 'type': order_type, 'side': side,
+                'price': float(price) if price is not None else current,
+                'origQty': quantity, 'executedQty': 0.0, 'cummulativeQuoteQty': 0.0,
+                'status': 'NEW', 'time': now_ms, 'updateTime': now_ms,
+            }
+            self.stats["orders"] += 1
+
+            if order_type == 'MARKET':
+                if side == 'BUY' and self._free.get(QUOTE_CURRENCY, 0.0) < quantity * current * (1 + self.fee_rate):
+                    self._reject("Fondos insuficientes en la simulación")
+                if side == 'SELL' and self._free.get(base_currency, 0.0) < quantity - 1e-12:
+                    self._reject("Activo insuficiente en la simulación")
+                self._fill(order, quantity, current, from_locked=False)
+            elif order_type == 'LIMIT':
+                if price is None:
+                    raise ValueError("Las órdenes LIMIT requieren precio")
+                # Las órdenes LIMIT reservan el saldo hasta ejecutarse o cancelarse.
+                if side == 'BUY':
+                    cost = quantity * order['price']
+                    if self._free.get(QUOTE_CURRENCY, 0.0) < cost * (1 + self.fee_rate):
+                        self._reject("Fondos insuficientes en la simulación")
+                    self._move(QUOTE_CURRENCY, free_delta=-cost, locked_delta=cost)
+                else:
+                    if self._free.get(base_currency, 0.0) < quantity - 1e-12:
+                        self._reject("Activo insuficiente en la simulación")
+                    self._move(base_currency, free_delta=-quantity, locked_delta=quantity)
+
+                # Una orden que ya cruza el precio actual se ejecuta al instante (al precio actual).
+                if (side == 'BUY' and order['price'] >= current) or (side == 'SELL' and order['price'] <= current):
+                    fill_qty = quantity if self.liquidity_usd is None else min(quantity, self.liquidity_usd / current)
+                    self._fill(order, fill_qty, current, from_locked=True)
+                if order['status'] != 'FILLED':
+                    self._open[order_id] = order
+                    book = self._books.get(symbol)
+                    if book is None:
+                        book = self._books[symbol] = _OrderBook()
+                    book.add(order, order_id)
             else:
-                self.logger.error("❌ FONDOS INSUFICIENTES (SIMULADO)")
-                raise Exception("Fondos insuficientes en la simulación")
-        
-        elif side.upper() == 'SELL':
-            if self.get_balance(base_currency) >= quantity:
-                self._balances[base_currency] -= quantity
-                self._balances[quote_currency] = self.get_balance(quote_currency) + order_cost
-                self.logger.info("✅ ORDEN DE VENTA SIMULADA EJECUTADA")
+                raise ValueError(f"Tipo de orden no soportado en la simulación: {order_type}")
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"[MOCK] {side} {order_type} {quantity:.6f} {symbol} @ {order['price']:.2f} -> {order['status']}")
+            return dict(order)
+
+    def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            symbol = symbol.upper() if symbol else None
+            return [dict(o) for o in self._open.values() if symbol is None or o['symbol'] == symbol]
+
+    def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        with self._lock:
+            order = self._open.get(int(order_id))
+            if order is None or order['symbol'] != symbol.upper():
+                raise Exception(f"Orden {order_id} no encontrada en la simulación")
+            del self._open[order['orderId']]
+            remaining = order['origQty'] - order['executedQty']
+            base_currency = order['symbol'].replace(QUOTE_CURRENCY, '')
+            if order['side'] == 'BUY':
+                reserved = remaining * order['price']
+                self._move(QUOTE_CURRENCY, free_delta=reserved, locked_delta=-reserved)
             else:
-                self.logger.error(f"❌ NO POSEES SUFICIENTE {base_currency} PARA VENDER (SIMULADO)")
-                raise Exception("Activo insuficiente en la simulación")
-        
-        self.logger.info(f"Nuevo balance simulado: {self._balances}")
-        self.logger.info("="*50)
-        
-        return {'symbol': symbol, 'orderId': random.randint(1000, 9999), 'status': 'FILLED'}
\ No newline at end of file
+                self._move(base_currency, free_delta=remaining, locked_delta=-remaining)
+            order['status'] = 'CANCELED'
+            order['updateTime'] = int(time.time() * 1000)
+            self.stats["canceled"] += 1
+            return dict(order)
+
+    def create_orders(self, orders: List[Dict[str, Any]], max_workers: int = None) -> Dict[str, Any]:
+        """Lote nativo: todas las órdenes se procesan bajo un único bloqueo, en orden."""
+        with self._lock:
+            return self._run_batch(lambda o: self.create_order(**o), orders, max_workers=1)
+
+    def cancel_all_orders(self, symbol: str, max_workers: int = None) -> Dict[str, Any]:
+        symbol = symbol.upper()
+        with self._lock:
+            ids = [order_id for order_id, o in self._open.items() if o['symbol'] == symbol]
+            return {"orders": [self.cancel_order(symbol, order_id) for order_id in ids], "errors": []}
+
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
+        """
+        Órdenes completamente ejecutadas del símbolo, de la más antigua a la más
+        reciente. `updated_since` se ignora (la hora simulada es la del sistema).
+        """
+        with self._lock:
+            history = self._executed.get(symbol.upper(), ())
+            if from_order_id is None:
+                return [dict(o) for o in history]
+            return [dict(o) for o in history if o['orderId'] >= int(from_order_id)]
+
+    def get_order_book(self, symbol: str, limit: int = 20) -> Dict[str, List[List[float]]]:
+        """Profundidad agregada de las órdenes en reposo del símbolo."""
+        with self._lock:
+            book = self._books.get(symbol.upper())
+            return book.depth(limit) if book else {'bids': [], 'asks': []}
@@ -0,0 +1,338 @@
+# src/bot/adapters/streaming_adapter.py
+
+import asyncio
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import websockets
+
+from .base_exchange import BaseExchangeAdapter
+from ..event_engine import MarketEvent, PRICE, CANDLE
+from ..kline_store import interval_to_ms
+from ..logger import configurar_logger
+
+logger = configurar_logger()
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443"
+DEFAULT_STREAM_INTERVALS = ("1h",)
+DEFAULT_MAX_KLINES = 10_000
+
+
+class StreamingExchangeAdapter(BaseExchangeAdapter):
+    """
+    Capa de datos de mercado en vivo sobre websockets (streams combinados de
+    Binance). Por cada símbolo suscrito mantiene el último precio (miniTicker)
+    y las velas de los intervalos configurados (kline_<intervalo>), y los sirve
+    con la misma interfaz `get_price` / `get_klines` que el adaptador REST.
+
+    - Si el stream está caído o el dato es más viejo que `stale_seconds`, se
+      recurre al adaptador REST envuelto.
+    - Al reconectar se rellenan por REST las velas perdidas durante el corte.
+    - Órdenes y cuenta se delegan sin cambios al adaptador envuelto.
+    """
+
+    def __init__(self, inner: BaseExchangeAdapter, symbols: Iterable[str] = (), ws_url: str = BINANCE_WS_URL,
+                 intervals: Iterable[str] = DEFAULT_STREAM_INTERVALS, stale_seconds: float = 10.0,
+                 max_klines: int = DEFAULT_MAX_KLINES, reconnect_max_seconds: float = 30.0, autostart: bool = True):
+        self.inner = inner
+        self.ws_url = ws_url.rstrip('/')
+        self.intervals = [i for i in intervals]
+        self.stale_seconds = stale_seconds
+        self.max_klines = max_klines
+        self.reconnect_max_seconds = reconnect_max_seconds
+
+        self._lock = threading.Lock()
+        self._symbols: List[str] = sorted({s.upper() for s in symbols})
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._klines: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._last_message = 0.0
+        self._streams_changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._engine = None
+        self.connected = False
+        self.stats = {
+            "messages": 0, "reconnects": 0, "backfills": 0,
+            "stream_prices": 0, "rest_prices": 0, "stream_klines": 0, "rest_klines": 0,
+        }
+        super().__init__(inner.api_key, inner.api_secret)
+        if autostart:
+            self.start()
+
+    def __getattr__(self, name):
+        # Métodos propios del adaptador envuelto.
+        if name == 'inner':
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _create_client(self) -> Any:
+        return self.inner.client
+
+    # --- Ciclo de vida del stream ---
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="market-stream", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Detiene el stream (las consultas pasan a REST)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.connected = False
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Cambia los símbolos suscritos; el stream se reconecta con la nueva lista."""
+        symbols = sorted({s.upper() for s in symbols})
+        with self._lock:
+            if symbols == self._symbols:
+                return
+            self._symbols = symbols
+        self._streams_changed.set()
+
+    def attach_engine(self, engine):
+        """Publica en el motor de eventos cada precio recibido y cada vela cerrada."""
+        self._engine = engine
+
+    def _stream_url(self) -> Optional[str]:
+        with self._lock:
+            symbols = list(self._symbols)
+        streams = []
+        for symbol in symbols:
+            streams.append(f"{symbol.lower()}@miniTicker")
+            streams.extend(f"{symbol.lower()}@kline_{interval}" for interval in self.intervals)
+        return f"{self.ws_url}/stream?streams={'/'.join(streams)}" if streams else None
+
+    async def _run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            self._streams_changed.clear()
+            url = self._stream_url()
+            if url is None:
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                async with websockets.connect(url, ping_interval=20, open_timeout=10) as ws:
+                    self.connected = True
+                    delay = 1.0
+                    logger.info(f"📡 Stream de mercado conectado ({len(self._symbols)} símbolos).")
+                    await asyncio.get_running_loop().run_in_executor(None, self._backfill_all)
+                    await self._consume(ws)
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"⚠️ Stream de mercado desconectado: {e}. Usando REST mientras se reconecta.")
+            finally:
+                self.connected = False
+            if self._stop.is_set():
+                break
+            if not self._streams_changed.is_set():
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_seconds)
+
+    async def _consume(self, ws):
+        """Procesa mensajes hasta que se pide parar, cambian los símbolos o el stream deja de emitir."""
+        self._last_message = time.monotonic()
+        while not self._stop.is_set() and not self._streams_changed.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+            except asyncio.TimeoutError:
+                if time.monotonic() - self._last_message > self.stale_seconds:
+                    raise ConnectionError(f"sin mensajes en {self.stale_seconds}s")
+                continue
+            self._last_message = time.monotonic()
+            self._handle_message(raw)
+
+    # --- Estado en memoria ---
+    def _handle_message(self, raw):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        data = message.get('data', message)
+        event_type = data.get('e')
+        symbol = str(data.get('s', '')).upper()
+        self.stats["messages"] += 1
+
+        if event_type == '24hrMiniTicker':
+            self._set_price(symbol, float(data['c']))
+        elif event_type == 'kline':
+            k = data['k']
+            candle = {
+                "open_time": int(k['t']), "open": float(k['o']), "high": float(k['h']),
+                "low": float(k['l']), "close": float(k['c']), "volume": float(k['v']),
+                "close_time": int(k['T']),
+            }
+            self._set_price(symbol, candle["close"])
+            self._merge_klines(symbol, k['i'], [candle])
+            if k.get('x') and self._engine is not None:
+                self._engine.post(MarketEvent(CANDLE, symbol, price=candle["close"], candle=candle))
+
+    def _set_price(self, symbol: str, price: float):
+        with self._lock:
+            self._prices[symbol] = (price, time.monotonic())
+        if self._engine is not None:
+            self._engine.post(MarketEvent(PRICE, symbol, price=price))
+
+    def _merge_klines(self, symbol: str, interval: str, candles: List[Dict[str, Any]]):
+        """Inserta o reemplaza velas por open_time manteniendo el orden; recorta a `max_klines`."""
+        if not candles:
+            return
+        key = (symbol, interval)
+        with self._lock:
+            current = self._klines.setdefault(key, [])
+            if len(candles) == 1 and (not current or candles[0]["open_time"] >= current[-1]["open_time"]):
+                # Caso habitual del stream: actualizar la vela en curso o abrir una nueva.
+                if current and current[-1]["open_time"] == candles[0]["open_time"]:
+                    current[-1] = candles[0]
+                else:
+                    current.append(candles[0])
+            else:
+                merged = {c["open_time"]: c for c in current}
+                merged.update((c["open_time"], c) for c in candles)
+                # La vela en curso que ya llega por el stream es más reciente que la de REST.
+                if current and current[-1]["close_time"] >= int(time.time() * 1000):
+                    merged[current[-1]["open_time"]] = current[-1]
+                current[:] = [merged[t] for t in sorted(merged)]
+            if len(current) > self.max_klines:
+                del current[:len(current) - self.max_klines]
+
+    def _backfill_all(self):
+        """Tras (re)conectar, recupera por REST las velas posteriores a la última guardada."""
+        with self._lock:
+            pending = [(key, candles[-1]["open_time"]) for key, candles in self._klines.items() if candles]
+        now_ms = int(time.time() * 1000)
+        for (symbol, interval), last_open in pending:
+            days = max(1, math.ceil((now_ms - last_open) / 86_400_000))
+            try:
+                fresh = self.inner.get_klines(symbol, interval, days)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo rellenar el hueco de velas de {symbol} {interval}: {e}")
+                continue
+            self._merge_klines(symbol, interval, [k for k in fresh if k["open_time"] >= last_open])
+            self.stats["backfills"] += 1
+
+    def _stream_price(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            entry = self._prices.get(symbol)
+        if self.connected and entry is not None and time.monotonic() - entry[1] <= self.stale_seconds:
+            return entry[0]
+        return None
+
+    # --- Datos de mercado ---
+    def get_price(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        price = self._stream_price(symbol)
+        if price is not None:
+            self.stats["stream_prices"] += 1
+            return price
+        self.stats["rest_prices"] += 1
+        return self.inner.get_price(symbol)
+
+    def get_all_prices(self) -> Dict[str, float]:
+        """Si todos los símbolos suscritos tienen precio vivo, se sirven sin llamar a REST."""
+        with self._lock:
+            symbols = list(self._symbols)
+        prices = {symbol: self._stream_price(symbol) for symbol in symbols}
+        if symbols and all(p is not None for p in prices.values()):
+            self.stats["stream_prices"] += len(prices)
+            return prices
+        return self.inner.get_all_prices()
+
+    def _stored_head(self, symbol: str, interval: str, start_ms: int, until_ms: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Velas guardadas en disco por el adaptador envuelto (KlineStore) entre
+        `start_ms` y `until_ms`, si cubren ese tramo sin huecos; None si no.
+        """
+        store = getattr(self.inner, 'kline_store', None)
+        if store is None:
+            return None
+        interval_ms = interval_to_ms(interval)
+        df = store.get_window(symbol, interval, start_ms)
+        df = df[df["open_time"] < until_ms]
+        if df.empty or int(df["open_time"].iloc[-1]) < until_ms - interval_ms:
+            return None
+        first = int(df["open_time"].iloc[0])
+        if first > start_ms + interval_ms and store.history_start(symbol, interval) != first:
+            return None
+        return df.to_dict('records')
+
+    def get_klines(self, symbol: str, interval: str = '1d', limit: int = 300) -> List[Dict[str, Any]]:
+        """
+        Velas de los últimos `limit` días (mismo criterio que BinanceAdapter).
+        Se sirven desde memoria si el stream está activo y llega hasta ahora:
+        si el búfer no alcanza el inicio de la ventana (p. ej. velas de 1m), el
+        tramo inicial sale de las velas guardadas en disco. Si tampoco están, se
+        piden por REST y se guardan para las siguientes consultas.
+        """
+        symbol = symbol.upper()
+        key = (symbol, interval)
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - limit * 86_400_000
+        interval_ms = interval_to_ms(interval)
+        streamed = interval in self.intervals and symbol in self._symbols
+
+        if streamed and self.connected:
+            with self._lock:
+                candles = self._klines.get(key) or []
+                live = bool(candles) and candles[-1]["close_time"] >= now_ms - interval_ms
+                tail = [dict(c) for c in candles if c["open_time"] >= start_ms] if live else None
+            window = None
+            if tail:
+                if candles[0]["open_time"] <= start_ms + interval_ms:
+                    window = tail
+                else:
+                    head = self._stored_head(symbol, interval, start_ms, tail[0]["open_time"])
+                    window = head + tail if head is not None else None
+            if window is not None:
+                self.stats["stream_klines"] += 1
+                return window
+
+        self.stats["rest_klines"] += 1
+        klines = self.inner.get_klines(symbol, interval, limit)
+        if streamed:
+            self._merge_klines(symbol, interval, klines)
+        return klines
+
+    def log_stats(self):
+        s = self.stats
+        logger.info(
+            f"📡 Stream: {s['messages']} mensajes, precios {s['stream_prices']} stream / {s['rest_prices']} REST, "
+            f"velas {s['stream_klines']} stream / {s['rest_klines']} REST, "
+            f"{s['reconnects']} reconexiones, {s['backfills']} rellenos."
+        )
+
+    # --- Cuenta y órdenes (delegadas) ---
+    def get_account_balance(self) -> Dict[str, float]:
+        return self.inner.get_account_balance()
+
+    def create_order(self, symbol: str, order_type: str, side: str, quantity: float, price: float = None) -> Dict[str, Any]:
+        return self.inner.create_order(symbol, order_type, side, quantity, price)
+
+    def create_orders(self, orders: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        return self.inner.create_orders(orders, **kwargs)
+
+    def get_open_orders(self, symbol: str = None) -> List[Dict[str, Any]]:
+        return self.inner.get_open_orders(symbol)
+
+    def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+        return self.inner.cancel_order(symbol, order_id)
+
+    def cancel_all_orders(self, symbol: str, **kwargs) -> Dict[str, Any]:
+        return self.inner.cancel_all_orders(symbol, **kwargs)
+
+    def verify_connection(self) -> bool:
+        return self.inner.verify_connection()
+
+    def current_time(self) -> float:
+        return self.inner.current_time()
+
+    def get_executed_orders(self, symbol: str, from_order_id: int = None,
+                            updated_since: int = None) -> List[Dict[str, Any]]:
+        return self.inner.get_executed_orders(symbol, from_order_id=from_order_id, updated_since=updated_since)
@@ -1,83 +1,151 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+from typing import Dict, List, Tuple
+
+from .indicators import calcular_indicadores, construir_matriz_cierres
 
 def _calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula y añade los indicadores técnicos al DataFrame.
+    Usa el motor vectorizado de `indicators` con una sola fila.
     """
     if df.empty:
         return df
-    
+
     try:
-        df.ta.ema(length=50, append=True)
-        df.ta.ema(length=200, append=True)
-        df.ta.rsi(append=True)
-        df.ta.macd(append=True)
-        
-        df.rename(columns={
-            "EMA_50": "ema50", 
-            "EMA_200": "ema200", 
-            "RSI_14": "RSI", 
-            "MACD_12_26_9": "MACD", 
-            "MACDh_12_26_9": "macd_histogram", 
-            "MACDs_12_26_9": "macd_signal"
-        }, inplace=True)
-        
+        closes = df['close'].to_numpy(dtype=float)[None, :]
+        for column, values in calcular_indicadores(closes).items():
+            # Igual que pandas_ta: si no hay historia suficiente la columna no se añade.
+            if not np.isnan(values[0]).all():
+                df[column] = values[0]
+
         df.dropna(inplace=True)
     except Exception:
         return pd.DataFrame() # Si falla, devuelve un DF vacío
-    
+
     return df
 
-def _check_signals(df: pd.DataFrame) -> str:
+def _check_signals(indicators: Dict[str, np.ndarray], valid_cols: np.ndarray) -> str:
     """
-    Revisa las señales de trading. Ahora es más seguro.
+    Revisa las señales de trading sobre las dos últimas velas válidas.
     """
     # ✅ PASO 1: Verificar que tenemos los datos necesarios
     required_columns = ['ema50', 'ema200']
-    if len(df) < 2 or not all(col in df.columns for col in required_columns):
+    if len(valid_cols) < 2 or not all(col in indicators for col in required_columns):
         return "Datos Insuficientes"
 
-    latest = df.iloc[-1]
-    previous = df.iloc[-2]
-    
-    is_golden_cross = latest['ema50'] > latest['ema200'] and previous['ema50'] <= previous['ema200']
-    is_death_cross = latest['ema50'] < latest['ema200'] and previous['ema50'] >= previous['ema200']
-    
+    latest, previous = valid_cols[-1], valid_cols[-2]
+    ema50, ema200 = indicators['ema50'], indicators['ema200']
+
+    is_golden_cross = ema50[latest] > ema200[latest] and ema50[previous] <= ema200[previous]
+    is_death_cross = ema50[latest] < ema200[latest] and ema50[previous] >= ema200[previous]
+
     if is_golden_cross:
         return "🔼 Cruce Dorado"
     if is_death_cross:
         return "🔽 Cruce de la Muerte"
-        
+
     return "Neutral"
 
+def _build_result(symbol: str, name: str, df: pd.DataFrame, closes: np.ndarray, indicators: Dict[str, np.ndarray]) -> dict:
+    """
+    Construye el resultado de una moneda a partir de su fila en el motor de indicadores.
+    """
+    # Los indicadores sin historia suficiente se ignoran, como hacía pandas_ta.
+    available = {col: values for col, values in indicators.items() if not np.isnan(values).all()}
+
+    valid = ~np.isnan(closes)
+    for values in available.values():
+        valid &= ~np.isnan(values)
+    valid_cols = np.flatnonzero(valid)
+
+    if valid_cols.size == 0:
+        return {}
+
+    latest = valid_cols[-1]
+    # La fila está rellenada a la izquierda: se traduce la columna a la posición en el df.
+    latest_data = df.iloc[latest - (len(closes) - len(df))]
+
+    def _latest(column):
+        return available[column][latest] if column in available else 0
+
+    return {
+        "Symbol": symbol.upper(),
+        "Name": name,
+        # ✅ PASO 2: Usar .get() por si alguna columna falta
+        "Price": latest_data.get('close', 0),
+        "RSI": _latest('RSI'),
+        "MACD": _latest('MACD'),
+        "macd_signal": _latest('macd_signal'),
+        "ema50": _latest('ema50'),
+        "ema200": _latest('ema200'),
+        "volume": latest_data.get('volume', 0),
+        "Signal": _check_signals(available, valid_cols)
+    }
+
+def analyze_coins(coins: List[Tuple[str, str, pd.DataFrame]]) -> List[dict]:
+    """
+    Analiza un lote de criptomonedas en una sola pasada vectorizada.
+
+    :param coins: Lista de tuplas (symbol, name, df) con las velas de cada moneda.
+    :return: Lista de resultados en el mismo orden; {} para las monedas sin datos suficientes.
+    """
+    usable = [i for i, (_, _, df) in enumerate(coins) if not df.empty and 'close' in df.columns]
+    results = [{} for _ in coins]
+    if not usable:
+        return results
+
+    matrix = construir_matriz_cierres([coins[i][2]['close'].to_numpy(dtype=float) for i in usable])
+    indicators = calcular_indicadores(matrix)
+
+    for row, i in enumerate(usable):
+        symbol, name, df = coins[i]
+        row_indicators = {col: values[row] for col, values in indicators.items()}
+        results[i] = _build_result(symbol, name, df, matrix[row], row_indicators)
+
+    return results
+
 def analyze_coin(symbol: str, name: str, df: pd.DataFrame) -> dict:
     """
     Analiza el DataFrame de una criptomoneda.
+    Es una vista sobre `analyze_coins` con un lote de un solo elemento.
     """
     if df.empty:
         return {}
 
-    df_with_indicators = _calculate_indicators(df.copy())
-    
-    if df_with_indicators.empty:
+    return analyze_coins([(symbol, name, df)])[0]
+
+def analyze_coin_from_state(symbol: str, name: str, state) -> dict:
+    """
+    Construye el resultado de una moneda a partir de su `IndicatorState`
+    incremental, sin recalcular la historia completa.
+    """
+    snapshot = state.snapshot()
+    if snapshot['close'] is None:
         return {}
-        
-    latest_data = df_with_indicators.iloc[-1]
-    trade_signal = _check_signals(df_with_indicators)
 
-    result = {
+    previous = state.previous
+    if None in (snapshot['ema50'], snapshot['ema200'], previous['ema50'], previous['ema200']):
+        trade_signal = "Datos Insuficientes"
+    else:
+        indicators = {
+            'ema50': np.array([previous['ema50'], snapshot['ema50']]),
+            'ema200': np.array([previous['ema200'], snapshot['ema200']]),
+        }
+        trade_signal = _check_signals(indicators, np.array([0, 1]))
+
+    def _value(column):
+        return snapshot[column] if snapshot[column] is not None else 0
+
+    return {
         "Symbol": symbol.upper(),
         "Name": name,
-        # ✅ PASO 2: Usar .get() por si alguna columna falta
-        "Price": latest_data.get('close', 0),
-        "RSI": latest_data.get('RSI', 0),
-        "MACD": latest_data.get('MACD', 0),
-        "macd_signal": latest_data.get('macd_signal', 0),
-        "ema50": latest_data.get('ema50', 0),
-        "ema200": latest_data.get('ema200', 0),
-        "volume": latest_data.get('volume', 0),
+        "Price": snapshot['close'],
+        "RSI": _value('RSI'),
+        "MACD": _value('MACD'),
+        "macd_signal": _value('macd_signal'),
+        "ema50": _value('ema50'),
+        "ema200": _value('ema200'),
+        "volume": snapshot['volume'],
         "Signal": trade_signal
     }
-    
-    return result
\ No newline at end of file
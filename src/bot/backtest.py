@@ -0,0 +1,262 @@
+# src/bot/backtest.py
+
+import contextlib
+import importlib
+import logging
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from .adapters.backtest_adapter import BacktestExchangeAdapter
+from .kline_store import KlineStore
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+DEFAULT_FEE_RATE = 0.001
+
+
+def cargar_velas(symbol: str, interval: str, store: KlineStore = None) -> pd.DataFrame:
+    """Carga las velas guardadas localmente para un símbolo (ver KlineStore)."""
+    store = store or KlineStore()
+    return store.load(symbol, interval)
+
+
+def calcular_metricas(equity: np.ndarray, initial_capital: float, buys: int, sells: int, fees: float) -> Dict[str, Any]:
+    """PnL, drawdown máximo y estadísticas de ejecución a partir de la curva de capital."""
+    equity = np.asarray(equity, dtype=float)
+    final = float(equity[-1]) if equity.size else initial_capital
+    peak = np.maximum.accumulate(equity) if equity.size else np.array([initial_capital])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0) if equity.size else np.array([0.0])
+    return {
+        "initial_capital": float(initial_capital),
+        "final_equity": final,
+        "pnl": final - initial_capital,
+        "pnl_pct": (final - initial_capital) / initial_capital * 100 if initial_capital else 0.0,
+        "max_drawdown_pct": float(np.nanmax(drawdown)) * 100,
+        "buys": int(buys),
+        "sells": int(sells),
+        "fills": int(buys + sells),
+        "fees": float(fees),
+    }
+
+
+# --- Backtest completo: ejecuta el código real de las estrategias ---
+
+def _strategy_class(strategy_type: str):
+    from .strategy_manager import STRATEGY_REGISTRY
+    module_name, class_name = STRATEGY_REGISTRY[strategy_type.lower()]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def run_backtest(strategy_configs: List[Dict[str, Any]], candles: Dict[str, pd.DataFrame],
+                 initial_balances: Dict[str, float] = None, fee_rate: float = DEFAULT_FEE_RATE,
+                 quiet: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta las estrategias existentes (mismas entradas que strategies.yaml)
+    vela a vela contra un BacktestExchangeAdapter.
+
+    :param quiet: Silencia los print() de las estrategias durante la simulación.
+    :return: Métricas de `calcular_metricas` más la curva de capital ('equity').
+    """
+    adapter = BacktestExchangeAdapter(candles, initial_balances=initial_balances, fee_rate=fee_rate)
+    bt_logger = logging.getLogger("backtest")
+    bt_logger.setLevel(logging.WARNING)
+
+    strategies = [
+        _strategy_class(cfg['type'])(config=cfg, exchange_adapter=adapter, logger=bt_logger)
+        for cfg in strategy_configs if cfg.get('enabled', True)
+    ]
+
+    equity = np.empty(len(adapter.timeline))
+    initial_capital = adapter.equity() if len(adapter.timeline) else 0.0
+
+    def _run_cycle():
+        for strategy in strategies:
+            if not strategy.is_running:
+                continue
+            try:
+                strategy.run()
+            except Exception as e:
+                bt_logger.warning(f"Error en {strategy.__class__.__name__} durante el backtest: {e}")
+
+    sink = open(os.devnull, 'w') if quiet else None
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+        for strategy in strategies:
+            if hasattr(strategy, 'initialize'):
+                strategy.initialize()
+            strategy.start()
+        if len(adapter.timeline):
+            _run_cycle()
+            equity[0] = adapter.equity()
+            while adapter.advance():
+                _run_cycle()
+                equity[adapter.step] = adapter.equity()
+    if sink:
+        sink.close()
+
+    executed = [o for symbol in {s.symbol.upper() for s in strategies} for o in adapter.get_executed_orders(symbol)]
+    metrics = calcular_metricas(
+        equity, initial_capital,
+        buys=sum(o['side'] == 'BUY' for o in executed),
+        sells=sum(o['side'] == 'SELL' for o in executed),
+        fees=adapter.fees_paid,
+    )
+    metrics["equity"] = pd.Series(equity, index=pd.to_datetime(adapter.timeline, unit='ms'))
+    return metrics
+
+
+# --- Rutas rápidas vectorizadas (para barridos de parámetros) ---
+
+def _equity_curve(close: np.ndarray, cash_delta: np.ndarray, pos_delta: np.ndarray, initial_capital: float) -> np.ndarray:
+    return initial_capital + np.cumsum(cash_delta) + np.cumsum(pos_delta) * close
+
+
+def _first_true(mask: np.ndarray, start: int = 0) -> int:
+    """Primer índice >= start donde mask es True (len(mask) si no hay)."""
+    hits = np.flatnonzero(mask[start:])
+    return int(hits[0]) + start if hits.size else len(mask)
+
+
+def simular_grid_rapido(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                        lower_price: float, upper_price: float, grid_levels: int,
+                        investment_per_level_usd: float, stop_loss: float = None,
+                        fee_rate: float = DEFAULT_FEE_RATE, return_equity: bool = False) -> Dict[str, Any]:
+    """
+    Simulación vectorizada de una parrilla con reposición, con las mismas reglas
+    de ejecución que BacktestExchangeAdapter:
+
+    - En la vela 0 se coloca una compra LIMIT en cada nivel por debajo del cierre.
+    - Una compra ejecutada en el nivel i coloca una venta en el nivel i+1 (desde
+      la vela siguiente) y esa venta vuelve a colocar la compra en el nivel i.
+    - Si el cierre cae al stop loss se liquida la posición a ese cierre.
+
+    Cada par de niveles es independiente, así que se resuelve con búsquedas
+    binarias sobre las velas que tocan cada nivel: el coste escala con el
+    número de fills, no con el número de velas.
+    """
+    n = len(close)
+    if n == 0 or grid_levels < 2 or upper_price <= lower_price:
+        return calcular_metricas(np.array([]), 0.0, 0, 0, 0.0)
+
+    step = (upper_price - lower_price) / (grid_levels - 1)
+    lines = [lower_price + i * step for i in range(grid_levels)]
+    stop_bar = _first_true(close <= stop_loss) if stop_loss else n
+    last_bar = min(stop_bar, n - 1)
+
+    cash_delta = np.zeros(n)
+    pos_delta = np.zeros(n)
+    buys = sells = 0
+    fees = 0.0
+    initial_capital = 0.0
+
+    for i, buy_price in enumerate(lines):
+        if not buy_price < close[0] or stop_bar == 0:
+            continue
+        qty = investment_per_level_usd / buy_price
+        initial_capital += qty * buy_price
+        sell_price = lines[i + 1] if i + 1 < grid_levels else None
+
+        buy_hits = np.flatnonzero(low[1:last_bar + 1] <= buy_price) + 1
+        sell_hits = np.flatnonzero(high[1:last_bar + 1] >= sell_price) + 1 if sell_price is not None else np.array([], dtype=int)
+        t = 0
+        while True:
+            k = np.searchsorted(buy_hits, t, side='right')
+            if k == len(buy_hits):
+                break
+            tb = buy_hits[k]
+            fill = min(buy_price, open_[tb])
+            fee = qty * fill * fee_rate
+            cash_delta[tb] -= qty * fill + fee
+            pos_delta[tb] += qty
+            buys += 1
+            fees += fee
+
+            k = np.searchsorted(sell_hits, tb, side='right')
+            if k == len(sell_hits):
+                break
+            ts = sell_hits[k]
+            fill = max(sell_price, open_[ts])
+            fee = qty * fill * fee_rate
+            cash_delta[ts] += qty * fill - fee
+            pos_delta[ts] -= qty
+            sells += 1
+            fees += fee
+            t = ts
+
+    if stop_bar < n:
+        position = pos_delta[:stop_bar + 1].sum()
+        if position > 1e-12:
+            fee = position * close[stop_bar] * fee_rate
+            cash_delta[stop_bar] += position * close[stop_bar] - fee
+            pos_delta[stop_bar] -= position
+            sells += 1
+            fees += fee
+
+    equity = _equity_curve(close, cash_delta, pos_delta, initial_capital)
+    metrics = calcular_metricas(equity, initial_capital, buys, sells, fees)
+    metrics["stopped"] = stop_bar < n
+    if return_equity:
+        metrics["equity"] = equity
+    return metrics
+
+
+def simular_dca_rapido(times_s: np.ndarray, close: np.ndarray, purchase_amount_usd: float, interval_hours: float,
+                       take_profit: float = None, stop_loss: float = None, fee_rate: float = DEFAULT_FEE_RATE,
+                       initial_capital: Optional[float] = None, return_equity: bool = False) -> Dict[str, Any]:
+    """
+    Simulación vectorizada de DCABotStrategy: compra `purchase_amount_usd` al
+    cierre cada vez que pasan más de `interval_hours` desde la última compra
+    (la primera en la vela 0) y vende todo al alcanzar TP o SL.
+    """
+    n = len(close)
+    if n == 0:
+        return calcular_metricas(np.array([]), 0.0, 0, 0, 0.0)
+
+    # La gestión de riesgo solo actúa con posición abierta: desde la vela 1.
+    exit_mask = np.zeros(n, dtype=bool)
+    if take_profit:
+        exit_mask |= close >= take_profit
+    if stop_loss:
+        exit_mask |= close <= stop_loss
+    exit_bar = _first_true(exit_mask, start=1)
+
+    interval_s = interval_hours * 3600
+    buy_bars = [0]
+    while True:
+        k = int(np.searchsorted(times_s, times_s[buy_bars[-1]] + interval_s, side='right'))
+        if k >= min(n, exit_bar):
+            break
+        buy_bars.append(k)
+    buy_bars = np.array(buy_bars)
+
+    cost_per_buy = purchase_amount_usd * (1 + fee_rate)
+    if initial_capital is None:
+        initial_capital = cost_per_buy * len(buy_bars)
+    else:
+        # El épsilon evita perder una compra cuando el capital es un múltiplo exacto del coste.
+        buy_bars = buy_bars[:int(initial_capital / cost_per_buy + 1e-9)]
+
+    cash_delta = np.zeros(n)
+    pos_delta = np.zeros(n)
+    np.add.at(cash_delta, buy_bars, -cost_per_buy)
+    np.add.at(pos_delta, buy_bars, purchase_amount_usd / close[buy_bars])
+    fees = purchase_amount_usd * fee_rate * len(buy_bars)
+    sells = 0
+
+    if exit_bar < n and len(buy_bars):
+        position = pos_delta[:exit_bar].sum()
+        fee = position * close[exit_bar] * fee_rate
+        cash_delta[exit_bar] += position * close[exit_bar] - fee
+        pos_delta[exit_bar] -= position
+        fees += fee
+        sells = 1
+
+    equity = _equity_curve(close, cash_delta, pos_delta, initial_capital)
+    metrics = calcular_metricas(equity, initial_capital, len(buy_bars), sells, fees)
+    metrics["stopped"] = exit_bar < n
+    if return_equity:
+        metrics["equity"] = equity
+    return metrics
@@ -0,0 +1,279 @@
+# src/bot/correlation_engine.py
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .kline_store import KlineStore, interval_to_ms
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+DEFAULT_WINDOW = 720 # 30 días de velas de 1h
+DEFAULT_MIN_PERIODS = 24
+# Velas de retraso con las que se espera a un símbolo antes de añadir pasos sin él.
+DEFAULT_MAX_LAG_STEPS = 3
+
+
+class RollingCorrelation:
+    """
+    Matriz de correlación de retornos logarítmicos sobre una ventana móvil,
+    mantenida de forma incremental para cientos de símbolos.
+
+    Guarda, para cada par (i, j) y solo sobre los pasos en que ambos tienen
+    retorno, las sumas Σri, Σri², Σri·rj y el número de observaciones. Cada
+    paso nuevo suma su actualización de rango 1 (productos externos) y resta
+    la del paso que sale de la ventana, así que consultar la matriz completa
+    es O(n²) y no O(ventana · n²). Cada `window` pasos las sumas se recalculan
+    desde el búfer para que no acumulen error de redondeo.
+
+    Un símbolo sin precio en un paso no aporta retorno ni en ese paso ni en el
+    siguiente (no se mezclan retornos de distinta duración).
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, symbols: Iterable[str] = ()):
+        self.window = window
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._returns = np.zeros((window, 0)) # Búfer circular de retornos (0 donde falta)
+        self._mask = np.zeros((window, 0), dtype=bool)
+        self._pos = 0
+        self._filled = 0
+        self._last_close = np.zeros(0) # Último cierre conocido de cada símbolo...
+        self._last_close_time = np.zeros(0, dtype=np.int64) # ...y el paso en que se vio
+        self.last_time: Optional[int] = None
+        self._sx = np.zeros((0, 0)) # Σ ri      (sobre los pasos con i y j)
+        self._sxx = np.zeros((0, 0)) # Σ ri²
+        self._sxy = np.zeros((0, 0)) # Σ ri·rj
+        self._n = np.zeros((0, 0)) # observaciones conjuntas
+        self._since_rebuild = 0
+        self.version = 0
+        self._cache: Dict[Tuple, Tuple[int, pd.DataFrame]] = {}
+        self.add_symbols(symbols)
+
+    # --- Símbolos ---
+    def add_symbols(self, symbols: Iterable[str]) -> int:
+        """Añade símbolos nuevos (sin historial en la ventana). Devuelve cuántos se añadieron."""
+        with self._lock:
+            new = [s.upper() for s in symbols if s.upper() not in self._index]
+            new = list(dict.fromkeys(new))
+            if not new:
+                return 0
+            for s in new:
+                self._index[s] = len(self.symbols)
+                self.symbols.append(s)
+            k = len(new)
+            self._returns = np.pad(self._returns, ((0, 0), (0, k)))
+            self._mask = np.pad(self._mask, ((0, 0), (0, k)))
+            self._last_close = np.concatenate([self._last_close, np.full(k, np.nan)])
+            self._last_close_time = np.concatenate([self._last_close_time, np.full(k, -1, dtype=np.int64)])
+            for name in ("_sx", "_sxx", "_sxy", "_n"):
+                setattr(self, name, np.pad(getattr(self, name), ((0, k), (0, k))))
+            self.version += 1
+            self._cache.clear()
+            return k
+
+    # --- Actualización ---
+    def _rank1(self, r: np.ndarray, m: np.ndarray, sign: float):
+        mf = m.astype(float)
+        rm = r * mf
+        self._sx += sign * np.outer(rm, mf)
+        self._sxx += sign * np.outer(rm * r, mf)
+        self._sxy += sign * np.outer(rm, rm)
+        self._n += sign * np.outer(mf, mf)
+
+    @staticmethod
+    def _sums(returns: np.ndarray, mask: np.ndarray):
+        mf = mask.astype(float)
+        rm = returns * mf
+        return rm.T @ mf, (rm * returns).T @ mf, rm.T @ rm, mf.T @ mf
+
+    def _ordered_rows(self, last: int) -> np.ndarray:
+        """Índices del búfer de los últimos `last` pasos, en orden cronológico."""
+        return (self._pos - last + np.arange(last)) % self.window
+
+    def _rebuild(self):
+        rows = self._ordered_rows(self._filled)
+        self._sx, self._sxx, self._sxy, self._n = self._sums(self._returns[rows], self._mask[rows])
+        self._since_rebuild = 0
+
+    def push_returns(self, returns: np.ndarray):
+        """
+        Añade pasos de retornos alineados con `symbols` (NaN = sin dato). Acepta
+        un vector (un paso) o una matriz (pasos x símbolos, en orden cronológico).
+        """
+        returns = np.atleast_2d(np.asarray(returns, dtype=float))
+        with self._lock:
+            mask = ~np.isnan(returns)
+            returns = np.where(mask, returns, 0.0)
+            steps = len(returns)
+
+            if steps * 4 > self.window:
+                # Muchos pasos a la vez: se escriben en el búfer y se recalculan las sumas con productos de matrices.
+                returns, mask = returns[-self.window:], mask[-self.window:]
+                slots = (self._pos + np.arange(len(returns))) % self.window
+                self._returns[slots], self._mask[slots] = returns, mask
+                self._pos = (self._pos + len(returns)) % self.window
+                self._filled = min(self.window, self._filled + len(returns))
+                self._rebuild()
+            else:
+                for r, m in zip(returns, mask):
+                    if self._filled == self.window:
+                        self._rank1(self._returns[self._pos], self._mask[self._pos], -1.0)
+                    else:
+                        self._filled += 1
+                    self._returns[self._pos], self._mask[self._pos] = r, m
+                    self._pos = (self._pos + 1) % self.window
+                    self._rank1(r, m, 1.0)
+                    self._since_rebuild += 1
+                if self._since_rebuild >= self.window:
+                    self._rebuild()
+            self.version += 1
+            self._cache.clear()
+
+    def push_closes(self, closes: pd.DataFrame) -> int:
+        """
+        Añade precios de cierre (índice = tiempo de apertura en ms, columnas =
+        símbolos, NaN = sin vela). Devuelve los pasos añadidos.
+        """
+        if closes.empty:
+            return 0
+        with self._lock:
+            self.add_symbols(closes.columns)
+            times = closes.index.to_numpy(dtype=np.int64)
+            prices = np.full((len(closes), len(self.symbols)), np.nan)
+            prices[:, [self._index[s.upper()] for s in closes.columns]] = closes.to_numpy(dtype=float)
+            # El primer paso solo tiene retorno si el cierre anterior es del paso inmediatamente previo.
+            carried = np.where(self._last_close_time == (self.last_time if self.last_time is not None else -1),
+                               self._last_close, np.nan)
+            previous = np.vstack([carried, prices[:-1]])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = np.log(prices / previous)
+            returns[~np.isfinite(returns)] = np.nan
+
+            # Se conserva el último cierre visto de cada símbolo (aunque falte en el último paso).
+            seen = ~np.isnan(prices)
+            has_price = seen.any(axis=0)
+            last_row = len(prices) - 1 - np.argmax(seen[::-1], axis=0)
+            cols = np.flatnonzero(has_price)
+            self._last_close[cols] = prices[last_row[cols], cols]
+            self._last_close_time[cols] = times[last_row[cols]]
+            self.last_time = int(times[-1])
+            self.push_returns(returns)
+            return len(closes)
+
+    def update(self, closes: Dict[str, float], timestamp: int) -> None:
+        """Un paso: cierres de la vela que abrió en `timestamp` (ms)."""
+        self.push_closes(pd.DataFrame([closes], index=[timestamp]))
+
+    def sync_from_store(self, store: KlineStore, symbols: Iterable[str], interval: str,
+                        max_lag_steps: int = DEFAULT_MAX_LAG_STEPS) -> int:
+        """
+        Añade las velas cerradas de `symbols` guardadas en KlineStore posteriores
+        al último paso procesado (la primera vez, solo las que caben en la ventana).
+
+        Un paso ya añadido no se puede completar después, así que solo se añaden
+        los pasos que ya tienen todos los símbolos al día; un símbolo que va más
+        de `max_lag_steps` velas por detrás deja de esperarse (cuenta como sin dato).
+        Devuelve los pasos añadidos.
+        """
+        # Todo bajo el lock: dos sesiones del dashboard que sincronizan a la vez no deben añadir las mismas velas dos veces.
+        with self._lock:
+            series, last_times = {}, {}
+            for symbol in symbols:
+                df = store.load(symbol, interval)
+                if df.empty:
+                    continue
+                last_times[symbol.upper()] = int(df["open_time"].iloc[-1])
+                if self.last_time is not None:
+                    df = df[df["open_time"] > self.last_time]
+                if not df.empty:
+                    series[symbol.upper()] = pd.Series(df["close"].to_numpy(dtype=float), index=df["open_time"].to_numpy(dtype="int64"))
+            if not series:
+                return 0
+            newest = max(last_times.values())
+            max_lag_ms = max_lag_steps * interval_to_ms(interval)
+            cutoff = min(t for t in last_times.values() if t >= newest - max_lag_ms)
+            closes = pd.DataFrame(series).sort_index()
+            closes = closes[closes.index <= cutoff]
+            if closes.empty:
+                return 0
+            if self.last_time is None:
+                closes = closes.iloc[-(self.window + 1):]
+            added = self.push_closes(closes)
+            logger.debug(f"Correlación: {added} velas nuevas de {len(series)} símbolos ({interval}).")
+            return added
+
+    # --- Consultas ---
+    @staticmethod
+    def _corr(sx, sxx, sxy, n, min_periods: int) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_i, mean_j = sx / n, sx.T / n
+            cov = sxy / n - mean_i * mean_j
+            var_i = sxx / n - mean_i ** 2
+            var_j = sxx.T / n - mean_j ** 2
+            corr = cov / np.sqrt(var_i * var_j)
+        corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        diagonal = np.diag(n) >= min_periods
+        corr[np.diag_indices_from(corr)] = np.where(diagonal, 1.0, np.nan)
+        return corr
+
+    def matrix(self, window: int = None, min_periods: int = DEFAULT_MIN_PERIODS) -> pd.DataFrame:
+        """
+        Correlación de los últimos `window` pasos (por defecto, toda la ventana).
+        La ventana completa sale de las sumas incrementales; una más corta se
+        calcula desde el búfer. El resultado se cachea hasta el siguiente paso.
+        """
+        with self._lock:
+            last = min(window or self.window, self._filled)
+            key = (last, min_periods)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+
+            if last == self._filled:
+                sums = (self._sx, self._sxx, self._sxy, self._n)
+            else:
+                rows = self._ordered_rows(last)
+                sums = self._sums(self._returns[rows], self._mask[rows])
+            corr = pd.DataFrame(self._corr(*sums, min_periods), index=self.symbols, columns=self.symbols)
+            self._cache[key] = (self.version, corr)
+            return corr
+
+    @staticmethod
+    def cluster_order(corr: pd.DataFrame) -> List[str]:
+        """
+        Orden de los símbolos por clustering jerárquico (enlace promedio sobre la
+        distancia sqrt((1 - ρ) / 2)), para que los grupos correlacionados queden
+        juntos en el mapa de calor. Los símbolos sin datos van al final.
+        """
+        from scipy.cluster.hierarchy import leaves_list, linkage
+        from scipy.spatial.distance import squareform
+
+        has_data = corr.notna().sum(axis=1).to_numpy() > 1
+        valid, rest = list(corr.index[has_data]), list(corr.index[~has_data])
+        if len(valid) < 3:
+            return valid + rest
+        sub = corr.loc[valid, valid].fillna(0.0).to_numpy()
+        distance = np.sqrt(np.clip((1.0 - sub) / 2.0, 0.0, 1.0))
+        np.fill_diagonal(distance, 0.0)
+        order = leaves_list(linkage(squareform(distance, checks=False), method="average"))
+        return [valid[i] for i in order] + rest
+
+    def clustered(self, window: int = None, min_periods: int = DEFAULT_MIN_PERIODS) -> pd.DataFrame:
+        """Como `matrix`, con filas y columnas en el orden de `cluster_order` (también cacheado)."""
+        with self._lock:
+            last = min(window or self.window, self._filled)
+            key = ("clustered", last, min_periods)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            corr = self.matrix(window, min_periods)
+            order = self.cluster_order(corr)
+            result = corr.loc[order, order]
+            self._cache[key] = (self.version, result)
+            return result
@@ -1,28 +1,49 @@
 import pandas as pd
 import requests
+from typing import Any, Dict, List
 
 # Importamos el logger de forma relativa
 from .logger import configurar_logger
+from .fetch_scheduler import FetchScheduler, klines_weight
 
 logger = configurar_logger()
 
-def get_top_cryptos(limit=100):
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+# Máximo de resultados por página que acepta CoinGecko en /coins/markets.
+COINGECKO_MAX_PER_PAGE = 250
+
+def _fetch_markets_page(base_url, page, per_page):
+    """Descarga una página de /coins/markets (lanza excepción si falla)."""
+    params = {
+        "vs_currency": "usd",
+        "order": "market_cap_desc",
+        "per_page": per_page,
+        "page": page,
+        "sparkline": False
+    }
+    response = requests.get(f"{base_url}/coins/markets", params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def get_top_cryptos(limit=100, base_url=COINGECKO_API_URL, scheduler: FetchScheduler = None):
     """
     Obtiene las principales criptomonedas por capitalización de mercado desde CoinGecko.
+    Si se pasa un `scheduler`, las páginas se descargan en paralelo respetando
+    el límite por minuto de CoinGecko. Si alguna página falla tras los
+    reintentos se devuelve una lista vacía (igual que en serie), nunca un top incompleto.
     """
     logger.info(f"Obteniendo las {limit} criptomonedas principales desde CoinGecko...")
+    per_page = min(limit, COINGECKO_MAX_PER_PAGE)
+    pages = list(range(1, -(-limit // per_page) + 1))
     try:
-        url = "https://api.coingecko.com/api/v3/coins/markets"
-        params = {
-            "vs_currency": "usd",
-            "order": "market_cap_desc",
-            "per_page": limit,
-            "page": 1,
-            "sparkline": False
-        }
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        if scheduler is not None:
+            futures = [scheduler.submit(_fetch_markets_page, base_url, page, per_page, bucket="coingecko")
+                       for page in pages]
+            results = [future.result() for future in futures]
+        else:
+            results = [_fetch_markets_page(base_url, page, per_page) for page in pages]
+
+        data = [coin for page_data in results for coin in page_data][:limit]
         return [{'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name']} for coin in data]
         
     except requests.exceptions.RequestException as e:
@@ -32,6 +53,27 @@ def get_top_cryptos(limit=100):
         logger.error(f"Error inesperado al obtener criptomonedas principales: {e}")
         return []
 
+def fetch_klines_concurrently(exchange, symbols: List[str], interval: str = '1d', limit: int = 300,
+                              scheduler: FetchScheduler = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Descarga las velas de varios símbolos en paralelo a través de un adaptador
+    de exchange, consumiendo el presupuesto de peso de Binance.
+
+    :return: Diccionario {símbolo: velas}; los símbolos que fallan quedan con lista vacía.
+    """
+    own_scheduler = scheduler is None
+    scheduler = scheduler or FetchScheduler()
+    try:
+        results = scheduler.map(
+            lambda symbol: exchange.get_klines(symbol, interval=interval, limit=limit),
+            symbols, bucket="binance", weight=klines_weight(interval, limit), default=[]
+        )
+        scheduler.log_stats(f"Velas de {len(symbols)} símbolos")
+        return dict(zip(symbols, results))
+    finally:
+        if own_scheduler:
+            scheduler.shutdown()
+
 def format_klines(klines):
     """
     Convierte los datos de klines (velas) de Binance a un DataFrame de Pandas.
@@ -0,0 +1,227 @@
+# src/bot/event_engine.py
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+PRICE = "price"
+CANDLE = "candle"
+ALL_SYMBOLS = "*"
+
+
+class MarketEvent:
+    """Evento de mercado: un nuevo precio o una vela cerrada de un símbolo."""
+
+    __slots__ = ("kind", "symbol", "price", "candle", "timestamp")
+
+    def __init__(self, kind: str, symbol: str, price: float = None, candle: Dict[str, Any] = None,
+                 timestamp: float = None):
+        self.kind = kind
+        self.symbol = symbol.upper()
+        self.price = price
+        self.candle = candle
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def __repr__(self):
+        return f"MarketEvent({self.kind}, {self.symbol}, price={self.price})"
+
+
+class EventEngine:
+    """
+    Motor de eventos por símbolo. Las estrategias se suscriben a precios o velas
+    de su símbolo y solo se invocan cuando ese símbolo se actualiza.
+
+    - `publish` despacha de forma síncrona (útil para replays deterministas).
+    - `post` encola el evento para el hilo despachador; los precios se
+      "conflacionan" por símbolo, así un suscriptor lento siempre recibe el
+      último precio en lugar de acumular atraso.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[tuple, List[Callable[[MarketEvent], None]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._latest_price: Dict[str, MarketEvent] = {}
+        self._pending_price = set()
+        self._dispatcher = None
+        self._running = False
+        self.stats = {"published": 0, "dispatched": 0, "conflated": 0, "errors": 0}
+
+    # --- Suscripciones ---
+    def subscribe(self, symbol: str, callback: Callable[[MarketEvent], None], kind: str = PRICE):
+        with self._lock:
+            self._subscribers[(kind, symbol.upper())].append(callback)
+
+    def unsubscribe(self, symbol: str, callback: Callable[[MarketEvent], None], kind: str = PRICE):
+        with self._lock:
+            callbacks = self._subscribers.get((kind, symbol.upper()), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    # --- Despacho ---
+    def publish(self, event: MarketEvent):
+        """Entrega el evento a los suscriptores del símbolo (y a los de '*') en este mismo hilo."""
+        self.stats["published"] += 1
+        with self._lock:
+            callbacks = list(self._subscribers.get((event.kind, event.symbol), ()))
+            callbacks += self._subscribers.get((event.kind, ALL_SYMBOLS), ())
+
+        for callback in callbacks:
+            try:
+                callback(event)
+                self.stats["dispatched"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error en suscriptor de {event.kind} {event.symbol}: {e}", exc_info=True)
+
+    def post(self, event: MarketEvent):
+        """Encola un evento para el hilo despachador (no bloquea a la fuente)."""
+        if event.kind == PRICE:
+            with self._lock:
+                self._latest_price[event.symbol] = event
+                if event.symbol in self._pending_price:
+                    self.stats["conflated"] += 1
+                    return
+                self._pending_price.add(event.symbol)
+            self._queue.put((PRICE, event.symbol))
+        else:
+            self._queue.put((event.kind, event))
+
+    def _dispatch_loop(self):
+        while self._running:
+            try:
+                kind, item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if kind == PRICE:
+                with self._lock:
+                    self._pending_price.discard(item)
+                    event = self._latest_price.get(item)
+            else:
+                event = item
+            if event is not None:
+                self.publish(event)
+
+    def start(self):
+        """Arranca el hilo despachador."""
+        if self._running:
+            return
+        self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="event-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self):
+        self._running = False
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=2)
+            self._dispatcher = None
+
+    # --- Fuentes ---
+    def run_source(self, source, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Consume los eventos de una fuente. En segundo plano se encolan con `post`;
+        en primer plano se despachan con `publish` (replay determinista).
+        """
+        if not background:
+            for event in source.events():
+                self.publish(event)
+            return None
+
+        self.start()
+
+        def _consume():
+            try:
+                for event in source.events():
+                    self.post(event)
+            except Exception as e:
+                logger.error(f"❌ La fuente de eventos {source.__class__.__name__} se detuvo: {e}", exc_info=True)
+
+        thread = threading.Thread(target=_consume, name=f"source-{source.__class__.__name__}", daemon=True)
+        thread.start()
+        return thread
+
+
+class PollingPriceSource:
+    """
+    Fuente de eventos basada en consultas REST al adaptador. Emite un evento de
+    precio por símbolo en cada consulta y agrega esos precios en velas locales
+    de `candle_seconds`, emitiendo un evento de vela al cerrar cada una.
+    """
+
+    def __init__(self, exchange, symbols: Iterable[str], poll_seconds: float = 2.0, candle_seconds: int = 60):
+        self.exchange = exchange
+        self.symbols = [s.upper() for s in symbols]
+        self.poll_seconds = poll_seconds
+        self.candle_seconds = candle_seconds
+        self._stop = threading.Event()
+        self._candles: Dict[str, Dict[str, Any]] = {}
+
+    def stop(self):
+        self._stop.set()
+
+    def _aggregate(self, symbol: str, price: float, now: float) -> Optional[MarketEvent]:
+        """Actualiza la vela en curso; devuelve un evento si la anterior quedó cerrada."""
+        bucket = int(now // self.candle_seconds) * self.candle_seconds
+        candle = self._candles.get(symbol)
+        closed = None
+        if candle is not None and candle["open_time"] != bucket:
+            closed = MarketEvent(CANDLE, symbol, price=candle["close"], candle=candle, timestamp=now)
+            candle = None
+        if candle is None:
+            candle = {"open_time": bucket, "open": price, "high": price, "low": price, "close": price}
+            self._candles[symbol] = candle
+        candle["high"] = max(candle["high"], price)
+        candle["low"] = min(candle["low"], price)
+        candle["close"] = price
+        return closed
+
+    def events(self) -> Iterator[MarketEvent]:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            for symbol in self.symbols:
+                try:
+                    price = self.exchange.get_price(symbol)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo consultar el precio de {symbol}: {e}")
+                    continue
+                now = time.time()
+                closed = self._aggregate(symbol, price, now)
+                if closed is not None:
+                    yield closed
+                yield MarketEvent(PRICE, symbol, price=price, timestamp=now)
+            self._stop.wait(max(0.0, self.poll_seconds - (time.monotonic() - started)))
+
+
+class ReplayEventSource:
+    """
+    Fuente local y reproducible: emite una secuencia fija de eventos, por ejemplo
+    construida a partir de velas guardadas. Con `speed=0` emite sin esperas.
+    """
+
+    def __init__(self, events: Iterable[MarketEvent], speed: float = 0.0):
+        self._events = list(events)
+        self.speed = speed
+
+    @classmethod
+    def from_klines(cls, symbol: str, klines: List[Dict[str, Any]], speed: float = 0.0) -> "ReplayEventSource":
+        """Por cada vela emite su precio de cierre y luego la vela cerrada."""
+        events = []
+        for k in klines:
+            ts = k.get("close_time", k.get("open_time", 0)) / 1000.0
+            events.append(MarketEvent(PRICE, symbol, price=k["close"], timestamp=ts))
+            events.append(MarketEvent(CANDLE, symbol, price=k["close"], candle=k, timestamp=ts))
+        return cls(events, speed=speed)
+
+    def events(self) -> Iterator[MarketEvent]:
+        previous_ts = None
+        for event in self._events:
+            if self.speed > 0 and previous_ts is not None:
+                time.sleep(max(0.0, (event.timestamp - previous_ts) / self.speed))
+            previous_ts = event.timestamp
+            yield event
@@ -0,0 +1,247 @@
+# src/bot/fetch_scheduler.py
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from tenacity import Retrying, RetryError, retry_if_exception, stop_after_attempt, wait_exponential
+
+from .kline_store import interval_to_ms
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+# --- Límites por defecto de las APIs ---
+# Binance: presupuesto de peso por minuto (el límite oficial es mayor; dejamos margen).
+BINANCE_WEIGHT_PER_MINUTE = 1200
+# Peso de una petición de klines en Binance (devuelve como mucho 1000 velas).
+BINANCE_KLINES_WEIGHT = 2
+BINANCE_KLINES_PER_REQUEST = 1000
+# CoinGecko (plan gratuito): llamadas por minuto.
+COINGECKO_CALLS_PER_MINUTE = 30
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_ATTEMPTS = 4
+
+
+class TokenBucket:
+    """
+    Cubeta de tokens thread-safe. `acquire` bloquea hasta que haya tokens
+    suficientes y devuelve los segundos esperados.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> "TokenBucket":
+        return cls(capacity=amount, refill_per_second=amount / 60.0)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                missing = (tokens - self._tokens) / self.refill_per_second
+            time.sleep(missing)
+            waited += missing
+
+    def drain(self, seconds: float):
+        """Vacía la cubeta durante `seconds` (usado cuando el servidor responde 429 con Retry-After)."""
+        with self._lock:
+            self._refill()
+            self._tokens = -seconds * self.refill_per_second
+
+
+_shared_buckets: Dict[str, TokenBucket] = {}
+_shared_buckets_lock = threading.Lock()
+
+
+def shared_buckets() -> Dict[str, TokenBucket]:
+    """
+    Cubetas por API compartidas por todos los schedulers del proceso: el
+    límite es por host, así que dos descargas simultáneas gastan un único presupuesto.
+    """
+    with _shared_buckets_lock:
+        if not _shared_buckets:
+            _shared_buckets["binance"] = TokenBucket.per_minute(BINANCE_WEIGHT_PER_MINUTE)
+            _shared_buckets["coingecko"] = TokenBucket.per_minute(COINGECKO_CALLS_PER_MINUTE)
+        return _shared_buckets
+
+
+def klines_weight(interval: str, days: float) -> float:
+    """Peso de descargar `days` días de velas de `interval`: get_historical_klines hace una petición por cada 1000 velas."""
+    candles = days * 86_400_000 / interval_to_ms(interval)
+    return BINANCE_KLINES_WEIGHT * max(1, math.ceil(candles / BINANCE_KLINES_PER_REQUEST))
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """Extrae el código HTTP de excepciones de requests o de python-binance."""
+    status = getattr(exc, "status_code", None)
+    if status is None and getattr(exc, "response", None) is not None:
+        status = getattr(exc.response, "status_code", None)
+    return status
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_throttled(exc: BaseException) -> bool:
+    return _status_code(exc) in (418, 429)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Errores de red, límites de tasa (418/429) y errores 5xx se reintentan."""
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status in (418, 429) or status >= 500)
+
+
+class FetchScheduler:
+    """
+    Ejecuta peticiones de datos de mercado de forma concurrente en un pool de
+    hilos, respetando una cubeta de tokens por API y reintentando con backoff
+    exponencial (tenacity). Lleva estadísticas de throughput y de throttling.
+
+    Sin `buckets` se usan las cubetas compartidas del proceso (`shared_buckets`).
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, buckets: Dict[str, TokenBucket] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff_max: float = 30.0):
+        self.buckets = buckets if buckets is not None else shared_buckets()
+        self.max_attempts = max_attempts
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._stats_lock = threading.Lock()
+        self._started = None
+        self._stats = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0,
+            "throttle_events": 0, "throttle_wait_s": 0.0,
+        }
+
+    # --- Estadísticas ---
+    def _count(self, key: str, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve contadores, tiempo transcurrido y throughput (peticiones exitosas por segundo)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        stats["elapsed_s"] = elapsed
+        stats["throughput_rps"] = stats["succeeded"] / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def log_stats(self, label: str = "Descarga"):
+        s = self.stats()
+        logger.info(
+            f"📊 {label}: {s['succeeded']}/{s['requests']} OK en {s['elapsed_s']:.2f}s "
+            f"({s['throughput_rps']:.1f} req/s), reintentos={s['retries']}, "
+            f"throttling={s['throttle_events']} ({s['throttle_wait_s']:.2f}s de espera)"
+        )
+
+    # --- Ejecución ---
+    def _wait(self, retry_state, bucket: Optional[TokenBucket] = None) -> float:
+        exc = retry_state.outcome.exception()
+        if exc is not None and _is_throttled(exc) and bucket is not None:
+            # La cubeta ya se vació con el Retry-After: la pausa la hace el siguiente `acquire`.
+            return 0.0
+        retry_after = _retry_after(exc) if exc is not None else None
+        if retry_after is not None:
+            return retry_after
+        return wait_exponential(multiplier=0.5, max=self.backoff_max)(retry_state)
+
+    def _run(self, bucket_name: Optional[str], weight: float, func: Callable, args, kwargs):
+        bucket = self.buckets.get(bucket_name) if bucket_name else None
+        # Un 429/418 cuenta como un único evento de throttling, aunque su espera ocurra en el acquire siguiente.
+        throttled = [False]
+
+        def _attempt():
+            if bucket is not None:
+                waited = bucket.acquire(weight)
+                if waited > 0:
+                    if not throttled[0]:
+                        self._count("throttle_events")
+                    self._count("throttle_wait_s", waited)
+            throttled[0] = False
+            try:
+                return func(*args, **kwargs)
+            except Exception as exc:
+                if _is_throttled(exc):
+                    throttled[0] = True
+                    self._count("throttle_events")
+                    if bucket is not None:
+                        bucket.drain(_retry_after(exc) or 1.0)
+                raise
+
+        def _before_sleep(retry_state):
+            self._count("retries")
+            logger.warning(f"⏳ Reintentando {getattr(func, '__name__', 'petición')} "
+                           f"(intento {retry_state.attempt_number}): {retry_state.outcome.exception()}")
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=lambda retry_state: self._wait(retry_state, bucket),
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=_before_sleep,
+            reraise=True,
+        )
+        self._count("requests")
+        try:
+            result = retrying(_attempt)
+        except (Exception, RetryError):
+            self._count("failed")
+            raise
+        self._count("succeeded")
+        return result
+
+    def submit(self, func: Callable, *args, bucket: str = None, weight: float = 1.0, **kwargs) -> Future:
+        """Encola una petición. `bucket` indica qué límite de tasa consume y `weight` cuánto."""
+        if self._started is None:
+            self._started = time.monotonic()
+        return self._executor.submit(self._run, bucket, weight, func, args, kwargs)
+
+    def map(self, func: Callable, items: Iterable[Any], bucket: str = None, weight: float = 1.0,
+            default: Any = None) -> List[Any]:
+        """
+        Aplica `func` a cada elemento de forma concurrente y devuelve los
+        resultados en el mismo orden. Si un elemento falla tras los reintentos
+        se registra el error y se devuelve `default` en su posición.
+        """
+        items = list(items)
+        futures = [self.submit(func, item, bucket=bucket, weight=weight) for item in items]
+        results = []
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"❌ Falló la descarga para {item}: {e}")
+                results.append(default)
+        return results
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
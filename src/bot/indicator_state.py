@@ -0,0 +1,229 @@
+# src/bot/indicator_state.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+
+from .indicators import (
+    EMA_FAST_LENGTH, EMA_SLOW_LENGTH, RSI_LENGTH,
+    MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+    INDICATOR_COLUMNS, calcular_indicadores,
+)
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+
+def _new_ema() -> Dict[str, Any]:
+    return {"value": None, "sum": 0.0, "count": 0}
+
+
+def _step_ema(state: Dict[str, Any], x: float, length: int) -> Optional[float]:
+    """
+    Avanza una EMA con una observación. Replica exactamente las operaciones de
+    `indicators._ema`: semilla = suma secuencial / length, luego a·x + (1-a)·ema.
+    """
+    if state["value"] is None:
+        state["sum"] += x
+        state["count"] += 1
+        if state["count"] == length:
+            state["value"] = state["sum"] / length
+    else:
+        alpha = 2.0 / (length + 1)
+        decay = 1.0 - alpha
+        state["value"] = alpha * x + decay * state["value"]
+    return state["value"]
+
+
+class IndicatorState:
+    """
+    Estado incremental de los indicadores de un símbolo (EMAs, medias de Wilder
+    del RSI y línea de señal del MACD). Cada vela cerrada cuesta O(1) y el
+    resultado coincide bit a bit con el recálculo completo de `calcular_indicadores`.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_open_time = None
+        self.last_close = None
+        self.last_volume = 0.0
+        self.emas = {str(length): _new_ema() for length in (EMA_FAST_LENGTH, EMA_SLOW_LENGTH, MACD_FAST, MACD_SLOW)}
+        self.signal_ema = _new_ema()
+        self.rsi = {"pos_num": 0.0, "neg_num": 0.0, "den": 0.0, "count": 0}
+        self.macd = None
+        self.previous = {"ema50": None, "ema200": None}
+
+    # --- Actualización ---
+    def update(self, close: float, open_time: int = None, volume: float = 0.0) -> Dict[str, Any]:
+        """
+        Incorpora la última vela cerrada. Las velas ya procesadas (open_time
+        menor o igual al último visto) se ignoran, así que es seguro reenviar
+        la ventana completa.
+        """
+        if close is None or np.isnan(close):
+            return self.snapshot()
+        if open_time is not None and self.last_open_time is not None and open_time <= self.last_open_time:
+            return self.snapshot()
+
+        close = float(close)
+        self.previous = {
+            "ema50": self.emas[str(EMA_FAST_LENGTH)]["value"],
+            "ema200": self.emas[str(EMA_SLOW_LENGTH)]["value"],
+        }
+
+        for length in (EMA_FAST_LENGTH, EMA_SLOW_LENGTH, MACD_FAST, MACD_SLOW):
+            _step_ema(self.emas[str(length)], close, length)
+
+        # RSI: medias de Wilder ajustadas (num/den), igual que `indicators._rma`.
+        if self.last_close is not None:
+            diff = close - self.last_close
+            decay = 1.0 - 1.0 / RSI_LENGTH
+            self.rsi["pos_num"] = (diff if diff > 0 else 0.0) + decay * self.rsi["pos_num"]
+            self.rsi["neg_num"] = (diff if diff < 0 else 0.0) + decay * self.rsi["neg_num"]
+            self.rsi["den"] = 1.0 + decay * self.rsi["den"]
+            self.rsi["count"] += 1
+
+        fast = self.emas[str(MACD_FAST)]["value"]
+        slow = self.emas[str(MACD_SLOW)]["value"]
+        if fast is not None and slow is not None:
+            self.macd = fast - slow
+            _step_ema(self.signal_ema, self.macd, MACD_SIGNAL)
+
+        self.last_close = close
+        self.last_volume = float(volume or 0.0)
+        if open_time is not None:
+            self.last_open_time = int(open_time)
+        return self.snapshot()
+
+    def update_from_klines(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Alimenta el estado con las velas del DataFrame que aún no se procesaron.
+        Acepta tanto `timestamp` (data_fetcher.format_klines) como `open_time` (adapters).
+        """
+        time_column = 'open_time' if 'open_time' in df.columns else 'timestamp'
+        times = pd.to_numeric(df[time_column], errors='coerce').to_numpy() if time_column in df.columns else [None] * len(df)
+        volumes = df['volume'].to_numpy(dtype=float) if 'volume' in df.columns else np.zeros(len(df))
+
+        for open_time, close, volume in zip(times, df['close'].to_numpy(dtype=float), volumes):
+            self.update(close, None if open_time is None or np.isnan(open_time) else int(open_time), volume)
+        return self.snapshot()
+
+    # --- Lectura ---
+    def _rsi_value(self) -> Optional[float]:
+        if self.rsi["count"] < RSI_LENGTH:
+            return None
+        pos_avg = self.rsi["pos_num"] / self.rsi["den"]
+        neg_avg = self.rsi["neg_num"] / self.rsi["den"]
+        if pos_avg + abs(neg_avg) == 0:
+            return None
+        return 100.0 * pos_avg / (pos_avg + abs(neg_avg))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Devuelve los valores actuales con las mismas columnas que el analizador (None si no hay historia)."""
+        signal = self.signal_ema["value"]
+        return {
+            "close": self.last_close,
+            "volume": self.last_volume,
+            "ema50": self.emas[str(EMA_FAST_LENGTH)]["value"],
+            "ema200": self.emas[str(EMA_SLOW_LENGTH)]["value"],
+            "RSI": self._rsi_value(),
+            "MACD": self.macd,
+            "macd_histogram": self.macd - signal if signal is not None else None,
+            "macd_signal": signal,
+        }
+
+    # --- Serialización ---
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "last_open_time": self.last_open_time,
+            "last_close": self.last_close,
+            "last_volume": self.last_volume,
+            "emas": self.emas,
+            "signal_ema": self.signal_ema,
+            "rsi": self.rsi,
+            "macd": self.macd,
+            "previous": self.previous,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls(data["symbol"])
+        state.last_open_time = data.get("last_open_time")
+        state.last_close = data.get("last_close")
+        state.last_volume = data.get("last_volume", 0.0)
+        state.emas.update(data.get("emas", {}))
+        state.signal_ema = data.get("signal_ema", _new_ema())
+        state.rsi = data.get("rsi", state.rsi)
+        state.macd = data.get("macd")
+        state.previous = data.get("previous", state.previous)
+        return state
+
+
+class IndicatorStateStore:
+    """
+    Persiste en disco el estado incremental de todos los símbolos entre ejecuciones.
+    """
+
+    def __init__(self, path: str = "data/indicator_state.json"):
+        self.path = path
+        self.states: Dict[str, IndicatorState] = {}
+        self.load()
+
+    def load(self):
+        """Carga los estados guardados (si el archivo existe)."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.states = {symbol: IndicatorState.from_dict(data) for symbol, data in raw.items()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ No se pudo leer el estado de indicadores en '{self.path}': {e}. Se recalculará desde cero.")
+            self.states = {}
+
+    def save(self):
+        """Guarda los estados de forma atómica (archivo temporal + rename)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({symbol: state.to_dict() for symbol, state in self.states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, symbol: str) -> IndicatorState:
+        symbol = symbol.upper()
+        if symbol not in self.states:
+            self.states[symbol] = IndicatorState(symbol)
+        return self.states[symbol]
+
+    def update_from_klines(self, symbol: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Actualiza el estado del símbolo solo con las velas nuevas del DataFrame."""
+        return self.get(symbol).update_from_klines(df)
+
+
+def comparar_con_recalculo(closes: np.ndarray) -> Dict[str, float]:
+    """
+    Arnés de validación: alimenta una serie de cierres vela a vela y compara
+    cada paso con el recálculo completo de `calcular_indicadores`.
+
+    :return: Diferencia absoluta máxima por indicador (0.0 = idéntico bit a bit).
+             Una discrepancia en la disponibilidad (NaN vs valor) se reporta como inf.
+    """
+    closes = np.asarray(closes, dtype=float)
+    full = calcular_indicadores(closes[None, :])
+    state = IndicatorState("VALIDACION")
+    max_diff = {col: 0.0 for col in INDICATOR_COLUMNS}
+
+    for t, close in enumerate(closes):
+        snap = state.update(close, open_time=t)
+        for col in INDICATOR_COLUMNS:
+            expected = full[col][0, t]
+            got = snap[col]
+            if got is None or np.isnan(expected):
+                if (got is None) != np.isnan(expected):
+                    max_diff[col] = float("inf")
+                continue
+            max_diff[col] = max(max_diff[col], abs(got - expected))
+    return max_diff
@@ -0,0 +1,130 @@
+# src/bot/indicators.py
+
+import numpy as np
+from scipy.signal import lfilter
+from typing import Dict, List
+
+# --- Parámetros de los indicadores (mismos valores por defecto que pandas_ta) ---
+EMA_FAST_LENGTH = 50
+EMA_SLOW_LENGTH = 200
+RSI_LENGTH = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+
+# Nombres de salida, iguales a las columnas que usaba el analizador tras el rename.
+INDICATOR_COLUMNS = ["ema50", "ema200", "RSI", "MACD", "macd_histogram", "macd_signal"]
+
+
+def construir_matriz_cierres(series: List[np.ndarray]) -> np.ndarray:
+    """
+    Construye una matriz (símbolos × tiempo) a partir de series de cierres
+    de distinta longitud. Las series más cortas se rellenan con NaN a la
+    izquierda, de modo que la última columna es siempre la vela más reciente.
+    """
+    if not series:
+        return np.empty((0, 0))
+
+    width = max(len(s) for s in series)
+    matrix = np.full((len(series), width), np.nan)
+    for row, values in enumerate(series):
+        if len(values):
+            matrix[row, width - len(values):] = values
+    return matrix
+
+
+def _first_valid_index(x: np.ndarray) -> np.ndarray:
+    """Devuelve, por fila, el índice del primer valor no-NaN (o el ancho si no hay)."""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _ema(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    EMA por filas con la misma semilla que pandas_ta: la media simple de los
+    primeros `length` valores y luego la recursión ema = a·x + (1-a)·ema_prev.
+    Toda la matriz se filtra en una sola llamada a `lfilter`.
+    """
+    out = np.full(x.shape, np.nan)
+    n_cols = x.shape[1]
+    start = _first_valid_index(x)
+    seed_idx = start + length - 1
+    rows = np.flatnonzero(seed_idx < n_cols)
+    if rows.size == 0:
+        return out
+
+    # Semilla SMA con suma secuencial (cumsum) para que el modo incremental
+    # de `indicator_state` pueda reproducirla exactamente.
+    window = x[rows[:, None], start[rows, None] + np.arange(length)]
+    seed = np.cumsum(window, axis=1)[:, -1] / length
+
+    alpha = 2.0 / (length + 1)
+    decay = 1.0 - alpha
+    cols = np.arange(n_cols)[None, :]
+    before = cols < seed_idx[rows, None]
+    at_seed = cols == seed_idx[rows, None]
+
+    u = np.where(before, 0.0, alpha * x[rows])
+    u[at_seed] = seed
+    y = lfilter([1.0], [1.0, -decay], u, axis=1)
+    y[before] = np.nan
+    out[rows] = y
+    return out
+
+
+def _rma(x: np.ndarray, length: int) -> np.ndarray:
+    """
+    Media de Wilder (ewm ajustada con alpha=1/length y min_periods=length),
+    equivalente a `pandas_ta.rma`. Se calcula como cociente de dos filtros.
+    """
+    valid = ~np.isnan(x)
+    decay = 1.0 - 1.0 / length
+    num = lfilter([1.0], [1.0, -decay], np.where(valid, x, 0.0), axis=1)
+    den = lfilter([1.0], [1.0, -decay], valid.astype(float), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = num / den
+    out[np.cumsum(valid, axis=1) < length] = np.nan
+    return out
+
+
+def _rsi(closes: np.ndarray, length: int) -> np.ndarray:
+    """RSI de Wilder por filas."""
+    diff = np.diff(closes, axis=1, prepend=np.nan)
+    missing = np.isnan(diff)
+    positive = np.where(diff > 0, diff, 0.0)
+    negative = np.where(diff < 0, diff, 0.0)
+    positive[missing] = np.nan
+    negative[missing] = np.nan
+
+    positive_avg = _rma(positive, length)
+    negative_avg = _rma(negative, length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+def calcular_indicadores(closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcula EMA50, EMA200, RSI14 y MACD(12, 26, 9) para todos los símbolos
+    de una sola vez.
+
+    :param closes: Matriz (símbolos × tiempo) de precios de cierre. Las series
+                   más cortas deben venir rellenas con NaN a la izquierda
+                   (ver `construir_matriz_cierres`).
+    :return: Diccionario {columna: matriz (símbolos × tiempo)} con NaN donde
+             el indicador aún no tiene historia suficiente.
+    """
+    closes = np.atleast_2d(np.asarray(closes, dtype=float))
+    if closes.size == 0:
+        return {col: closes.copy() for col in INDICATOR_COLUMNS}
+
+    macd = _ema(closes, MACD_FAST) - _ema(closes, MACD_SLOW)
+    macd_signal = _ema(macd, MACD_SIGNAL)
+
+    return {
+        "ema50": _ema(closes, EMA_FAST_LENGTH),
+        "ema200": _ema(closes, EMA_SLOW_LENGTH),
+        "RSI": _rsi(closes, RSI_LENGTH),
+        "MACD": macd,
+        "macd_histogram": macd - macd_signal,
+        "macd_signal": macd_signal,
+    }
@@ -0,0 +1,150 @@
+# src/bot/kline_store.py
+
+import json
+import os
+import threading
+import pandas as pd
+from typing import List, Dict, Any, Optional
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+DEFAULT_KLINE_DIR = "data/klines"
+
+KLINE_COLUMNS = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+
+# Duración de cada intervalo de Binance en milisegundos.
+_INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+
+def interval_to_ms(interval: str) -> int:
+    """Convierte un intervalo de Binance ('1m', '1h', '1d', ...) a milisegundos."""
+    if interval not in _INTERVAL_MS:
+        raise ValueError(f"Intervalo de velas no soportado: {interval}")
+    return _INTERVAL_MS[interval]
+
+
+class KlineStore:
+    """
+    Almacén columnar en disco (un Parquet por símbolo e intervalo) de velas
+    cerradas. Permite pedir al exchange solo las velas posteriores al último
+    `close_time` guardado y servir el resto localmente.
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_KLINE_DIR):
+        self.base_dir = base_dir
+        # Reentrante: `append` lee, fusiona y escribe sin soltarlo.
+        self._lock = threading.RLock()
+        # Caché en memoria: ruta -> (mtime, DataFrame), para no releer el Parquet en cada llamada.
+        self._frames: Dict[str, Any] = {}
+        self._history_starts: Dict[str, Optional[int]] = {}
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.base_dir, interval, f"{symbol.upper()}.parquet")
+
+    def load(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Devuelve todas las velas guardadas del símbolo (DataFrame vacío si no hay)."""
+        path = self._path(symbol, interval)
+        with self._lock:
+            if not os.path.exists(path):
+                return pd.DataFrame(columns=KLINE_COLUMNS)
+
+            mtime = os.path.getmtime(path)
+            cached = self._frames.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                logger.error(f"❌ Caché de velas corrupta en '{path}', se descartará: {e}")
+                return pd.DataFrame(columns=KLINE_COLUMNS)
+
+            self._frames[path] = (mtime, df)
+            return df
+
+    def _meta_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.base_dir, interval, f"{symbol.upper()}.meta.json")
+
+    def history_start(self, symbol: str, interval: str) -> Optional[int]:
+        """`open_time` de la primera vela que existe en el exchange, si se conoce (ver `set_history_start`)."""
+        path = self._meta_path(symbol, interval)
+        with self._lock:
+            if path not in self._history_starts:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self._history_starts[path] = int(json.load(f)["history_start"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    self._history_starts[path] = None
+            return self._history_starts[path]
+
+    def set_history_start(self, symbol: str, interval: str, open_time: int):
+        """
+        Registra que el exchange no tiene velas anteriores a `open_time` (el
+        símbolo empezó a cotizar después), para no volver a pedir ese tramo.
+        """
+        path = self._meta_path(symbol, interval)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"history_start": int(open_time)}, f)
+            os.replace(tmp_path, path)
+            self._history_starts[path] = int(open_time)
+
+    def symbols(self, interval: str) -> List[str]:
+        """Símbolos con velas guardadas para el intervalo."""
+        directory = os.path.join(self.base_dir, interval)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(f[:-len(".parquet")] for f in os.listdir(directory) if f.endswith(".parquet"))
+
+    def time_range(self, symbol: str, interval: str) -> Optional[tuple]:
+        """Devuelve (primer open_time, último close_time) guardados, o None si no hay datos."""
+        df = self.load(symbol, interval)
+        if df.empty:
+            return None
+        return int(df["open_time"].iloc[0]), int(df["close_time"].iloc[-1])
+
+    def append(self, symbol: str, interval: str, klines: List[Dict[str, Any]]) -> int:
+        """
+        Añade velas cerradas al almacén, descartando duplicados por `open_time`.
+        Devuelve la cantidad de velas nuevas escritas.
+        """
+        if not klines:
+            return 0
+
+        path = self._path(symbol, interval)
+        # Lectura, fusión y escritura bajo el mismo lock: dos appends concurrentes
+        # del mismo símbolo no pueden pisarse las velas.
+        with self._lock:
+            current = self.load(symbol, interval)
+            new = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+            if not current.empty:
+                new = new[~new["open_time"].isin(current["open_time"])]
+            if new.empty:
+                return 0
+
+            merged = pd.concat([current, new], ignore_index=True) if not current.empty else new
+            merged = merged.sort_values("open_time").reset_index(drop=True)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            merged.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            self._frames[path] = (os.path.getmtime(path), merged)
+
+        return len(new)
+
+    def get_window(self, symbol: str, interval: str, start_ms: int) -> pd.DataFrame:
+        """Devuelve las velas guardadas con `open_time` >= start_ms."""
+        df = self.load(symbol, interval)
+        if df.empty:
+            return df
+        return df[df["open_time"] >= start_ms]
@@ -0,0 +1,236 @@
+# src/bot/optimizer.py
+
+import itertools
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from .backtest import DEFAULT_FEE_RATE, simular_dca_rapido, simular_grid_rapido
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+# Parámetros de cada tipo de estrategia (mismos nombres que el bloque 'parameters' de strategies.yaml).
+STRATEGY_PARAMETERS = {
+    'grid': ('lower_price', 'upper_price', 'grid_levels', 'investment_per_level_usd', 'stop_loss'),
+    'dca': ('purchase_amount_usd', 'interval_hours', 'take_profit', 'stop_loss'),
+}
+# Fracciones del histórico evaluadas en cada ronda de poda (la última siempre es el histórico completo).
+DEFAULT_RUNGS = (0.25, 0.5, 1.0)
+METRIC_COLUMNS = ['pnl', 'pnl_pct', 'max_drawdown_pct', 'buys', 'sells', 'fills', 'fees', 'stopped']
+_ARRAYS = ('open', 'high', 'low', 'close', 'time_s')
+# Las configuraciones se exportan aparte: strategies.yaml lo edita el usuario y lo recarga el bot en caliente.
+DEFAULT_EXPORT_PATH = 'strategies.optimized.yaml'
+
+# Velas del proceso trabajador: arrays memory-mapped compartidos por todas las tareas.
+_CANDLES: Dict[str, np.ndarray] = {}
+
+
+def generar_combinaciones(param_grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Producto cartesiano de los valores de cada parámetro."""
+    keys = list(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+
+def es_factible(strategy_type: str, params: Dict[str, Any]) -> bool:
+    """Descarta combinaciones sin sentido antes de simularlas."""
+    stop_loss = params.get('stop_loss')
+    if strategy_type == 'grid':
+        lower, upper = params.get('lower_price'), params.get('upper_price')
+        if lower is None or upper is None or lower >= upper or params.get('grid_levels', 10) < 2:
+            return False
+        return stop_loss is None or stop_loss < lower
+    if strategy_type == 'dca':
+        take_profit = params.get('take_profit')
+        if params.get('purchase_amount_usd', 50) <= 0 or params.get('interval_hours', 24) <= 0:
+            return False
+        return take_profit is None or stop_loss is None or stop_loss < take_profit
+    raise ValueError(f"Tipo de estrategia no soportado por el optimizador: {strategy_type}")
+
+
+# --- Proceso trabajador ---
+
+def _init_worker(paths: Dict[str, str]):
+    global _CANDLES
+    _CANDLES = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+
+def _evaluar(task) -> Dict[str, Any]:
+    strategy_type, params, end, fee_rate = task
+    c = {name: array[:end] for name, array in _CANDLES.items()}
+    if strategy_type == 'grid':
+        metrics = simular_grid_rapido(
+            c['open'], c['high'], c['low'], c['close'],
+            lower_price=params['lower_price'], upper_price=params['upper_price'],
+            grid_levels=int(params.get('grid_levels', 10)),
+            investment_per_level_usd=params.get('investment_per_level_usd', 20),
+            stop_loss=params.get('stop_loss'), fee_rate=fee_rate,
+        )
+    else:
+        metrics = simular_dca_rapido(
+            c['time_s'], c['close'],
+            purchase_amount_usd=params.get('purchase_amount_usd', 50),
+            interval_hours=params.get('interval_hours', 24),
+            take_profit=params.get('take_profit'), stop_loss=params.get('stop_loss'),
+            fee_rate=fee_rate,
+        )
+    return {key: metrics.get(key) for key in METRIC_COLUMNS}
+
+
+def _guardar_arrays(candles: pd.DataFrame, work_dir: str) -> Dict[str, str]:
+    """Vuelca las velas a .npy para que cada proceso las abra con mmap en vez de recibirlas serializadas."""
+    candles = candles.sort_values('open_time')
+    times = candles['close_time'] if 'close_time' in candles.columns else candles['open_time']
+    arrays = {
+        'open': candles['open'].to_numpy(dtype=float),
+        'high': candles['high'].to_numpy(dtype=float),
+        'low': candles['low'].to_numpy(dtype=float),
+        'close': candles['close'].to_numpy(dtype=float),
+        'time_s': times.to_numpy(dtype=float) / 1000.0,
+    }
+    paths = {}
+    for name in _ARRAYS:
+        paths[name] = os.path.join(work_dir, f"{name}.npy")
+        np.save(paths[name], arrays[name])
+    return paths
+
+
+# --- Poda ---
+
+def frente_pareto(pnl: np.ndarray, drawdown: np.ndarray) -> np.ndarray:
+    """Máscara de las configuraciones no dominadas (más PnL y menos drawdown)."""
+    order = np.lexsort((drawdown, -pnl))
+    mask = np.zeros(len(pnl), dtype=bool)
+    best_drawdown = np.inf
+    for idx in order:
+        if drawdown[idx] < best_drawdown:
+            mask[idx] = True
+            best_drawdown = drawdown[idx]
+    return mask
+
+
+def _supervivientes(results: List[Dict[str, Any]], keep_fraction: float) -> np.ndarray:
+    """Índices que pasan a la siguiente ronda: el frente de Pareto más el mejor `keep_fraction` por PnL."""
+    pnl = np.array([r['pnl_pct'] for r in results], dtype=float)
+    drawdown = np.array([r['max_drawdown_pct'] for r in results], dtype=float)
+    keep = frente_pareto(pnl, drawdown)
+    top = max(1, math.ceil(len(results) * keep_fraction))
+    keep[np.argsort(-pnl, kind='stable')[:top]] = True
+    return np.flatnonzero(keep)
+
+
+def optimizar(strategy_type: str, candles: pd.DataFrame, param_grid: Dict[str, Sequence[Any]],
+              fee_rate: float = DEFAULT_FEE_RATE, max_workers: int = None,
+              rungs: Sequence[float] = DEFAULT_RUNGS, keep_fraction: float = 0.5) -> pd.DataFrame:
+    """
+    Barrido de parámetros para una estrategia 'grid' o 'dca' sobre un histórico de velas.
+
+    Las combinaciones se evalúan en un pool de procesos con las rutas
+    vectorizadas de `backtest`. En cada ronda se simula un prefijo más largo del
+    histórico y solo sobreviven el frente de Pareto (PnL vs drawdown) y el mejor
+    `keep_fraction` por PnL; la última ronda usa el histórico completo.
+
+    :return: DataFrame ordenado por PnL con una columna por parámetro, las
+             métricas del backtest y 'pareto' (si la configuración no está dominada).
+    """
+    strategy_type = strategy_type.lower()
+    combos = [p for p in generar_combinaciones(param_grid) if es_factible(strategy_type, p)]
+    columns = list(param_grid) + METRIC_COLUMNS + ['pareto']
+    if not combos or candles.empty:
+        return pd.DataFrame(columns=columns)
+
+    n = len(candles)
+    rungs = sorted({min(1.0, float(r)) for r in rungs} | {1.0})
+    max_workers = max_workers or os.cpu_count() or 1
+    logger.info(f"🔎 Optimizando {len(combos)} configuraciones de '{strategy_type}' sobre {n} velas "
+                f"({max_workers} procesos, rondas={rungs}).")
+
+    work_dir = tempfile.mkdtemp(prefix="optimizer-")
+    try:
+        paths = _guardar_arrays(candles, work_dir)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(paths,)) as pool:
+            survivors = combos
+            for rung in rungs:
+                end = max(2, int(n * rung))
+                tasks = [(strategy_type, params, end, fee_rate) for params in survivors]
+                chunksize = max(1, len(tasks) // (max_workers * 4))
+                results = list(pool.map(_evaluar, tasks, chunksize=chunksize))
+                if rung < 1.0:
+                    keep = _supervivientes(results, keep_fraction)
+                    logger.info(f"   - Ronda {rung:.0%}: {len(keep)}/{len(survivors)} configuraciones siguen.")
+                    survivors = [survivors[i] for i in keep]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    df = pd.DataFrame([{**params, **metrics} for params, metrics in zip(survivors, results)])
+    df['pareto'] = frente_pareto(df['pnl_pct'].to_numpy(dtype=float), df['max_drawdown_pct'].to_numpy(dtype=float))
+    df = df.sort_values(['pnl_pct', 'max_drawdown_pct'], ascending=[False, True]).reset_index(drop=True)
+    df.index = df.index + 1
+    df.index.name = 'rank'
+    return df.reindex(columns=columns)
+
+
+# --- Exportación a strategies.yaml ---
+
+def _valor_yaml(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def a_entradas_yaml(resultados: pd.DataFrame, strategy_type: str, symbol: str, top: int = 5,
+                    name_prefix: str = None, enabled: bool = False) -> List[Dict[str, Any]]:
+    """Convierte las `top` mejores filas en entradas con el formato de strategies.yaml."""
+    strategy_type = strategy_type.lower()
+    prefix = name_prefix or f"Opt_{strategy_type.upper()}_{symbol.upper()}"
+    entries = []
+    for rank, row in resultados.head(top).iterrows():
+        parameters = {
+            key: _valor_yaml(row[key]) for key in STRATEGY_PARAMETERS[strategy_type]
+            if key in row.index and _valor_yaml(row[key]) is not None
+        }
+        entries.append({
+            'name': f"{prefix}_{rank}",
+            'enabled': enabled,
+            'type': strategy_type,
+            'symbol': symbol.upper(),
+            'parameters': parameters,
+        })
+    return entries
+
+
+def exportar_yaml(resultados: pd.DataFrame, strategy_type: str, symbol: str, path: str = DEFAULT_EXPORT_PATH,
+                  top: int = 5, name_prefix: str = None, enabled: bool = False) -> List[Dict[str, Any]]:
+    """
+    Escribe las mejores configuraciones como entradas de 'strategies'. Si el
+    archivo existe se añaden (o reemplazan por nombre) a sus estrategias; los
+    comentarios del archivo no se conservan, así que por defecto se escribe en
+    `strategies.optimized.yaml` para copiar a mano las que interesen. Por
+    defecto quedan deshabilitadas para revisarlas antes de operar con ellas.
+
+    La escritura es atómica (archivo temporal + os.replace), así que la
+    recarga en caliente nunca lee un archivo a medias, y el original se
+    conserva en `<path>.bak`.
+    """
+    entries = a_entradas_yaml(resultados, strategy_type, symbol, top=top, name_prefix=name_prefix, enabled=enabled)
+    config = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    names = {entry['name'] for entry in entries}
+    config['strategies'] = [s for s in config.get('strategies') or [] if s.get('name') not in names] + entries
+    if os.path.exists(path):
+        shutil.copy2(path, f"{path}.bak")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, sort_keys=False, allow_unicode=True)
+    os.replace(tmp_path, path)
+    logger.info(f"💾 {len(entries)} configuraciones exportadas a {path}")
+    return entries
@@ -0,0 +1,110 @@
+# src/bot/price_cache.py
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+
+class _Flight:
+    """Petición de precio en curso que comparten todos los hilos que la esperan."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PriceCache:
+    """
+    Instantánea de precios con TTL.
+
+    - Un precio leído hace menos de `ttl_seconds` se sirve desde memoria.
+    - Si varios hilos piden el mismo símbolo a la vez, solo uno consulta el
+      exchange y el resto espera ese resultado (single-flight).
+    - `refresh_all` rellena todos los precios con una única llamada masiva.
+    """
+
+    def __init__(self, fetch_one: Callable[[str], float], fetch_all: Optional[Callable[[], Dict[str, float]]] = None,
+                 ttl_seconds: float = 5.0):
+        self.fetch_one = fetch_one
+        self.fetch_all = fetch_all
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._prices: Dict[str, tuple] = {}
+        self._in_flight: Dict[str, _Flight] = {}
+        self.stats = {"hits": 0, "misses": 0, "deduplicated": 0, "bulk_refreshes": 0, "pushed": 0}
+
+    def get(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._prices.get(symbol)
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl_seconds:
+                self.stats["hits"] += 1
+                return entry[0]
+
+            flight = self._in_flight.get(symbol)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._in_flight[symbol] = flight
+                self.stats["misses"] += 1
+            else:
+                self.stats["deduplicated"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self.fetch_one(symbol)
+            self.put(symbol, flight.value, count=False)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(symbol, None)
+            flight.event.set()
+
+    def put(self, symbol: str, price: float, count: bool = True):
+        """Registra un precio conocido por otra vía (p. ej. el motor de eventos)."""
+        with self._lock:
+            self._prices[symbol.upper()] = (float(price), time.monotonic())
+            if count:
+                self.stats["pushed"] += 1
+
+    def refresh_all(self) -> int:
+        """Rellena la caché con una sola llamada de todos los tickers. Devuelve cuántos precios cargó."""
+        if self.fetch_all is None:
+            return 0
+        try:
+            prices = self.fetch_all()
+        except NotImplementedError:
+            self.fetch_all = None
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            for symbol, price in prices.items():
+                self._prices[symbol.upper()] = (float(price), now)
+            self.stats["bulk_refreshes"] += 1
+        return len(prices)
+
+    def invalidate(self, symbol: str = None):
+        with self._lock:
+            if symbol is None:
+                self._prices.clear()
+            else:
+                self._prices.pop(symbol.upper(), None)
+
+    def hit_ratio(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"] + self.stats["deduplicated"]
+        return (self.stats["hits"] + self.stats["deduplicated"]) / total if total else 0.0
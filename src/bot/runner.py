@@ -48,7 +48,7 @@ def run_bot():
         # El 'daemon=True' asegura que el hilo se cierre si el programa principal termina.
         strategy_thread = threading.Thread(target=manager.run_forever, args=(60,), daemon=True)
         
-        # Hilo 2: Ejecuta el servidor de webhooks de Flask
+        # Hilo 2: Ejecuta el servidor de webhooks (aiohttp)
         webhook_thread = threading.Thread(target=run_webhook_server, args=(manager,), daemon=True)
 
         # --- 3. INICIO DE AMBOS HILOS ---
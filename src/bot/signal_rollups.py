@@ -0,0 +1,140 @@
+# src/bot/signal_rollups.py
+
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Tuple, Union
+
+import pandas as pd
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+ROLLUP_DIRNAME = "_rollups" # Dentro del directorio del historial; el prefijo '_' lo excluye del dataset.
+SIGNAL_COLUMN = "Signal"
+
+# Tabla -> (resolución del bucket, columnas de agrupación además del bucket)
+ROLLUP_TABLES: Dict[str, Tuple[str, List[str]]] = {
+    "hourly": ("h", [SIGNAL_COLUMN]),
+    "daily": ("D", ["symbol", SIGNAL_COLUMN]),
+}
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+
+class SignalRollups:
+    """
+    Conteos de señales pre-agregados que se actualizan con cada lote escrito
+    en el historial:
+
+    - 'hourly': señales por tipo y hora.
+    - 'daily': señales por tipo, moneda y día.
+
+    Cada tabla es un Parquet pequeño (una fila por bucket y grupo), así que las
+    vistas del dashboard no leen el historial completo. `rebuild` las recalcula
+    desde el SignalStore si se pierden o se desincronizan.
+
+    `rebuild` no debe coincidir con escrituras del historial: dentro del proceso
+    se llama a través de `SignalStore.rebuild_rollups`, que las bloquea; desde
+    otro proceso (p. ej. el dashboard) solo es seguro con el bot detenido.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Tuple[float, pd.DataFrame]] = {} # nombre -> (mtime, tabla)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.base_dir, f"{name}.parquet")
+
+    def _load(self, name: str) -> pd.DataFrame:
+        # Se recarga solo si otro proceso (p. ej. el bot) reescribió la tabla.
+        path = self._path(name)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        cached = self._tables.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if mtime is None:
+            _, keys = ROLLUP_TABLES[name]
+            df = pd.DataFrame({"bucket": pd.Series(dtype="datetime64[ms]"),
+                               **{k: pd.Series(dtype="object") for k in keys},
+                               "count": pd.Series(dtype="int64")})
+        else:
+            df = pd.read_parquet(path)
+        self._tables[name] = (mtime, df)
+        return df
+
+    def _save(self, name: str, df: pd.DataFrame):
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = self._path(name)
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        self._tables[name] = (os.path.getmtime(path), df)
+
+    @staticmethod
+    def _aggregate(df: pd.DataFrame, freq: str, keys: List[str]) -> pd.DataFrame:
+        buckets = pd.to_datetime(df["timestamp"]).dt.floor(freq).astype("datetime64[ms]")
+        grouped = df[keys].fillna("N/A").assign(bucket=buckets)
+        return grouped.groupby(["bucket"] + keys).size().rename("count").reset_index()
+
+    # --- Escritura ---
+    def update(self, df: pd.DataFrame) -> bool:
+        """Suma al rollup las señales de `df` (columnas 'timestamp', 'symbol' y 'Signal')."""
+        if df.empty or SIGNAL_COLUMN not in df.columns:
+            return False
+        with self._lock:
+            for name, (freq, keys) in ROLLUP_TABLES.items():
+                new = self._aggregate(df, freq, keys)
+                old = self._load(name)
+                merged = (pd.concat([old, new], ignore_index=True) if not old.empty else new)
+                merged = merged.groupby(["bucket"] + keys, as_index=False)["count"].sum()
+                self._save(name, merged)
+        return True
+
+    def rebuild(self, store) -> int:
+        """
+        Recalcula las tablas desde el historial completo. Devuelve las señales contadas.
+        Usar `SignalStore.rebuild_rollups` para que ningún lote se escriba mientras tanto.
+        """
+        df = store.read(columns=["timestamp", "symbol", SIGNAL_COLUMN])
+        with self._lock:
+            for name, (freq, keys) in ROLLUP_TABLES.items():
+                if df.empty or SIGNAL_COLUMN not in df.columns:
+                    self._tables.pop(name, None)
+                    if os.path.exists(self._path(name)):
+                        os.remove(self._path(name))
+                    continue
+                self._save(name, self._aggregate(df, freq, keys))
+        logger.info(f"📚 Rollups de señales reconstruidos a partir de {len(df)} registros.")
+        return len(df)
+
+    # --- Lectura ---
+    @staticmethod
+    def _between(df: pd.DataFrame, start: DateLike, end: DateLike) -> pd.DataFrame:
+        if start is not None:
+            df = df[df["bucket"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["bucket"] <= pd.Timestamp(end)]
+        return df
+
+    def hourly(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """Señales por hora y tipo: columnas 'bucket', 'Signal', 'count'."""
+        with self._lock:
+            df = self._load("hourly")
+        return self._between(df, start, end).reset_index(drop=True)
+
+    def daily(self, symbols: Iterable[str] = None, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """Señales por día, moneda y tipo: columnas 'bucket', 'symbol', 'Signal', 'count'."""
+        with self._lock:
+            df = self._load("daily")
+        if symbols:
+            df = df[df["symbol"].isin([s.upper() for s in symbols])]
+        return self._between(df, start, end).reset_index(drop=True)
+
+    def is_empty(self) -> bool:
+        return not any(os.path.exists(self._path(name)) for name in ROLLUP_TABLES)
+
+
+def rollups_dir(signal_dir: str) -> str:
+    return os.path.join(signal_dir, ROLLUP_DIRNAME)
@@ -0,0 +1,339 @@
+# src/bot/signal_store.py
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .logger import configurar_logger
+from .signal_rollups import SignalRollups, rollups_dir
+
+logger = configurar_logger()
+
+DEFAULT_SIGNAL_DIR = "data/signals"
+DEFAULT_BATCH_SIZE = 500
+TIMESTAMP_COLUMN = "timestamp"
+SYMBOL_COLUMN = "symbol"
+# Filas por row group: las estadísticas min/max de cada grupo permiten saltar símbolos al leer.
+ROW_GROUP_SIZE = 2_000
+# Los archivos sustituidos al compactar se conservan este tiempo para los lectores que ya los abrieron.
+DEFAULT_COMPACT_GRACE_SECONDS = 600
+# Manifiesto de cada día con los archivos ya compactados (el prefijo '_' lo oculta al leer el dataset).
+COMPACTED_MANIFEST = "_compacted.json"
+# Archivos vigentes de un día a partir de los cuales `flush` compacta (un día de ejecuciones horarias).
+DEFAULT_COMPACT_AFTER_PARTS = 24
+
+# Particiones Hive por día: data/signals/date=YYYY-MM-DD/part-*.parquet
+PARTITION_SCHEMA = pa.schema([("date", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+
+def _load_manifest(root: str) -> List[Dict[str, Any]]:
+    try:
+        with open(os.path.join(root, COMPACTED_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _save_manifest(root: str, entries: List[Dict[str, Any]]):
+    path = os.path.join(root, COMPACTED_MANIFEST)
+    if not entries:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(path + ".tmp", path)
+
+
+def _is_date_only(value: DateLike) -> bool:
+    """True si `value` es un día sin hora ('2024-01-05' o un `date`)."""
+    if isinstance(value, str):
+        return len(value.strip()) <= 10
+    return isinstance(value, date) and not isinstance(value, datetime)
+
+
+def _symbol_of(record: Dict[str, Any]) -> str:
+    for key in ("Symbol", "symbol", "Coin", "coin"):
+        if record.get(key):
+            return str(record[key]).upper()
+    return "UNKNOWN"
+
+
+class SignalStore:
+    """
+    Historial columnar de señales en un dataset Parquet particionado por día y
+    ordenado por símbolo dentro de cada archivo.
+
+    - `append` acumula registros en memoria y los escribe por lotes (un archivo
+      por día y lote), así guardar una señal no abre ni reescribe archivos.
+    - `compact` une los archivos pequeños de cada día en uno solo. Los
+      originales no se borran en el acto: quedan anotados en el manifiesto del
+      día (las lecturas los ignoran en cuanto existe el archivo compactado) y
+      se eliminan en una compactación posterior, pasados `grace_seconds`.
+      `flush` la lanza sola cuando un día llega a `compact_after_parts` archivos.
+    - `read` filtra por símbolos y rango de fechas: los días fuera del rango ni
+      se abren y, dentro de cada archivo, las estadísticas de los row groups
+      descartan los símbolos que no se pidieron.
+
+    Un directorio por símbolo y día generaría miles de archivos diminutos (uno
+    por moneda y ejecución), que es justo lo que hace lentas las lecturas.
+
+    Si se indica `rollups`, cada lote escrito actualiza también sus conteos
+    pre-agregados (ver SignalRollups).
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_SIGNAL_DIR, batch_size: int = DEFAULT_BATCH_SIZE,
+                 rollups: SignalRollups = None, compact_after_parts: Optional[int] = DEFAULT_COMPACT_AFTER_PARTS):
+        """
+        :param compact_after_parts: Archivos de un mismo día que disparan la compactación
+                                    al escribir (None o 0 = solo con `compact` explícito).
+        """
+        self.base_dir = base_dir
+        self.batch_size = batch_size
+        self.rollups = rollups
+        self.compact_after_parts = compact_after_parts
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+
+    # --- Escritura ---
+    def append(self, records: Union[pd.DataFrame, Iterable[Dict[str, Any]]], timestamp: datetime = None) -> int:
+        """
+        Añade señales al búfer. Los registros sin 'timestamp' reciben `timestamp`
+        (por defecto, ahora). Se escribe a disco al llegar a `batch_size`.
+        Devuelve cuántos registros se añadieron.
+        """
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict('records')
+        timestamp = timestamp or datetime.now()
+        added = []
+        for record in records:
+            record = dict(record)
+            record[TIMESTAMP_COLUMN] = pd.Timestamp(record.get(TIMESTAMP_COLUMN) or timestamp).to_pydatetime()
+            added.append(record)
+
+        with self._lock:
+            self._buffer.extend(added)
+            should_flush = len(self._buffer) >= self.batch_size
+        if should_flush:
+            self.flush()
+        return len(added)
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        # Los numéricos se guardan siempre como float64 para que los esquemas de distintos lotes sean compatibles.
+        for column in df.columns:
+            if column != TIMESTAMP_COLUMN and pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+                df[column] = df[column].astype("float64")
+        df[TIMESTAMP_COLUMN] = pd.to_datetime(df[TIMESTAMP_COLUMN]).astype("datetime64[ms]")
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def flush(self) -> int:
+        """Escribe el búfer: un archivo Parquet por día, ordenado por símbolo. Devuelve los registros escritos."""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if not records:
+                return 0
+            df = pd.DataFrame(records)
+            df[SYMBOL_COLUMN] = [_symbol_of(r) for r in records]
+            days = pd.to_datetime(df[TIMESTAMP_COLUMN]).dt.strftime("%Y-%m-%d")
+
+            crowded = False
+            for day, group in df.groupby(days, sort=False):
+                directory = os.path.join(self.base_dir, f"date={day}")
+                os.makedirs(directory, exist_ok=True)
+                group = group.sort_values([SYMBOL_COLUMN, TIMESTAMP_COLUMN], kind="stable").reset_index(drop=True)
+                name = f"part-{uuid.uuid4().hex}.parquet"
+                tmp = os.path.join(directory, f".{name}.tmp")  # Oculto a las lecturas mientras se escribe
+                pq.write_table(self._to_table(group), tmp, row_group_size=ROW_GROUP_SIZE)
+                os.replace(tmp, os.path.join(directory, name))
+                if self.compact_after_parts:
+                    crowded = crowded or len(self._live_parts(directory)) >= self.compact_after_parts
+
+            if self.rollups is not None:
+                try:
+                    self.rollups.update(df)
+                except Exception as e:
+                    logger.error(f"No se pudieron actualizar los rollups de señales: {e}")
+        logger.debug(f"Historial de señales: {len(records)} registros escritos en {self.base_dir}.")
+        if crowded:
+            # También borra los archivos ya compactados de días anteriores cuya gracia venció.
+            try:
+                self.compact(min_files=self.compact_after_parts)
+            except Exception as e:
+                logger.error(f"No se pudo compactar el historial de señales: {e}")
+        return len(records)
+
+    def rebuild_rollups(self) -> int:
+        """
+        Recalcula los rollups desde el historial bloqueando las escrituras: un
+        `flush` entre la lectura del historial y el guardado de las tablas
+        perdería su lote o lo contaría dos veces. Devuelve las señales contadas.
+        """
+        if self.rollups is None:
+            return 0
+        with self._lock:
+            return self.rollups.rebuild(self)
+
+    def compact(self, min_files: int = 2, grace_seconds: float = DEFAULT_COMPACT_GRACE_SECONDS) -> int:
+        """
+        Une en un solo archivo los días con al menos `min_files` archivos.
+        Primero se escribe el archivo compactado; los originales se borran en
+        una compactación posterior, cuando han pasado `grace_seconds`, para no
+        quitárselos a lecturas en curso. Devuelve cuántos días se compactaron.
+        """
+        compacted = 0
+        with self._lock:
+            for day in self.dates():
+                root = os.path.join(self.base_dir, f"date={day}")
+                entries = self._purge_superseded(root, grace_seconds)
+                parts = self._live_parts(root, entries)
+                if len(parts) < min_files:
+                    continue
+                tables = [pq.read_table(os.path.join(root, f)) for f in parts]
+                merged = pa.concat_tables(tables, promote_options="permissive").sort_by(
+                    [(SYMBOL_COLUMN, "ascending"), (TIMESTAMP_COLUMN, "ascending")]
+                )
+                name = f"part-{uuid.uuid4().hex}.parquet"
+                tmp = os.path.join(root, f".{name}.tmp")
+                pq.write_table(merged, tmp, row_group_size=ROW_GROUP_SIZE)
+                # El manifiesto va antes que el archivo: mientras este no exista, los originales siguen vigentes.
+                _save_manifest(root, entries + [{"parts": parts, "replaced_by": name, "at": time.time()}])
+                os.replace(tmp, os.path.join(root, name))
+                compacted += 1
+        if compacted:
+            logger.info(f"🗜️ Historial de señales compactado: {compacted} particiones.")
+        return compacted
+
+    @staticmethod
+    def _live_parts(root: str, entries: List[Dict[str, Any]] = None) -> List[str]:
+        """Archivos del día que no han sido sustituidos por una compactación."""
+        if entries is None:
+            entries = _load_manifest(root)
+        superseded = {f for entry in entries for f in entry["parts"]}
+        return sorted(f for f in os.listdir(root) if f.endswith(".parquet") and f not in superseded)
+
+    @staticmethod
+    def _purge_superseded(root: str, grace_seconds: float) -> List[Dict[str, Any]]:
+        """Borra los archivos compactados hace más de `grace_seconds`; devuelve las entradas aún vigentes."""
+        entries, kept = _load_manifest(root), []
+        now = time.time()
+        for entry in entries:
+            if not os.path.exists(os.path.join(root, entry["replaced_by"])):
+                continue  # Compactación interrumpida: los originales siguen siendo los datos del día.
+            if now - entry["at"] < grace_seconds:
+                kept.append(entry)
+                continue
+            for f in entry["parts"]:
+                try:
+                    os.remove(os.path.join(root, f))
+                except FileNotFoundError:
+                    pass
+        if len(kept) != len(entries):
+            _save_manifest(root, kept)
+        return kept
+
+    # --- Lectura ---
+    @staticmethod
+    def _filter(symbols: Optional[Iterable[str]], start: Optional[DateLike], end: Optional[DateLike]):
+        expression = None
+
+        def _and(expr):
+            return expr if expression is None else expression & expr
+
+        if symbols:
+            expression = _and(ds.field(SYMBOL_COLUMN).isin([s.upper() for s in symbols]))
+        if start is not None:
+            start = pd.Timestamp(start)
+            expression = _and(ds.field("date") >= start.strftime("%Y-%m-%d"))
+            expression = _and(ds.field(TIMESTAMP_COLUMN) >= pa.scalar(start.to_pydatetime(), pa.timestamp("ms")))
+        if end is not None:
+            whole_day = _is_date_only(end)
+            end = pd.Timestamp(end)
+            expression = _and(ds.field("date") <= end.strftime("%Y-%m-%d"))
+            if whole_day:
+                # Un fin sin hora incluye todo ese día.
+                next_day = (end.normalize() + pd.Timedelta(days=1)).to_pydatetime()
+                expression = _and(ds.field(TIMESTAMP_COLUMN) < pa.scalar(next_day, pa.timestamp("ms")))
+            else:
+                expression = _and(ds.field(TIMESTAMP_COLUMN) <= pa.scalar(end.to_pydatetime(), pa.timestamp("ms")))
+        return expression
+
+    @staticmethod
+    def _without_superseded(fragments: List[Any]) -> List[Any]:
+        """Quita los archivos ya compactados cuyo sustituto está entre los listados."""
+        listed = {f.path for f in fragments}
+        skipped = set()
+        for root in {os.path.dirname(path) for path in listed}:
+            for entry in _load_manifest(root):
+                if os.path.join(root, entry["replaced_by"]) in listed:
+                    skipped.update(os.path.join(root, f) for f in entry["parts"])
+        return [f for f in fragments if f.path not in skipped] if skipped else fragments
+
+    def read(self, symbols: Iterable[str] = None, start: DateLike = None, end: DateLike = None,
+             columns: List[str] = None) -> pd.DataFrame:
+        """
+        Lee el historial filtrado por símbolos y rango de fechas (inclusive).
+        Los registros aún en el búfer no se incluyen (llamar antes a `flush`).
+        Incluye la columna de partición 'date' y la columna normalizada 'symbol'.
+        """
+        if not os.path.isdir(self.base_dir):
+            return pd.DataFrame(columns=columns or [])
+
+        expression = self._filter(symbols, start, end)
+        dataset = ds.dataset(self.base_dir, format="parquet", partitioning=PARTITIONING)
+        fragments = self._without_superseded(list(dataset.get_fragments(filter=expression)))
+        if not fragments:
+            return pd.DataFrame(columns=columns or [])
+
+        # Lotes distintos pueden traer columnas distintas: se unifican sus esquemas.
+        schema = pa.unify_schemas([f.physical_schema for f in fragments] + [PARTITION_SCHEMA],
+                                  promote_options="permissive")
+        dataset = ds.dataset([f.path for f in fragments], schema=schema, format="parquet",
+                             partitioning=PARTITIONING, partition_base_dir=self.base_dir)
+        if columns:
+            columns = [c for c in columns if c in schema.names]
+        table = dataset.to_table(columns=columns, filter=expression)
+        df = table.to_pandas()
+        return df.sort_values(TIMESTAMP_COLUMN, kind="stable").reset_index(drop=True) if TIMESTAMP_COLUMN in df.columns else df
+
+    def symbols(self) -> List[str]:
+        """Símbolos con historial guardado (solo lee la columna 'symbol')."""
+        df = self.read(columns=[SYMBOL_COLUMN])
+        return sorted(df[SYMBOL_COLUMN].unique()) if not df.empty else []
+
+    def dates(self) -> List[str]:
+        """Días con historial guardado (sin abrir los archivos)."""
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(d[len("date="):] for d in os.listdir(self.base_dir) if d.startswith("date="))
+
+
+_stores: Dict[str, SignalStore] = {}
+_stores_lock = threading.Lock()
+
+
+def obtener_signal_store(base_dir: str = DEFAULT_SIGNAL_DIR) -> SignalStore:
+    """
+    Instancia compartida por directorio, con sus rollups en `<base_dir>/_rollups`;
+    su búfer se escribe al salir del proceso.
+    """
+    key = os.path.abspath(base_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SignalStore(base_dir, rollups=SignalRollups(rollups_dir(base_dir)))
+            atexit.register(store.flush)
+        return store
@@ -1,18 +1,36 @@
+import os
 import yaml
 import time
 import importlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from typing import Dict, List, Any
 
 # --- Imports de tu aplicación ---
 from .logger import configurar_logger
 from .adapters.binance_adapter import BinanceAdapter
 from .adapters.mock_adapter import MockExchangeAdapter
+from .adapters.cached_adapter import CachedExchangeAdapter
+from .account_snapshot import DEFAULT_MAX_AGE_SECONDS
+from .adapters.streaming_adapter import StreamingExchangeAdapter, BINANCE_WS_URL
+from .event_engine import EventEngine, MarketEvent, PRICE, CANDLE, ALL_SYMBOLS
 from ..strategies.base_strategy import BaseStrategy
 
+# Tipos de estrategia conocidos: tipo en strategies.yaml -> (módulo, clase).
+# Los tipos no registrados siguen la convención src.strategies.<tipo>.<Tipo>Strategy.
+STRATEGY_REGISTRY = {
+    'dca': ('src.strategies.dca_bot', 'DCABotStrategy'),
+    'grid': ('src.strategies.grid_bot', 'GridBotStrategy'),
+}
+
 class StrategyManager:
     """
     Gestiona el ciclo de vida de múltiples estrategias de trading.
     Carga, inicia y ejecuta la lógica de cada estrategia activa de forma robusta.
+    Está pensado para vivir durante todo el proceso: el adaptador y el estado
+    de las estrategias se conservan entre ciclos y `reload_if_changed` aplica
+    solo los cambios de strategies.yaml.
     """
     def __init__(self, config_path: str, api_key: str, api_secret: str):
         """
@@ -23,10 +41,28 @@ class StrategyManager:
         :param api_secret: El secreto de la API para el exchange.
         """
         self.logger = configurar_logger()
+        self.config_path = config_path
         self.strategies: List[BaseStrategy] = []
-        self.config = self._load_config(config_path)
+        # Estrategias activas por clave (campo 'name' del YAML) y la configuración con la que se crearon.
+        self._strategies_by_key: Dict[str, BaseStrategy] = {}
+        self._strategy_configs: Dict[str, Dict[str, Any]] = {}
+        self._class_cache: Dict[str, type] = {}
+        self._config_mtime = self._get_config_mtime()
+        self.config = self._load_config(config_path) or {}
         self.api_key = api_key
         self.api_secret = api_secret
+
+        self._executor = None
+        # Un lock por símbolo: dos estrategias del mismo par nunca intercalan órdenes.
+        self._symbol_locks = defaultdict(threading.Lock)
+        self._symbol_locks_guard = threading.Lock()
+        # Ejecuciones aún en curso (p. ej. tras un timeout), para no apilarlas ciclo tras ciclo.
+        self._in_flight: Dict[int, Future] = {}
+        self._started_at: Dict[int, float] = {}
+        # Motor de eventos opcional (ver attach_to_engine) y callbacks registrados por estrategia.
+        self._engine = None
+        self._subscriptions: Dict[int, tuple] = {}
+        self._apply_execution_config()
         
         # ✅ Inyección de Dependencias: Se crea el adaptador de exchange UNA SOLA VEZ.
         self.exchange_adapter = self._initialize_exchange_adapter()
@@ -35,6 +71,25 @@ class StrategyManager:
         if self.exchange_adapter:
             self._initialize_strategies()
 
+    def _apply_execution_config(self):
+        """Lee la sección opcional 'execution' del YAML."""
+        execution = self.config.get('execution') or {}
+        self.execution_mode = str(execution.get('mode', 'serial')).lower()
+        max_workers = int(execution.get('max_workers', 8))
+        if self._executor is not None and max_workers != getattr(self, 'max_workers', max_workers):
+            # El pool se recrea con el nuevo tamaño en el próximo ciclo paralelo.
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.max_workers = max_workers
+        self.strategy_timeout = float(execution.get('strategy_timeout_seconds', 30))
+        self.cycle_deadline = float(execution.get('cycle_deadline_seconds', 120))
+
+    def _get_config_mtime(self):
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Carga la configuración de estrategias desde un archivo YAML."""
         self.logger.info(f"Cargando configuración desde: {config_path}")
@@ -67,54 +122,382 @@ class StrategyManager:
                  return None
             
             self.logger.info(f"✅ Conexión con {exchange_type} establecida correctamente.")
+
+            # Capa opcional de datos de mercado por websocket (precios y velas en vivo, REST como respaldo).
+            market_data = self.config.get('market_data') or {}
+            if str(market_data.get('source', 'rest')).lower() == 'websocket':
+                adapter = StreamingExchangeAdapter(
+                    adapter,
+                    ws_url=market_data.get('ws_url', BINANCE_WS_URL),
+                    intervals=market_data.get('intervals', ['1h']),
+                    stale_seconds=float(market_data.get('stale_seconds', 10)),
+                )
+                self.logger.info(f"📡 Datos de mercado por websocket ({adapter.ws_url}).")
+
+            # Capa opcional de caché de precios compartida por todas las estrategias.
+            price_cache = self.config.get('price_cache') or {}
+            if price_cache.get('enabled', True) and 'ttl_seconds' in price_cache:
+                adapter = CachedExchangeAdapter(
+                    adapter,
+                    price_ttl_seconds=float(price_cache['ttl_seconds']),
+                    balance_max_age_seconds=float(price_cache.get('balance_max_age_seconds', DEFAULT_MAX_AGE_SECONDS)),
+                )
+                self.logger.info(f"💾 Caché de precios activa (TTL {price_cache['ttl_seconds']}s).")
             return adapter
         except Exception as e:
             self.logger.error(f"❌ Falló la inicialización del adaptador de exchange: {e}")
             return None
 
+    @staticmethod
+    def _strategy_key(strategy_config: Dict[str, Any]) -> str:
+        """Identificador estable de una estrategia entre recargas del YAML."""
+        return strategy_config.get('name') or f"{strategy_config.get('type')}:{strategy_config.get('symbol')}"
+
+    def _enabled_strategy_configs(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Estrategias activas por clave. Si dos comparten clave (p. ej. dos
+        parrillas sin 'name' en el mismo símbolo), la segunda y siguientes se
+        distinguen por su posición ('grid:BTCUSDT#2') para que ninguna se pierda.
+        """
+        configs: Dict[str, Dict[str, Any]] = {}
+        seen: Dict[str, int] = {}
+        for cfg in self.config.get('strategies') or []:
+            if not cfg.get('enabled', False):
+                continue
+            key = self._strategy_key(cfg)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                self.logger.warning(f"⚠️ Hay {seen[key]} estrategias con la clave '{key}'; dales un 'name' distinto para identificarlas entre recargas.")
+                key = f"{key}#{seen[key]}"
+            configs[key] = cfg
+        return configs
+
+    def _load_strategy_class(self, strategy_type: str) -> type:
+        """Importa (una sola vez) la clase de una estrategia."""
+        strategy_type = strategy_type.lower()
+        if strategy_type not in self._class_cache:
+            module_name, class_name = STRATEGY_REGISTRY.get(
+                strategy_type,
+                (f"src.strategies.{strategy_type}", strategy_type.capitalize() + "Strategy") # Asume un patrón como DcaStrategy
+            )
+            module = importlib.import_module(module_name)
+            self._class_cache[strategy_type] = getattr(module, class_name)
+        return self._class_cache[strategy_type]
+
+    def _add_strategy(self, key: str, strategy_config: Dict[str, Any]):
+        """Crea, inicializa y arranca una estrategia."""
+        strategy_type = strategy_config.get('type')
+        
+        # ✅ Manejo de Errores en la Carga: Usamos un bloque try-except.
+        # Si una estrategia falla al cargar, el bot no se detiene.
+        try:
+            StrategyClass = self._load_strategy_class(strategy_type)
+
+            # ✅ Inyección de Dependencias: Pasamos el adaptador ya creado.
+            strategy_instance = StrategyClass(
+                config=strategy_config,
+                exchange_adapter=self.exchange_adapter,
+                logger=self.logger
+            )
+            if hasattr(strategy_instance, 'initialize'):
+                strategy_instance.initialize()
+            strategy_instance.start()
+
+            self.strategies.append(strategy_instance)
+            self._strategies_by_key[key] = strategy_instance
+            self._strategy_configs[key] = strategy_config
+            if self._engine is not None:
+                self._subscribe(strategy_instance)
+            self.logger.info(f"Estrategia '{strategy_type}' para '{strategy_config.get('symbol')}' cargada y lista.")
+
+        except (ModuleNotFoundError, AttributeError) as e:
+            self.logger.error(f"❌ No se pudo cargar la estrategia '{strategy_type}'. Revisa que el nombre en 'strategies.yaml' y el nombre de la clase/archivo sean correctos. Error: {e}")
+        except Exception as e:
+            self.logger.error(f"❌ Falló la inicialización de la estrategia '{strategy_type}': {e}", exc_info=True)
+
+    def _remove_strategy(self, key: str):
+        """Cancela sus órdenes en reposo, la detiene y la descarta."""
+        strategy = self._strategies_by_key.pop(key, None)
+        self._strategy_configs.pop(key, None)
+        if strategy is None:
+            return
+        try:
+            strategy.cancel_open_orders()
+        except Exception as e:
+            self.logger.error(f"❌ No se pudieron cancelar las órdenes de la estrategia '{key}': {e}")
+        strategy.stop()
+        self._unsubscribe(strategy)
+        self.strategies = [s for s in self.strategies if s is not strategy]
+        self._in_flight.pop(id(strategy), None)
+
     def _initialize_strategies(self):
         """Crea las instancias de las estrategias basadas en la configuración."""
         self.logger.info("Inicializando estrategias...")
         
-        for strategy_config in self.config.get('strategies', []):
-            if not strategy_config.get('enabled', False):
-                continue
+        for key, strategy_config in self._enabled_strategy_configs().items():
+            self._add_strategy(key, strategy_config)
+        self._sync_stream_symbols()
 
-            strategy_type = strategy_config.get('type')
-            
-            # ✅ Manejo de Errores en la Carga: Usamos un bloque try-except.
-            # Si una estrategia falla al cargar, el bot no se detiene.
-            try:
-                # Importación dinámica y más segura
-                module_name = strategy_type.lower()
-                class_name = strategy_type.capitalize() + "Strategy" # Asume un patrón como DcaStrategy
-                
-                module = importlib.import_module(f"src.strategies.{module_name}")
-                StrategyClass = getattr(module, class_name)
-
-                # ✅ Inyección de Dependencias: Pasamos el adaptador ya creado.
-                strategy_instance = StrategyClass(
-                    config=strategy_config,
-                    exchange_adapter=self.exchange_adapter,
-                    logger=self.logger
-                )
-                self.strategies.append(strategy_instance)
-                self.logger.info(f"Estrategia '{strategy_type}' para '{strategy_config.get('symbol')}' cargada y lista.")
+    def _sync_stream_symbols(self):
+        """Si hay stream de mercado, lo suscribe a los símbolos de las estrategias activas."""
+        if self.exchange_adapter is not None and hasattr(self.exchange_adapter, 'set_symbols'):
+            self.exchange_adapter.set_symbols(self.symbols())
 
-            except (ModuleNotFoundError, AttributeError) as e:
-                self.logger.error(f"❌ No se pudo cargar la estrategia '{strategy_type}'. Revisa que el nombre en 'strategies.yaml' y el nombre de la clase/archivo sean correctos. Error: {e}")
-            except Exception as e:
-                self.logger.error(f"❌ Falló la inicialización de la estrategia '{strategy_type}': {e}", exc_info=True)
+    def _close_exchange_adapter(self):
+        """Cierra las conexiones persistentes del adaptador (p. ej. el stream de mercado)."""
+        if self.exchange_adapter is not None and hasattr(self.exchange_adapter, 'close'):
+            self.exchange_adapter.close()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarga strategies.yaml si cambió en disco. Solo se tocan las estrategias
+        añadidas, eliminadas o con configuración distinta; el resto conserva su
+        estado en memoria. Devuelve True si se aplicó una recarga.
+        """
+        mtime = self._get_config_mtime()
+        if mtime is None or mtime == self._config_mtime:
+            return False
+        self._config_mtime = mtime
+
+        new_config = self._load_config(self.config_path)
+        if not new_config:
+            self.logger.error("❌ La nueva configuración está vacía o es inválida; se mantiene la anterior.")
+            return False
+
+        exchange_changed = new_config.get('exchange', 'binance') != self.config.get('exchange', 'binance')
+        previous_config = self.config
+        self.config = new_config
+        self._apply_execution_config()
+        if not exchange_changed:
+            self._apply_adapter_config(previous_config)
+
+        if exchange_changed:
+            self.logger.info("🔁 Cambió el exchange configurado: se recrean el adaptador y todas las estrategias.")
+            for key in list(self._strategies_by_key):
+                self._remove_strategy(key)
+            self._close_exchange_adapter()
+            self.exchange_adapter = self._initialize_exchange_adapter()
+            if self.exchange_adapter:
+                self._initialize_strategies()
+            return True
+
+        if not self.exchange_adapter:
+            return True
+
+        desired = self._enabled_strategy_configs()
+        removed = [key for key in self._strategy_configs if key not in desired]
+        added = [key for key in desired if key not in self._strategy_configs]
+        changed = [key for key in desired if key in self._strategy_configs and desired[key] != self._strategy_configs[key]]
+
+        for key in removed + changed:
+            self._remove_strategy(key)
+        for key in changed + added:
+            self._add_strategy(key, desired[key])
+        self._sync_stream_symbols()
+
+        self.logger.info(f"🔁 strategies.yaml recargado: +{len(added)} -{len(removed)} ~{len(changed)} estrategias.")
+        return True
+
+    def _apply_adapter_config(self, previous_config: Dict[str, Any]):
+        """
+        Aplica los cambios de 'price_cache' y 'market_data' sin recrear el
+        adaptador: los TTL se ajustan en caliente; activar o desactivar capas
+        (caché, websocket) necesita reiniciar el bot, y así se avisa.
+        """
+        old_cache = previous_config.get('price_cache') or {}
+        new_cache = self.config.get('price_cache') or {}
+        if new_cache != old_cache:
+            was_enabled = old_cache.get('enabled', True) and 'ttl_seconds' in old_cache
+            is_enabled = new_cache.get('enabled', True) and 'ttl_seconds' in new_cache
+            if was_enabled and is_enabled and isinstance(self.exchange_adapter, CachedExchangeAdapter):
+                self.exchange_adapter.price_cache.ttl_seconds = float(new_cache['ttl_seconds'])
+                self.exchange_adapter.balance_snapshot.max_age_seconds = float(
+                    new_cache.get('balance_max_age_seconds', DEFAULT_MAX_AGE_SECONDS))
+                self.logger.info(f"🔁 Caché de precios actualizada (TTL {new_cache['ttl_seconds']}s).")
+            else:
+                self.logger.warning("⚠️ Activar o desactivar 'price_cache' requiere reiniciar el bot; se mantiene la configuración anterior.")
+
+        if (self.config.get('market_data') or {}) != (previous_config.get('market_data') or {}):
+            self.logger.warning("⚠️ Los cambios en 'market_data' requieren reiniciar el bot; se mantiene la configuración anterior.")
+
+    def symbols(self) -> List[str]:
+        """Símbolos con al menos una estrategia activa."""
+        return sorted({s.symbol.upper() for s in self.strategies if s.symbol})
+
+    def exchange_for(self, symbol: str):
+        """
+        Adaptador con el que operar un símbolo: el de la estrategia activa de ese
+        símbolo si la hay, y si no el adaptador compartido del gestor.
+        """
+        symbol = (symbol or '').upper()
+        for strategy in self.strategies:
+            if (strategy.symbol or '').upper() == symbol and strategy.exchange is not None:
+                return strategy.exchange
+        if self.exchange_adapter is None:
+            raise RuntimeError("No hay adaptador de exchange inicializado.")
+        return self.exchange_adapter
+
+    # --- Motor de eventos ---
+    def attach_to_engine(self, engine: EventEngine):
+        """
+        Suscribe cada estrategia a los precios y velas de su símbolo. Las
+        estrategias añadidas o quitadas en recargas posteriores se
+        (des)suscriben automáticamente.
+        """
+        self._engine = engine
+        for strategy in self.strategies:
+            self._subscribe(strategy)
+
+        # Los precios que llegan por eventos alimentan la caché compartida y, sin
+        # ciclos que la renueven, la instantánea de balance se descarta en cada vela.
+        if isinstance(self.exchange_adapter, CachedExchangeAdapter):
+            engine.subscribe(ALL_SYMBOLS, self._push_price_to_cache, PRICE)
+            engine.subscribe(ALL_SYMBOLS, self._invalidate_balance, CANDLE)
+
+    def _push_price_to_cache(self, event: MarketEvent):
+        if isinstance(self.exchange_adapter, CachedExchangeAdapter):
+            self.exchange_adapter.price_cache.put(event.symbol, event.price)
+
+    def _invalidate_balance(self, event: MarketEvent):
+        if isinstance(self.exchange_adapter, CachedExchangeAdapter):
+            self.exchange_adapter.balance_snapshot.invalidate()
+
+    def _subscribe(self, strategy: BaseStrategy):
+        def _on_price(event: MarketEvent):
+            with self.symbol_lock(strategy.symbol):
+                strategy.on_price(event.price)
+
+        def _on_candle(event: MarketEvent):
+            if not strategy.is_running:
+                return
+            with self.symbol_lock(strategy.symbol):
+                strategy.on_candle(event.candle)
+
+        self._engine.subscribe(strategy.symbol, _on_price, PRICE)
+        self._engine.subscribe(strategy.symbol, _on_candle, CANDLE)
+        self._subscriptions[id(strategy)] = (_on_price, _on_candle)
+
+    def _unsubscribe(self, strategy: BaseStrategy):
+        callbacks = self._subscriptions.pop(id(strategy), None)
+        if callbacks is None or self._engine is None:
+            return
+        self._engine.unsubscribe(strategy.symbol, callbacks[0], PRICE)
+        self._engine.unsubscribe(strategy.symbol, callbacks[1], CANDLE)
+
+    def symbol_lock(self, symbol: str) -> threading.Lock:
+        """Devuelve el lock que serializa la colocación de órdenes para un símbolo."""
+        with self._symbol_locks_guard:
+            return self._symbol_locks[(symbol or '').upper()]
 
     def run_all(self):
         """Ejecuta la lógica principal de todas las estrategias cargadas."""
         if not self.strategies:
             self.logger.warning("No hay estrategias activas para ejecutar.")
             return
-            
-        self.logger.info("\n--- Ejecutando ciclo para todas las estrategias ---")
-        for strategy in self.strategies:
+
+        self._begin_cycle()
+
+        if self.execution_mode == 'parallel':
+            self._run_all_parallel()
+        else:
+            self.logger.info("\n--- Ejecutando ciclo para todas las estrategias ---")
+            for strategy in self.strategies:
+                try:
+                    strategy.run()
+                except Exception as e:
+                    self.logger.error(f"❌ Error al ejecutar la estrategia '{strategy.__class__.__name__}': {e}", exc_info=True)
+
+        if hasattr(self.exchange_adapter, 'log_stats'):
+            self.exchange_adapter.log_stats()
+
+    def _begin_cycle(self):
+        """Prepara las instantáneas compartidas del adaptador (p. ej. precios en bloque) para el ciclo."""
+        if hasattr(self.exchange_adapter, 'begin_cycle'):
             try:
-                strategy.run()
+                self.exchange_adapter.begin_cycle()
             except Exception as e:
-                self.logger.error(f"❌ Error al ejecutar la estrategia '{strategy.__class__.__name__}': {e}", exc_info=True)
+                self.logger.warning(f"⚠️ No se pudo preparar la instantánea del ciclo: {e}")
+
+    def _run_isolated(self, strategy: BaseStrategy):
+        """Ejecuta una estrategia dentro del lock de su símbolo (corre en un hilo del pool)."""
+        with self.symbol_lock(strategy.symbol):
+            self._started_at[id(strategy)] = time.monotonic()
+            strategy.run()
+
+    def _run_all_parallel(self):
+        """
+        Ejecuta las estrategias en un pool acotado de hilos. Cada estrategia
+        tiene su propio timeout y el ciclo completo un plazo máximo; las que
+        exceden su tiempo se dejan terminar en segundo plano y se saltan en
+        los ciclos siguientes hasta que acaben.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="strategy")
+
+        self.logger.info(f"\n--- Ejecutando ciclo en paralelo ({len(self.strategies)} estrategias, {self.max_workers} hilos) ---")
+        cycle_start = time.monotonic()
+        deadline = cycle_start + self.cycle_deadline
+        pending: Dict[Future, BaseStrategy] = {}
+
+        for strategy in self.strategies:
+            previous = self._in_flight.get(id(strategy))
+            if previous is not None and not previous.done():
+                self.logger.warning(f"⏭️ '{strategy.__class__.__name__}' ({strategy.symbol}) sigue ejecutando el ciclo anterior; se omite.")
+                continue
+            self._started_at.pop(id(strategy), None)
+            future = self._executor.submit(self._run_isolated, strategy)
+            self._in_flight[id(strategy)] = future
+            pending[future] = strategy
+
+        while pending:
+            now = time.monotonic()
+            # Próximo vencimiento: el plazo del ciclo o el timeout de alguna estrategia ya iniciada.
+            expirations = [deadline] + [
+                self._started_at[id(s)] + self.strategy_timeout for s in pending.values() if id(s) in self._started_at
+            ]
+            done, _ = wait(list(pending), timeout=max(0.0, min(expirations) - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                strategy = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    self.logger.error(f"❌ Error al ejecutar la estrategia '{strategy.__class__.__name__}': {error}", exc_info=error)
+
+            now = time.monotonic()
+            for future, strategy in list(pending.items()):
+                started = self._started_at.get(id(strategy))
+                if started is not None and now - started >= self.strategy_timeout:
+                    self.logger.error(f"⏱️ '{strategy.__class__.__name__}' ({strategy.symbol}) superó su timeout de {self.strategy_timeout:.0f}s.")
+                    pending.pop(future)
+
+            if pending and now >= deadline:
+                names = ", ".join(f"{s.__class__.__name__}({s.symbol})" for s in pending.values())
+                self.logger.error(f"⏱️ Plazo del ciclo ({self.cycle_deadline:.0f}s) agotado; siguen en curso: {names}")
+                break
+
+        self.logger.info(f"Ciclo paralelo completado en {time.monotonic() - cycle_start:.2f}s.")
+
+    def shutdown(self):
+        """Libera el pool de ejecución paralela y las conexiones del adaptador."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._close_exchange_adapter()
+
+    def run_forever(self, interval_seconds: int = 60):
+        """
+        Bucle de ejecución continuo: recarga la configuración si cambió y
+        ejecuta un ciclo de estrategias cada `interval_seconds`.
+        """
+        self.logger.info(f"♾️ Motor de estrategias en marcha (ciclo cada {interval_seconds}s).")
+        try:
+            while True:
+                cycle_start = time.monotonic()
+                try:
+                    self.reload_if_changed()
+                    self.run_all()
+                except Exception as e:
+                    self.logger.error(f"💥 Error en el ciclo de estrategias: {e}", exc_info=True)
+                time.sleep(max(0.0, interval_seconds - (time.monotonic() - cycle_start)))
+        finally:
+            self.shutdown()
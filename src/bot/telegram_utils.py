@@ -1,21 +1,211 @@
+import atexit
 import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
 import telegram
 from dotenv import load_dotenv
 from .logger import configurar_logger
 
 load_dotenv()
+logger = configurar_logger()
 
 BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
+# URL base de la Bot API (p. ej. un servidor local de pruebas); vacío = api.telegram.org.
+API_BASE_URL = os.getenv("TELEGRAM_API_URL")
 
-telegram_bot = telegram.Bot(token=BOT_TOKEN)
+MAX_MESSAGE_CHARS = 4096 # Límite de Telegram por mensaje
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_DIGEST_WINDOW_SECONDS = 5.0
+DEFAULT_MIN_SEND_INTERVAL_SECONDS = 1.0 # Telegram admite ~1 mensaje por segundo a un mismo chat
+DEFAULT_MAX_RETRIES = 5
 
-def send_telegram_message(message):
+_telegram_bot: Optional[telegram.Bot] = None
+_bot_lock = threading.Lock()
+
+
+def get_telegram_bot() -> telegram.Bot:
+    """Cliente de Telegram, creado la primera vez que se usa (importar el módulo no requiere token)."""
+    global _telegram_bot
+    with _bot_lock:
+        if _telegram_bot is None:
+            _telegram_bot = telegram.Bot(token=BOT_TOKEN, base_url=API_BASE_URL or None)
+        return _telegram_bot
+
+
+def send_telegram_message_sync(message):
+    """Envía un mensaje en el momento, bloqueando hasta la respuesta de Telegram."""
     try:
-        telegram_bot.send_message(chat_id=CHAT_ID, text=message)
+        get_telegram_bot().send_message(chat_id=CHAT_ID, text=message)
     except telegram.error.TelegramError as e:
         print(f"Error al enviar mensaje a Telegram: {e}")
 
+
+def _split_digest(messages: List[str], max_chars: int = MAX_MESSAGE_CHARS) -> List[str]:
+    """Une los mensajes en resúmenes de como mucho `max_chars` caracteres."""
+    if len(messages) == 1:
+        return [messages[0][:max_chars]]
+    digests, current = [], ""
+    header = f"🔔 {len(messages)} notificaciones\n\n"
+    for message in messages:
+        message = message.strip()[:max_chars - len(header) - 2]
+        candidate = f"{current}\n\n{message}" if current else header + message
+        if len(candidate) > max_chars:
+            digests.append(current)
+            candidate = message
+        current = candidate
+    digests.append(current)
+    return digests
+
+
+class TelegramDispatcher:
+    """
+    Envía notificaciones desde un hilo en segundo plano, para que el ciclo de
+    trading nunca espere a Telegram.
+
+    - `submit` solo encola (cola acotada); si está llena, el mensaje se descarta.
+    - Los mensajes que llegan dentro de `digest_window_seconds` se agrupan en
+      un único resumen (troceado al límite de 4096 caracteres).
+    - Respeta `RetryAfter` (límite de Telegram) y reintenta errores de red con
+      espera exponencial; entre envíos deja al menos `min_send_interval_seconds`.
+    """
+
+    def __init__(self, send: Callable[[str], None] = None, max_queue: int = DEFAULT_QUEUE_SIZE,
+                 digest_window_seconds: float = DEFAULT_DIGEST_WINDOW_SECONDS,
+                 min_send_interval_seconds: float = DEFAULT_MIN_SEND_INTERVAL_SECONDS,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        self._send = send or (lambda text: get_telegram_bot().send_message(chat_id=CHAT_ID, text=text))
+        self.digest_window_seconds = digest_window_seconds
+        self.min_send_interval_seconds = min_send_interval_seconds
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._last_send = 0.0
+        self.stats = {"queued": 0, "dropped": 0, "sent": 0, "digests": 0, "retries": 0, "failed": 0}
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, message: str) -> bool:
+        """Encola un mensaje sin bloquear. Devuelve False si la cola está llena."""
+        self.start()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning("⚠️ Cola de Telegram llena: se descartó una notificación.")
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Espera a que se envíe todo lo encolado. Devuelve False si vence `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Envía lo pendiente (hasta `timeout` segundos) y detiene el hilo."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    # --- Hilo de envío ---
+    def _collect(self, first: str) -> Tuple[List[str], bool]:
+        """Junta los mensajes que llegan durante la ventana de agrupación."""
+        batch, stop = [first], False
+        deadline = time.monotonic() + self.digest_window_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return batch, stop
+            if item is None:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+
+    def _deliver(self, text: str) -> bool:
+        attempt = 0
+        while True:
+            wait = self._last_send + self.min_send_interval_seconds - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self._send(text)
+                self._last_send = time.monotonic()
+                return True
+            except telegram.error.RetryAfter as e:
+                # El límite de Telegram no cuenta como intento fallido.
+                self.stats["retries"] += 1
+                logger.warning(f"⏳ Telegram pide esperar {e.retry_after}s antes de volver a enviar.")
+                time.sleep(float(e.retry_after))
+            except (telegram.error.TimedOut, telegram.error.NetworkError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.error(f"❌ No se pudo enviar a Telegram tras {self.max_retries} reintentos: {e}")
+                    return False
+                self.stats["retries"] += 1
+                time.sleep(min(30.0, 2 ** attempt))
+            except Exception as e:
+                logger.error(f"❌ Error al enviar mensaje a Telegram: {e}")
+                return False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch, stop = self._collect(first)
+            digests = _split_digest(batch)
+            for text in digests:
+                if self._deliver(text):
+                    self.stats["sent"] += 1
+                else:
+                    self.stats["failed"] += 1
+            if len(batch) > 1:
+                self.stats["digests"] += 1
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+
+_dispatcher: Optional[TelegramDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> TelegramDispatcher:
+    """Dispatcher compartido; al salir del proceso intenta enviar lo pendiente."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = TelegramDispatcher()
+            atexit.register(_dispatcher.stop)
+        return _dispatcher
+
+
+def send_telegram_message(message):
+    """Encola el mensaje para el envío en segundo plano (no bloquea)."""
+    get_dispatcher().submit(message)
+
 def formatear_mensaje(entry):
     return f"""📊 {entry['Coin'].upper()} - {entry['Date']}
 💰 Precio: ${entry['Price']:.2f}
@@ -25,4 +215,5 @@ def formatear_mensaje(entry):
 
 def iniciar_telegram_bot():
     logger = configurar_logger()
-    logger.info("📨 Sistema de Telegram inicializado.")
\ No newline at end of file
+    get_dispatcher().start()
+    logger.info("📨 Sistema de Telegram inicializado.")
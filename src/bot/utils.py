@@ -1,8 +1,8 @@
 import os
-import csv
 from datetime import datetime
 import pandas as pd
 from .logger import configurar_logger
+from .signal_store import obtener_signal_store, DEFAULT_SIGNAL_DIR
 
 # (Si alguna de tus funciones de utilidad necesita get_price_data, esta es la forma correcta)
 # from .adapters.coingecko_adapter import get_price_data
@@ -14,19 +14,17 @@ def ensure_directories_exist():
     os.makedirs("logs/historial", exist_ok=True)
     os.makedirs("reports", exist_ok=True)
 
-def guardar_historial(coin, data, directory):
-    """Guarda una entrada de señal en el archivo CSV histórico de una moneda."""
-    filepath = os.path.join(directory, f"{coin.lower()}.csv")
-    file_exists = os.path.isfile(filepath)
-    
-    with open(filepath, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(data)
+def guardar_historial(coin, data, directory=DEFAULT_SIGNAL_DIR):
+    """
+    Guarda una entrada de señal en el historial columnar (ver SignalStore).
+    Las entradas se acumulan y se escriben por lotes.
+    """
+    record = dict(data)
+    record.setdefault("Symbol", coin.upper())
+    obtener_signal_store(directory).append([record])
 
-def exportar_resultados_csv(df, output_dir="reports"):
-    """Exporta un DataFrame a un archivo CSV con un timestamp."""
+def exportar_resultados_csv(df, output_dir="reports", signal_dir=DEFAULT_SIGNAL_DIR):
+    """Exporta un DataFrame a un archivo CSV con un timestamp y lo añade al historial de señales."""
     if df.empty:
         logger.warning("El DataFrame para exportar está vacío. No se generó el archivo CSV.")
         return
@@ -41,6 +39,14 @@ def exportar_resultados_csv(df, output_dir="reports"):
     except Exception as e:
         logger.error(f"Error al exportar resultados a CSV: {e}")
 
+    # Las mismas señales se añaden al historial columnar que consultan el dashboard y los análisis.
+    try:
+        store = obtener_signal_store(signal_dir)
+        store.append(df, timestamp=datetime.strptime(timestamp, "%Y-%m-%d_%H-%M-%S"))
+        store.flush()
+    except Exception as e:
+        logger.error(f"Error al guardar las señales en el historial: {e}")
+
 def limpiar_archivos_csv(directory, days_to_keep=7):
     """Elimina archivos CSV más antiguos que un número de días especificado."""
     # Esta función puede ser implementada en el futuro si es necesario.
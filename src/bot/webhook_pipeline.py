@@ -0,0 +1,297 @@
+# src/bot/webhook_pipeline.py
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logger import configurar_logger
+
+logger = configurar_logger()
+
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_IDEMPOTENCY_TTL_SECONDS = 300
+# Sin clave explícita, un cuerpo idéntico dentro de esta ventana se considera un reenvío.
+# Desactivado (0) por defecto: las alertas de TradingView no suelen llevar id y dos
+# señales iguales en una ráfaga son señales reales.
+DEFAULT_DUPLICATE_WINDOW_SECONDS = 0
+# Ventana de neteo: 0 = cada alerta es una orden; con ventana, las alertas de un símbolo
+# que llegan juntas se compensan en una única orden neta, sin esperar más de max_latency.
+DEFAULT_NETTING_WINDOW_MS = 0
+DEFAULT_MAX_LATENCY_MS = 1000
+IDEMPOTENCY_FIELDS = ("idempotency_key", "alert_id", "id")
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+QUEUE_FULL = "queue_full"
+
+_SYMBOL_RE = re.compile(r"^[A-Z0-9]{2,20}$")
+
+
+class WebhookAlert:
+    """Alerta de TradingView ya validada: qué hacer, con qué símbolo y por cuántos USD."""
+
+    __slots__ = ("action", "symbol", "quantity_usd", "key", "received_at")
+
+    def __init__(self, action: str, symbol: str, quantity_usd: float, key: str, received_at: float = None):
+        self.action = action
+        self.symbol = symbol
+        self.quantity_usd = quantity_usd
+        self.key = key
+        self.received_at = received_at if received_at is not None else time.monotonic()
+
+    def __repr__(self):
+        return f"WebhookAlert({self.action} {self.quantity_usd} USD {self.symbol}, key={self.key})"
+
+
+def parse_alert(body: bytes, header_key: str = None) -> Tuple[WebhookAlert, bool]:
+    """
+    Decodifica y valida el cuerpo de una alerta, p. ej.
+    {"action": "buy", "symbol": "BTCUSDT", "quantity_usd": 50, "id": "..."}.
+
+    Devuelve (alerta, si la clave de idempotencia es explícita). Lanza
+    ValueError con un mensaje legible si la alerta no es válida.
+    """
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("El cuerpo debe ser un JSON con 'action', 'symbol' y 'quantity_usd'.")
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON.")
+
+    action = str(payload.get("action", "")).lower()
+    symbol = str(payload.get("symbol", "")).upper()
+    if action not in ("buy", "sell"):
+        raise ValueError("'action' debe ser 'buy' o 'sell'.")
+    if not _SYMBOL_RE.match(symbol):
+        raise ValueError("'symbol' no es válido.")
+    try:
+        quantity_usd = float(payload.get("quantity_usd"))
+    except (TypeError, ValueError):
+        raise ValueError("'quantity_usd' debe ser un número.")
+    if not quantity_usd > 0 or quantity_usd == float("inf"):
+        raise ValueError("'quantity_usd' debe ser mayor que cero.")
+
+    key = header_key or next((str(payload[f]) for f in IDEMPOTENCY_FIELDS if payload.get(f)), None)
+    explicit = key is not None
+    if not explicit:
+        key = hashlib.sha1(body).hexdigest()
+    return WebhookAlert(action, symbol, quantity_usd, key), explicit
+
+
+def net_alerts(alerts: List[WebhookAlert]) -> "OrderedDict[str, Tuple[float, List[WebhookAlert]]]":
+    """
+    Agrupa alertas por símbolo (en orden de primera aparición) y devuelve
+    símbolo -> (importe neto en USD, alertas). Las compras suman y las ventas
+    restan; un neto positivo es una compra y uno negativo una venta.
+    """
+    netted: "OrderedDict[str, Tuple[float, List[WebhookAlert]]]" = OrderedDict()
+    for alert in alerts:
+        amount, group = netted.get(alert.symbol, (0.0, []))
+        group.append(alert)
+        signed = alert.quantity_usd if alert.action == "buy" else -alert.quantity_usd
+        netted[alert.symbol] = (amount + signed, group)
+    return netted
+
+
+class IdempotencyCache:
+    """Claves vistas recientemente, con caducidad por clave y un máximo de entradas."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_and_add(self, key: str, ttl_seconds: float) -> bool:
+        """True si la clave ya se vio y no ha caducado; si no, la registra y devuelve False."""
+        now = time.monotonic()
+        with self._lock:
+            # Las claves se insertan en orden de llegada: se purgan desde el principio.
+            while self._expires:
+                oldest, expires = next(iter(self._expires.items()))
+                if expires > now and len(self._expires) < self.max_keys:
+                    break
+                del self._expires[oldest]
+            if self._expires.get(key, 0) > now:
+                return True
+            self._expires[key] = now + ttl_seconds
+            self._expires.move_to_end(key)
+            return False
+
+    def discard(self, key: str):
+        with self._lock:
+            self._expires.pop(key, None)
+
+
+class WebhookPipeline:
+    """
+    Ejecuta alertas de webhook fuera de la petición HTTP.
+
+    - `submit` descarta duplicados (por clave de idempotencia explícita, o por
+      contenido si `duplicate_window_seconds` > 0) y encola la
+      alerta sin bloquear; el servidor responde 202 de inmediato.
+    - Cada símbolo se asigna siempre a la misma cola y hilo, así las alertas
+      de un símbolo se ejecutan en orden y las de símbolos distintos en paralelo.
+    - `resolve_exchange(symbol)` elige el adaptador del símbolo y
+      `symbol_lock(symbol)`, si se indica, evita intercalar órdenes con las
+      estrategias del mismo par.
+    - Con `netting_window_ms` > 0, cada hilo junta lo que llega a su cola
+      durante la ventana (sin pasar de `max_latency_ms` desde la recepción
+      de la alerta más antigua) y envía una sola orden MARKET neta por
+      símbolo. `stats["netted"]` cuenta las alertas que no generaron orden
+      propia.
+    """
+
+    def __init__(self, resolve_exchange: Callable[[str], Any], symbol_lock: Callable[[str], Any] = None,
+                 workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 idempotency_ttl_seconds: float = DEFAULT_IDEMPOTENCY_TTL_SECONDS,
+                 duplicate_window_seconds: float = DEFAULT_DUPLICATE_WINDOW_SECONDS,
+                 netting_window_ms: float = DEFAULT_NETTING_WINDOW_MS,
+                 max_latency_ms: float = DEFAULT_MAX_LATENCY_MS):
+        self.resolve_exchange = resolve_exchange
+        self.symbol_lock = symbol_lock
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+        self.duplicate_window_seconds = duplicate_window_seconds
+        self.netting_window_seconds = max(0.0, netting_window_ms / 1000)
+        self.max_latency_seconds = max(0.0, max_latency_ms / 1000)
+        self._idempotency = IdempotencyCache()
+        shard_size = max(1, queue_size // workers)
+        self._shards: List["queue.Queue[Optional[WebhookAlert]]"] = [queue.Queue(maxsize=shard_size) for _ in range(workers)]
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.stats = {"received": 0, "accepted": 0, "duplicates": 0, "rejected": 0,
+                      "queue_full": 0, "executed": 0, "failed": 0, "orders": 0, "netted": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def start(self):
+        if self._threads:
+            return
+        for i, shard in enumerate(self._shards):
+            thread = threading.Thread(target=self._worker, args=(shard,), name=f"webhook-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"📥 Pipeline de webhooks en marcha ({len(self._shards)} hilos).")
+
+    def stop(self, timeout: float = 5.0):
+        """Termina de ejecutar lo encolado (hasta `timeout` segundos por hilo) y detiene los hilos."""
+        for shard in self._shards:
+            shard.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def reject(self):
+        """Cuenta una petición inválida (la valida el servidor con `parse_alert`)."""
+        self._count("received")
+        self._count("rejected")
+
+    def _shard_for(self, symbol: str) -> "queue.Queue":
+        return self._shards[zlib.crc32(symbol.encode()) % len(self._shards)]
+
+    def submit(self, alert: WebhookAlert, explicit_key: bool = True) -> str:
+        """Encola la alerta. Devuelve ACCEPTED, DUPLICATE o QUEUE_FULL."""
+        self._count("received")
+        ttl = self.idempotency_ttl_seconds if explicit_key else self.duplicate_window_seconds
+        dedupe = ttl > 0
+        if dedupe and self._idempotency.check_and_add(alert.key, ttl):
+            self._count("duplicates")
+            return DUPLICATE
+        try:
+            self._shard_for(alert.symbol).put_nowait(alert)
+        except queue.Full:
+            if dedupe:
+                self._idempotency.discard(alert.key) # El reintento del emisor no debe tomarse como duplicado.
+            self._count("queue_full")
+            return QUEUE_FULL
+        self._count("accepted")
+        return ACCEPTED
+
+    def pending(self) -> int:
+        return sum(shard.unfinished_tasks for shard in self._shards)
+
+    def join(self, timeout: float = None) -> bool:
+        """Espera a que se ejecuten todas las alertas aceptadas. Devuelve False si vence `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # --- Ejecución ---
+    def _execute(self, symbol: str, amount_usd: float, alerts: List[WebhookAlert]):
+        """Envía la orden MARKET neta de `alerts` (ya agrupadas por `net_alerts`)."""
+        exchange = self.resolve_exchange(symbol)
+        price = exchange.get_price(symbol)
+        quantity = abs(amount_usd) / price
+        side = 'BUY' if amount_usd > 0 else 'SELL'
+        order = exchange.create_order(symbol=symbol, order_type='MARKET', side=side, quantity=quantity)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Webhook ejecutado: {len(alerts)} alerta(s) {symbol} -> {side} {abs(amount_usd):.2f} USD, orden {order.get('orderId')}")
+        return order
+
+    def _collect(self, shard: "queue.Queue", first: WebhookAlert) -> Tuple[List[WebhookAlert], bool]:
+        """Junta las alertas que llegan a la cola durante la ventana de neteo."""
+        batch, stop = [first], False
+        if self.netting_window_seconds <= 0:
+            return batch, stop
+        deadline = min(time.monotonic() + self.netting_window_seconds,
+                       first.received_at + self.max_latency_seconds)
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                item = shard.get(timeout=remaining) if remaining > 0 else shard.get_nowait()
+            except queue.Empty:
+                return batch, stop
+            if item is None:
+                shard.task_done()
+                return batch, True
+            batch.append(item)
+
+    def _worker(self, shard: "queue.Queue"):
+        while True:
+            first = shard.get()
+            if first is None:
+                shard.task_done()
+                return
+            batch, stop = self._collect(shard, first)
+            for symbol, (amount_usd, alerts) in net_alerts(batch).items():
+                self._count("netted", len(alerts) - 1 if abs(amount_usd) > 1e-9 else len(alerts))
+                try:
+                    if abs(amount_usd) <= 1e-9:
+                        # Compras y ventas se compensan: no hace falta ninguna orden.
+                        self._count("executed", len(alerts))
+                        continue
+                    if self.symbol_lock is not None:
+                        with self.symbol_lock(symbol):
+                            self._execute(symbol, amount_usd, alerts)
+                    else:
+                        self._execute(symbol, amount_usd, alerts)
+                    self._count("orders")
+                    self._count("executed", len(alerts))
+                except Exception as e:
+                    # Sin ejecutar: el reintento del emisor no debe tomarse como duplicado.
+                    for alert in alerts:
+                        self._idempotency.discard(alert.key)
+                    self._count("failed", len(alerts))
+                    logger.error(f"❌ Error al ejecutar {len(alerts)} alerta(s) de {symbol}: {e}")
+            for _ in batch:
+                shard.task_done()
+            if stop:
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["pending"] = self.pending()
+        return stats
@@ -2,6 +2,8 @@ import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 
+from .downsampling import downsample_line, DEFAULT_MAX_POINTS
+
 def validar_columnas_esperadas(df, columnas_requeridas):
     """Verifica que el DataFrame contenga todas las columnas requeridas."""
     return columnas_requeridas.issubset(df.columns)
@@ -51,13 +53,15 @@ def render_comparative_charts(df):
     if monedas_seleccionadas:
         fig = go.Figure()
         for moneda in monedas_seleccionadas:
-            datos_moneda = df[df['Coin'] == moneda]
+            datos_moneda = df[df['Coin'] == moneda].sort_values('Date')
             if datos_moneda.empty:
                 continue
+            # Con el rango visible ya filtrado, LTTB deja como mucho DEFAULT_MAX_POINTS puntos por moneda.
+            x, y = downsample_line(datos_moneda['Date'], datos_moneda['Price'], DEFAULT_MAX_POINTS)
             fig.add_trace(go.Scatter(
-                x=datos_moneda['Date'],
-                y=datos_moneda['Price'],
-                mode='lines+markers',
+                x=x,
+                y=y,
+                mode='lines+markers' if len(datos_moneda) <= DEFAULT_MAX_POINTS else 'lines',
                 name=moneda
             ))
 
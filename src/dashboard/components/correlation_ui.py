@@ -1,32 +1,72 @@
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+import config
+
+from src.bot.correlation_engine import RollingCorrelation, DEFAULT_WINDOW
+from .kline_service import obtener_kline_store
+
+# Ventanas de consulta (en velas); la más larga es la que se mantiene de forma incremental.
+WINDOW_OPTIONS = [30, 90, 180, 365, DEFAULT_WINDOW]
+
+
+@st.cache_resource
+def obtener_motor_correlacion(interval: str, window: int = DEFAULT_WINDOW) -> RollingCorrelation:
+    """Motor compartido entre reruns: cada render solo le añade las velas nuevas."""
+    return RollingCorrelation(window)
+
 
 def render_correlation_section(df):
-    st.subheader("📊 Análisis de Correlación")
+    st.subheader("📊 Correlación de Retornos")
 
-    if df is None or df.empty:
-        st.warning("No se han cargado datos para analizar.")
+    store = obtener_kline_store()
+    interval = config.KLINE_INTERVAL
+    stored_symbols = store.symbols(interval)
+    if not stored_symbols:
+        st.warning("No hay velas guardadas localmente; ejecuta el bot para generarlas.")
         return
 
-    numeric_df = df.select_dtypes(include=["number"])
+    col1, col2 = st.columns(2)
+    with col1:
+        universo = st.radio("Monedas:", ["Del reporte", "Todas las guardadas"], horizontal=True)
+    with col2:
+        window = st.select_slider("Ventana (velas):", options=WINDOW_OPTIONS, value=90)
+
+    if universo == "Del reporte" and df is not None and 'Coin' in df.columns:
+        report_symbols = {f"{coin}USDT".upper() for coin in df['Coin'].dropna().unique()}
+        symbols = [s for s in stored_symbols if s in report_symbols]
+    else:
+        symbols = stored_symbols
+
+    engine = obtener_motor_correlacion(interval)
+    engine.sync_from_store(store, stored_symbols, interval)
+    corr = engine.clustered(window)
+    selected = set(symbols)
+    visible = [s for s in corr.index if s in selected] # Conserva el orden por clusters
+    corr = corr.loc[visible, visible]
+    corr = corr.dropna(how="all").dropna(axis=1, how="all")
 
-    if numeric_df.empty:
-        st.warning("No hay columnas numéricas suficientes para analizar la correlación.")
+    if corr.shape[0] < 2:
+        st.warning("No hay suficientes monedas con historial para calcular correlaciones.")
         return
 
-    corr = numeric_df.corr()
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.heatmap(
-        corr,
-        annot=True,
-        fmt=".2f",
-        cmap="coolwarm",
-        cbar=True,
-        square=True,
-        linewidths=0.5,
-        linecolor="white",
-        ax=ax
+    labels = [s[:-4] if s.endswith("USDT") else s for s in corr.index]
+    fig = go.Figure(data=go.Heatmap(
+        z=corr.to_numpy(),
+        x=labels,
+        y=labels,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        reversescale=True,
+        colorbar=dict(title="ρ"),
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>",
+    ))
+    size = min(900, 200 + 12 * len(labels))
+    fig.update_layout(
+        title=f"Correlación de retornos ({interval}, últimas {window} velas), ordenada por clusters",
+        height=size,
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=20, r=20, t=50, b=20),
     )
-    ax.set_title("Matriz de Correlación", fontsize=14, pad=12)
-    st.pyplot(fig)
\ No newline at end of file
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{corr.shape[0]} monedas. Las monedas muy correlacionadas quedan juntas en el mapa.")
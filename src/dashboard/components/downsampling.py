@@ -0,0 +1,93 @@
+import math
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.bot.kline_store import interval_to_ms
+
+# Puntos por traza: del orden del ancho en píxeles de un gráfico a ancho completo.
+DEFAULT_MAX_POINTS = 600
+
+# Resoluciones posibles al agrupar velas, de la más fina a la más gruesa.
+_OHLC_BUCKETS_MS = [interval_to_ms(i) for i in
+                    ("1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d", "3d", "1w")]
+
+
+def _as_float(values) -> np.ndarray:
+    """Fechas a milisegundos y el resto a float, para poder medir áreas."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ms]").astype("int64").astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Índices de los puntos que conserva Largest-Triangle-Three-Buckets: el primero,
+    el último y, de cada bucket intermedio, el que forma el triángulo de mayor
+    área con el punto elegido antes y la media del bucket siguiente. Mantiene
+    picos y valles, que un muestreo cada N puntos perdería.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_line(x, y, max_points: int = DEFAULT_MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Serie (x, y) reducida con LTTB; los puntos con y nula se descartan antes."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    idx = lttb_indices(x, y, max_points)
+    return x[idx], y[idx]
+
+
+def ohlc_bucket_ms(span_ms: float, max_points: int = DEFAULT_MAX_POINTS) -> int:
+    """Resolución más fina (de las de Binance) que deja como mucho `max_points` velas en `span_ms`."""
+    for bucket in _OHLC_BUCKETS_MS:
+        if span_ms / bucket <= max_points:
+            return bucket
+    return int(math.ceil(span_ms / max_points / _OHLC_BUCKETS_MS[-1])) * _OHLC_BUCKETS_MS[-1]
+
+
+def bucket_ohlc(df: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS) -> pd.DataFrame:
+    """
+    Agrupa velas (columnas time, open, high, low, close y opcionalmente volume)
+    en velas más largas, con la resolución elegida según el rango visible
+    (ver `ohlc_bucket_ms`): open del primero, high/low extremos, close del
+    último y volumen sumado. Si ya caben en `max_points`, se devuelven tal cual.
+    """
+    n = len(df)
+    if max_points <= 0 or n <= max_points:
+        return df
+    t = df["time"].to_numpy().astype("datetime64[ms]").astype("int64")
+    width = ohlc_bucket_ms(t[-1] - t[0], max_points)
+    keys = t // width
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    out = pd.DataFrame({
+        "time": pd.to_datetime(keys[starts] * width, unit="ms"),
+        "open": df["open"].to_numpy(dtype=float)[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(dtype=float), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(dtype=float), starts),
+        "close": df["close"].to_numpy(dtype=float)[ends],
+    })
+    if "volume" in df.columns:
+        out["volume"] = np.add.reduceat(df["volume"].to_numpy(dtype=float), starts)
+    return out
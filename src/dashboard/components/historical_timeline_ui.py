@@ -1,31 +1,82 @@
-import os
+from datetime import datetime, timedelta
+
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+from src.bot.signal_store import obtener_signal_store
+from .report_catalog import obtener_catalogo
+
+
+def _historial_desde_csv(csv_files):
+    """Respaldo para reportes anteriores al historial columnar: concatena los CSV (desde la caché del catálogo)."""
+    catalog = obtener_catalogo()
+    catalog.refresh()
+    historical_data = []
+    for file in csv_files:
+        info = catalog.info(file)
+        if info is None or not {'Coin', 'Signal'}.issubset(info.columns):
+            continue # Se descarta por la cabecera, sin parsear el archivo.
+        try:
+            df_temp = catalog.load(file, copy=False)[['Coin', 'Signal']].copy()
+            df_temp['Archivo'] = info.name
+            df_temp['fecha'] = info.timestamp
+            historical_data.append(df_temp[['fecha', 'Coin', 'Signal', 'Archivo']])
+        except Exception as e:
+            st.warning(f"Error leyendo archivo {file}: {e}")
+    if not historical_data:
+        return pd.DataFrame(columns=['fecha', 'Signal'])
+    return pd.concat(historical_data)
+
+
+def obtener_rollups():
+    """Rollups del historial de señales; se reconstruyen si existe historial pero aún no tiene rollups."""
+    store = obtener_signal_store()
+    if store.rollups.is_empty() and store.dates():
+        store.rebuild_rollups()
+    return store.rollups
+
+
+def _conteos_desde_rollups(rollups, symbols, start, end, por_hora):
+    """Conteos por fecha y tipo desde las tablas pre-agregadas (sin leer el historial)."""
+    if por_hora and not symbols:
+        df = rollups.hourly(start, end)
+    else:
+        df = rollups.daily(symbols or None, start, end)
+    df = df.rename(columns={'bucket': 'fecha', 'count': 'conteo'})
+    return df.groupby(['fecha', 'Signal'], as_index=False)['conteo'].sum()
+
+
 def render_historical_timeline(csv_files):
     st.markdown("---")
     st.markdown("---")
     st.subheader("📆 Evolución cronológica de señales")
 
     try:
-        historical_data = []
-        for file in csv_files:
-            try:
-                df_temp = pd.read_csv(file)
-                if {'Coin', 'Signal'}.issubset(df_temp.columns):
-                    df_temp['Archivo'] = os.path.basename(file)
-                    df_temp['fecha'] = pd.to_datetime(file.split("_")[-1].replace(".csv", ""), format="%Y-%m-%d_%H-%M-%S", errors='coerce')
-                    historical_data.append(df_temp[['fecha', 'Coin', 'Signal', 'Archivo']])
-            except Exception as e:
-                st.warning(f"Error leyendo archivo {file}: {e}")
-
-        if historical_data:
-            hist_df = pd.concat(historical_data)
-            hist_df = hist_df.dropna(subset=['fecha'])
+        rollups = obtener_rollups()
+        available_symbols = sorted(rollups.daily()['symbol'].unique())
 
+        if available_symbols:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                today = datetime.now().date()
+                date_range = st.date_input("Rango de fechas:", value=(today - timedelta(days=90), today))
+            with col2:
+                selected_symbols = st.multiselect("Monedas (vacío = todas):", available_symbols)
+            with col3:
+                resolucion = st.radio("Agrupar por:", ["Día", "Hora"], horizontal=True)
+                if resolucion == "Hora" and selected_symbols:
+                    st.caption("Por moneda solo hay conteos diarios.")
+
+            start, end = (date_range if isinstance(date_range, (list, tuple)) and len(date_range) == 2
+                          else (date_range, date_range))
+            end = datetime.combine(end, datetime.max.time())
+            grouped = _conteos_desde_rollups(rollups, selected_symbols, start, end, resolucion == "Hora")
+        else:
+            hist_df = _historial_desde_csv(csv_files).dropna(subset=['fecha'])
             grouped = hist_df.groupby(['fecha', 'Signal']).size().reset_index(name='conteo')
 
+        if not grouped.empty:
             fig_timeline = go.Figure()
             for signal_type in grouped['Signal'].unique():
                 df_type = grouped[grouped['Signal'] == signal_type]
@@ -48,4 +99,4 @@ def render_historical_timeline(csv_files):
         else:
             st.info("No se encontraron datos históricos suficientes para mostrar evolución cronológica.")
     except Exception as e:
-        st.warning(f"No se pudo generar la vista cronológica: {e}")
\ No newline at end of file
+        st.warning(f"No se pudo generar la vista cronológica: {e}")
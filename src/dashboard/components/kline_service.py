@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from src.bot.kline_store import KlineStore, DEFAULT_KLINE_DIR, interval_to_ms
+from src.bot.logger import configurar_logger
+from .downsampling import bucket_ohlc, DEFAULT_MAX_POINTS
+
+logger = configurar_logger()
+
+DEFAULT_TTL_SECONDS = 60
+
+
+def _crear_adaptador_binance():
+    from dotenv import load_dotenv
+    from src.bot.adapters.binance_adapter import BinanceAdapter
+
+    load_dotenv()
+    return BinanceAdapter(os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_SECRET_KEY"))
+
+
+class KlineService:
+    """
+    Velas para los gráficos del dashboard.
+
+    - Lee primero las velas que el bot ya guardó en KlineStore.
+    - Solo si lo guardado no llega hasta la última vela cerrada consulta al
+      exchange, con un único adaptador compartido (que además solo descarga lo
+      posterior a lo guardado).
+    - Cachea cada (símbolo, intervalo, días) en memoria durante `ttl_seconds`, así
+      cambiar de gráfico no vuelve a tocar disco ni red.
+    - La carga se hace fuera del lock: una consulta lenta al exchange solo hace
+      esperar a quien pide la misma clave (single-flight), no al resto de gráficos.
+    """
+
+    def __init__(self, store: KlineStore = None, adapter_factory: Optional[Callable] = _crear_adaptador_binance,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.store = store or KlineStore(DEFAULT_KLINE_DIR)
+        self.adapter_factory = adapter_factory
+        self.ttl_seconds = ttl_seconds
+        self._adapter = None
+        self._adapter_failed = False
+        self._lock = threading.Lock()
+        self._adapter_lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str, int], Tuple[float, pd.DataFrame]] = {}
+        self._in_flight: Dict[Tuple[str, str, int], threading.Event] = {}
+        self.stats = {"hits": 0, "local": 0, "remote": 0}
+
+    def _get_adapter(self):
+        """Adaptador compartido, creado la primera vez que hace falta."""
+        with self._adapter_lock:
+            if self._adapter is None and not self._adapter_failed and self.adapter_factory is not None:
+                try:
+                    self._adapter = self.adapter_factory()
+                except Exception as e:
+                    self._adapter_failed = True
+                    logger.warning(f"⚠️ Dashboard sin conexión al exchange; solo se usarán velas locales: {e}")
+            return self._adapter
+
+    @staticmethod
+    def _frame(df: pd.DataFrame, start_ms: int) -> pd.DataFrame:
+        df = df[df["open_time"] >= start_ms]
+        return pd.DataFrame({
+            "time": pd.to_datetime(df["open_time"].to_numpy(dtype="int64"), unit="ms"),
+            "open": df["open"].to_numpy(dtype=float),
+            "high": df["high"].to_numpy(dtype=float),
+            "low": df["low"].to_numpy(dtype=float),
+            "close": df["close"].to_numpy(dtype=float),
+            "volume": df["volume"].to_numpy(dtype=float),
+        })
+
+    def _load(self, symbol: str, interval: str, days: int) -> pd.DataFrame:
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - days * 86_400_000
+        interval_ms = interval_to_ms(interval)
+        local = self.store.load(symbol, interval)
+        # Lo local sirve si llega a la última vela cerrada y cubre los `days` pedidos
+        # (o empieza en la primera vela del símbolo, si cotiza desde hace menos).
+        up_to_date = not local.empty and int(local["close_time"].iloc[-1]) >= now_ms - interval_ms and (
+            int(local["open_time"].iloc[0]) <= start_ms + interval_ms
+            or self.store.history_start(symbol, interval) == int(local["open_time"].iloc[0])
+        )
+        if up_to_date:
+            self.stats["local"] += 1
+            return self._frame(local, start_ms)
+
+        adapter = self._get_adapter()
+        if adapter is not None:
+            try:
+                klines = adapter.get_klines(symbol=symbol, interval=interval, limit=days)
+                self.stats["remote"] += 1
+                return self._frame(pd.DataFrame(klines), start_ms) if klines else self._frame(local, start_ms)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron actualizar las velas de {symbol}: {e}")
+        self.stats["local"] += 1
+        return self._frame(local, start_ms)
+
+    def get(self, symbol: str, interval: str, days: int = 200, max_points: int = DEFAULT_MAX_POINTS) -> pd.DataFrame:
+        """
+        Velas de los últimos `days` días con columnas time, open, high, low, close
+        y volume, agrupadas a como mucho `max_points` velas (ver `bucket_ohlc`).
+        """
+        return bucket_ohlc(self.get_full(symbol, interval, days), max_points)
+
+    def get_full(self, symbol: str, interval: str, days: int = 200) -> pd.DataFrame:
+        """Como `get`, pero sin reducir (p. ej. para calcular indicadores)."""
+        key = (symbol.upper(), interval, days)
+        while True:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    self.stats["hits"] += 1
+                    return cached[1]
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = self._in_flight[key] = threading.Event()
+                    break
+            # Otra sesión ya está cargando esta clave: se espera su resultado.
+            flight.wait()
+
+        try:
+            df = self._load(key[0], interval, days)
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.ttl_seconds, df)
+            return df
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.set()
+
+
+@st.cache_resource
+def obtener_kline_store() -> KlineStore:
+    """
+    KlineStore compartido entre reruns y sesiones: su caché en memoria (por
+    mtime) evita releer cada Parquet en cada render.
+    """
+    return KlineStore(DEFAULT_KLINE_DIR)
+
+
+@st.cache_resource
+def obtener_kline_service() -> KlineService:
+    """Servicio de velas compartido por todas las sesiones del dashboard."""
+    return KlineService(obtener_kline_store())
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import os
 
+from .report_catalog import obtener_catalogo
+
 def render_multi_file_comparator(csv_files, reports_dir="reports"):
     st.header("📁 Comparador Multiarchivo")
 
@@ -15,11 +17,12 @@ def render_multi_file_comparator(csv_files, reports_dir="reports"):
         st.info("Selecciona al menos un archivo para comparar.")
         return
 
+    catalog = obtener_catalogo(reports_dir)
     data_frames = []
     for file in multi_files:
-        file_path = os.path.join(reports_dir, file)
+        file_path = file if os.path.isfile(file) else os.path.join(reports_dir, file)
         try:
-            df = pd.read_csv(file_path)
+            df = catalog.load(file_path)
             df["source_file"] = file  # Agregar columna de origen
             data_frames.append(df)
         except Exception as e:
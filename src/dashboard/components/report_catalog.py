@@ -0,0 +1,155 @@
+import fnmatch
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+REPORTS_DIR = "reports"
+REPORT_PATTERN = "top_signals_*.csv"
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+DEFAULT_CACHE_MB = 256
+
+
+@dataclass
+class ReportInfo:
+    """Metadatos de un reporte: lo necesario para listarlo sin parsearlo."""
+    path: str
+    mtime: float
+    size: int
+    rows: int
+    columns: List[str] = field(default_factory=list)
+    timestamp: Optional[datetime] = None
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+
+def _timestamp_from_name(path: str, prefix: str = "top_signals_") -> Optional[datetime]:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return datetime.strptime(stem[len(prefix):], REPORT_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def _describe(path: str, mtime: float, size: int) -> ReportInfo:
+    """Lee la cabecera y cuenta las filas sin construir un DataFrame."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline()
+        rows = sum(1 for line in f if line.strip())
+    columns = pd.read_csv(io.StringIO(header)).columns.tolist() if header.strip() else []
+    timestamp = _timestamp_from_name(path) or datetime.fromtimestamp(mtime)
+    return ReportInfo(path=path, mtime=mtime, size=size, rows=rows, columns=columns, timestamp=timestamp)
+
+
+class ReportCatalog:
+    """
+    Índice incremental de los reportes CSV más una caché LRU de DataFrames.
+
+    - `refresh` solo vuelve a describir los archivos cuyo mtime o tamaño cambió.
+    - `load` devuelve el DataFrame desde la caché si el archivo no cambió desde
+      que se parseó; la caché expulsa los menos usados al superar `max_cache_bytes`.
+
+    Se comparte entre sesiones y reruns de Streamlit (ver `obtener_catalogo`).
+    """
+
+    def __init__(self, reports_dir: str = REPORTS_DIR, pattern: str = REPORT_PATTERN,
+                 max_cache_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024):
+        self.reports_dir = reports_dir
+        self.pattern = pattern
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.RLock()
+        self._entries: Dict[str, ReportInfo] = {}
+        self._frames: "OrderedDict[str, Tuple[float, int, pd.DataFrame]]" = OrderedDict()
+        self._cache_bytes = 0
+        self.stats = {"described": 0, "parsed": 0, "hits": 0, "evicted": 0}
+
+    # --- Índice ---
+    def refresh(self, pattern: str = None) -> List[ReportInfo]:
+        """Actualiza el índice y devuelve los reportes del patrón, del más reciente al más antiguo."""
+        pattern = pattern or self.pattern
+        with self._lock:
+            seen = set()
+            if os.path.isdir(self.reports_dir):
+                with os.scandir(self.reports_dir) as it:
+                    for entry in it:
+                        if not entry.is_file() or not entry.name.endswith(".csv"):
+                            continue
+                        path = os.path.join(self.reports_dir, entry.name)
+                        seen.add(path)
+                        stat = entry.stat()
+                        cached = self._entries.get(path)
+                        if cached is not None and cached.mtime == stat.st_mtime and cached.size == stat.st_size:
+                            continue
+                        try:
+                            self._entries[path] = _describe(path, stat.st_mtime, stat.st_size)
+                            self.stats["described"] += 1
+                        except OSError:
+                            continue
+            for path in set(self._entries) - seen:
+                del self._entries[path]
+                self._drop_frame(path)
+            reports = [info for path, info in self._entries.items() if fnmatch.fnmatch(os.path.basename(path), pattern)]
+        return sorted(reports, key=lambda info: (info.timestamp or datetime.min, info.name), reverse=True)
+
+    def files(self, pattern: str = None) -> List[str]:
+        return [info.path for info in self.refresh(pattern)]
+
+    def info(self, path: str) -> Optional[ReportInfo]:
+        with self._lock:
+            return self._entries.get(path)
+
+    # --- Caché de DataFrames ---
+    def _drop_frame(self, path: str):
+        cached = self._frames.pop(path, None)
+        if cached is not None:
+            self._cache_bytes -= cached[1]
+
+    def load(self, path: str, copy: bool = True) -> pd.DataFrame:
+        """
+        DataFrame del reporte; solo se parsea si cambió desde la última lectura.
+        Por defecto devuelve una copia para que los componentes puedan modificarla.
+        """
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+            if cached is not None and cached[0] == mtime:
+                self._frames.move_to_end(path)
+                self.stats["hits"] += 1
+                return cached[2].copy() if copy else cached[2]
+
+        df = pd.read_csv(path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self.stats["parsed"] += 1
+            self._drop_frame(path)
+            if nbytes <= self.max_cache_bytes:
+                self._frames[path] = (mtime, nbytes, df)
+                self._cache_bytes += nbytes
+                while self._cache_bytes > self.max_cache_bytes:
+                    evicted, _ = next(iter(self._frames.items()))
+                    self._drop_frame(evicted)
+                    self.stats["evicted"] += 1
+        return df.copy() if copy else df
+
+    def cache_usage(self) -> Tuple[int, int]:
+        """(frames en caché, bytes que ocupan)."""
+        with self._lock:
+            return len(self._frames), self._cache_bytes
+
+
+@st.cache_resource
+def _catalogo_compartido(reports_dir: str, max_cache_mb: int) -> ReportCatalog:
+    return ReportCatalog(reports_dir, max_cache_bytes=max_cache_mb * 1024 * 1024)
+
+
+def obtener_catalogo(reports_dir: str = REPORTS_DIR, max_cache_mb: int = DEFAULT_CACHE_MB) -> ReportCatalog:
+    """Catálogo compartido por todas las sesiones del dashboard (uno por carpeta de reportes)."""
+    return _catalogo_compartido(os.path.normpath(reports_dir), max_cache_mb)
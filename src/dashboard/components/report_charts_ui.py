@@ -2,13 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import config
-from dotenv import load_dotenv
-import os
 
-# --- Imports Corregidos ---
-# ✅ Importamos la CLASE, no una función
-from src.bot.adapters.binance_adapter import BinanceAdapter
-from src.bot.data_fetcher import format_klines
+from .kline_service import obtener_kline_service
+
+CHART_DAYS = 200 # Ventana fija de días para los gráficos
 
 def render_technical_charts_from_report(df_report: pd.DataFrame):
     st.subheader("📈 Gráficos Técnicos desde Reporte")
@@ -26,22 +23,11 @@ def render_technical_charts_from_report(df_report: pd.DataFrame):
     if selected_coin:
         st.markdown(f"### {selected_coin}")
         try:
-            # --- ✅ Lógica Correcta ---
-            # 1. Cargar las claves de API
-            load_dotenv()
-            api_key = os.getenv("BINANCE_API_KEY")
-            api_secret = os.getenv("BINANCE_SECRET_KEY")
-
-            # 2. Crear una instancia del adaptador
-            adapter = BinanceAdapter(api_key, api_secret)
-
-            # 3. Llamar al método get_klines en la instancia
-            klines = adapter.get_klines(
-                symbol=f"{selected_coin}USDT",
-                interval=config.KLINE_INTERVAL,
-                limit=200 # Usamos un límite fijo para los gráficos
+            # Velas desde el servicio compartido: disco local primero y caché en memoria,
+            # así mover el slider no crea clientes ni vuelve a descargar lo que ya está guardado.
+            df_klines = obtener_kline_service().get(
+                f"{selected_coin}USDT", config.KLINE_INTERVAL, days=CHART_DAYS
             )
-            df_klines = pd.DataFrame(klines) # El adapter ya lo formatea
 
             if df_klines.empty:
                 st.warning(f"No se pudieron obtener datos históricos para {selected_coin}.")
@@ -49,7 +35,7 @@ def render_technical_charts_from_report(df_report: pd.DataFrame):
 
             # Crear gráfico de velas (candlestick)
             fig = go.Figure(data=[go.Candlestick(
-                x=pd.to_datetime(df_klines['open_time'], unit='ms'),
+                x=df_klines['time'],
                 open=df_klines['open'],
                 high=df_klines['high'],
                 low=df_klines['low'],
@@ -66,4 +52,4 @@ def render_technical_charts_from_report(df_report: pd.DataFrame):
             st.plotly_chart(fig, use_container_width=True)
 
         except Exception as e:
-            st.error(f"Ocurrió un error al cargar los datos para {selected_coin}: {e}")
\ No newline at end of file
+            st.error(f"Ocurrió un error al cargar los datos para {selected_coin}: {e}")
@@ -1,6 +1,7 @@
 import os
 import streamlit as st
-import pandas as pd
+
+from .report_catalog import obtener_catalogo
 
 def render_saved_reports_view():
     st.header("📁 Reportes Guardados")
@@ -10,7 +11,8 @@ def render_saved_reports_view():
         st.info("No hay reportes guardados.")
         return
 
-    report_files = [f for f in os.listdir(reports_dir) if f.endswith(".csv")]
+    catalog = obtener_catalogo(reports_dir)
+    report_files = [os.path.basename(f) for f in catalog.files("*.csv")]
     if not report_files:
         st.info("No se encontraron archivos CSV en la carpeta de reportes.")
         return
@@ -19,7 +21,7 @@ def render_saved_reports_view():
     if selected_report:
         report_path = os.path.join(reports_dir, selected_report)
         try:
-            df_report = pd.read_csv(report_path)
+            df_report = catalog.load(report_path)
             st.write(f"Mostrando datos del archivo: {selected_report}")
             st.dataframe(df_report)
 
@@ -1,6 +1,12 @@
+from datetime import datetime, timedelta
+
 import streamlit as st
 import matplotlib.pyplot as plt
 
+from .historical_timeline_ui import obtener_rollups
+
+HISTORY_DAYS = 30
+
 def render_signal_summary_section(filtered_data):
     st.subheader("📊 Resumen de Señales Detectadas")
 
@@ -22,6 +28,29 @@ def render_signal_summary_section(filtered_data):
         for signal, count in signal_counts.items():
             st.write(f"**{signal}**: {count}")
 
+    render_signal_history_totals()
+
+def render_signal_history_totals(days=HISTORY_DAYS):
+    """Totales de los últimos `days` días desde los rollups diarios (no relee reportes anteriores)."""
+    try:
+        daily = obtener_rollups().daily(start=datetime.now() - timedelta(days=days))
+    except Exception as e:
+        st.warning(f"No se pudo leer el histórico de señales: {e}")
+        return
+    if daily.empty:
+        return
+
+    st.markdown(f"### 🗂️ Histórico de los últimos {days} días")
+    totals = daily.groupby("Signal")["count"].sum().sort_values(ascending=False)
+    cols = st.columns(len(totals) + 1)
+    cols[0].metric("Señales registradas", int(totals.sum()))
+    for col, (signal, count) in zip(cols[1:], totals.items()):
+        col.metric(signal, int(count))
+
+    top_coins = daily.groupby("symbol")["count"].sum().nlargest(10)
+    with st.expander("Monedas con más señales"):
+        st.bar_chart(top_coins)
+
 def plot_signal_distribution(signal_counts):
     fig, ax = plt.subplots()
     signal_counts.plot(kind='bar', ax=ax, color='skyblue')
@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from typing import Optional
+import config
 
-# ✅ No necesitamos importar nada de 'src.bot' aquí.
-# El componente recibe los datos que necesita y solo se encarga de dibujarlos.
+from .kline_service import obtener_kline_service
+from .downsampling import bucket_ohlc, downsample_line, DEFAULT_MAX_POINTS
+
+CHART_DAYS = 365
 
 def render_technical_analysis_section(df_full: pd.DataFrame) -> None:
     st.subheader("📊 Análisis Técnico Individual")
@@ -25,25 +28,27 @@ def render_technical_analysis_section(df_full: pd.DataFrame) -> None:
 
     # Mostramos el gráfico de precio y EMAs
     st.markdown(f"#### Gráfico de Precio para **{selected_coin}**")
-    
-    # Creamos un DataFrame simple para el gráfico
-    # NOTA: Este gráfico es una simplificación. Para un gráfico real de velas, necesitaríamos
-    # llamar a 'get_historical_klines' como en el componente anterior.
-    # Por ahora, mostramos la tendencia general.
-    
-    price_df = pd.DataFrame({
-        'Fecha': [pd.to_datetime(coin_data['Date'])],
-        'Precio': [coin_data['Price']],
-        'EMA50': [coin_data.get('ema50')], # Usamos .get por si no existe
-        'EMA200': [coin_data.get('ema200')]
-    })
+
+    # Velas reales desde el servicio compartido (disco local + caché en memoria).
+    klines = obtener_kline_service().get_full(f"{selected_coin}USDT", config.KLINE_INTERVAL, days=CHART_DAYS)
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=price_df['Fecha'], y=price_df['Precio'], mode='lines+markers', name='Precio'))
-    if 'EMA50' in price_df:
-        fig.add_trace(go.Scatter(x=price_df['Fecha'], y=price_df['EMA50'], mode='lines', name='EMA 50'))
-    if 'EMA200' in price_df:
-        fig.add_trace(go.Scatter(x=price_df['Fecha'], y=price_df['EMA200'], mode='lines', name='EMA 200'))
+    if klines.empty:
+        # Sin velas disponibles: solo el último precio del reporte.
+        st.info("No hay velas guardadas para esta moneda; se muestra el último precio del reporte.")
+        fig.add_trace(go.Scatter(x=[pd.to_datetime(coin_data['Date'])], y=[coin_data['Price']],
+                                 mode='lines+markers', name='Precio'))
+    else:
+        # Las EMAs se calculan con todas las velas; después velas y líneas se reducen por separado.
+        ema50 = klines['close'].ewm(span=50, adjust=False).mean()
+        ema200 = klines['close'].ewm(span=200, adjust=False).mean()
+        candles = bucket_ohlc(klines, DEFAULT_MAX_POINTS)
+        fig.add_trace(go.Candlestick(x=candles['time'], open=candles['open'], high=candles['high'],
+                                     low=candles['low'], close=candles['close'], name='Precio'))
+        for name, ema in (('EMA 50', ema50), ('EMA 200', ema200)):
+            x, y = downsample_line(klines['time'], ema, DEFAULT_MAX_POINTS)
+            fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=name))
+        fig.update_layout(xaxis_rangeslider_visible=False)
 
     st.plotly_chart(fig, use_container_width=True)
     
@@ -1,7 +1,6 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-import glob
 import json
 from datetime import datetime
 
@@ -21,6 +20,7 @@ from src.bot.utils import ensure_directories_exist
 from components.chart_export_ui import render_chart_export_section
 from components.charts_ui import render_comparative_charts
 from components.correlation_ui import render_correlation_section
+from components.report_catalog import obtener_catalogo
 from components.export_all_signals_ui import render_export_all_signals_section
 from components.favorites_ui import render_favorites_section
 from components.filters_ui import render_filters_section
@@ -59,9 +59,9 @@ def main_dashboard():
         streamlit_autorefresh.st_autorefresh(interval=60 * 1000, key="datarefresh")
 
     # --- Carga de Datos ---
-    # La ruta a los reportes ahora se construye desde la raíz del proyecto
-    reports_path = "reports"
-    csv_files = sorted(glob.glob(os.path.join(reports_path, "top_signals_*.csv")), reverse=True)
+    # El catálogo solo vuelve a leer los reportes que cambiaron desde el último rerun.
+    catalog = obtener_catalogo()
+    csv_files = catalog.files()
 
     if not csv_files:
         st.warning("ℹ️ No se encontraron reportes en la carpeta `reports`.")
@@ -71,7 +71,7 @@ def main_dashboard():
     selected_report_file = st.sidebar.selectbox("Selecciona un Reporte:", csv_files)
 
     try:
-        df_full = pd.read_csv(selected_report_file)
+        df_full = catalog.load(selected_report_file)
         if df_full.empty:
             st.error("⚠️ El archivo seleccionado está vacío.")
             st.stop()
@@ -79,9 +79,9 @@ def main_dashboard():
         st.error(f"❌ Error al leer el archivo: {e}")
         st.stop()
     
-    creation_time = os.path.getctime(selected_report_file)
-    formatted_date = datetime.fromtimestamp(creation_time).strftime("%Y-%m-%d %H:%M:%S")
-    st.sidebar.caption(f"Datos del: {formatted_date}")
+    report_info = catalog.info(selected_report_file)
+    report_time = report_info.timestamp if report_info else datetime.fromtimestamp(os.path.getmtime(selected_report_file))
+    st.sidebar.caption(f"Datos del: {report_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
 
     # --- Navegación en la Barra Lateral ---
@@ -90,6 +90,8 @@ def main_dashboard():
         "Resumen de Señales",
         "Filtros y Reportes",
         "Análisis Técnico Individual",
+        "Evolución Histórica",
+        "Correlación de Retornos",
         # ... (puedes añadir el resto de tus secciones aquí)
     ]
     seccion_seleccionada = st.sidebar.radio("Selecciona una sección:", secciones)
@@ -110,6 +112,13 @@ def main_dashboard():
         # Pasamos el dataframe completo para que el componente elija la moneda
         render_technical_analysis_section(df_full)
 
+    elif seccion_seleccionada == "Evolución Histórica":
+        # Lee el historial columnar de señales; los CSV solo se usan si aún no existe.
+        render_historical_timeline(csv_files)
+
+    elif seccion_seleccionada == "Correlación de Retornos":
+        render_correlation_section(df_full)
+
 
 if __name__ == "__main__":
     main_dashboard()
\ No newline at end of file
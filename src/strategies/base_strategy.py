@@ -27,6 +27,27 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def on_price(self, price: float):
+        """
+        Hook invocado por el motor de eventos con cada nuevo precio del símbolo.
+        Por defecto no hace nada; las estrategias lo usan para su gestión de riesgo.
+        """
+        pass
+
+    def on_candle(self, candle: Dict[str, Any]):
+        """
+        Hook invocado por el motor de eventos al cerrar una vela del símbolo.
+        Por defecto ejecuta un ciclo normal de la estrategia.
+        """
+        self.run()
+
+    def cancel_open_orders(self):
+        """
+        Cancela las órdenes en reposo que la estrategia dejó en el exchange.
+        Se invoca al retirarla o reemplazarla; por defecto no hace nada.
+        """
+        pass
+
     def start(self):
         """Inicia la estrategia."""
         self.is_running = True
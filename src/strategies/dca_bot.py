@@ -1,23 +1,25 @@
 # src/strategies/dca_bot.py
 
-import time
-from strategies.base_strategy import BaseStrategy
-from bot.adapters.base_exchange import BaseExchangeAdapter
+from logging import Logger
+from typing import Dict, Any
+from .base_strategy import BaseStrategy
+from ..bot.adapters.base_exchange import BaseExchangeAdapter
 
 class DCABotStrategy(BaseStrategy):
     """
     Implementa una estrategia de Dollar-Cost Averaging (DCA) con gestión de riesgo.
     """
 
-    def __init__(self, exchange_adapter: BaseExchangeAdapter, symbol: str, config: dict):
-        super().__init__(exchange_adapter, symbol, config)
-        # Configuración específica de DCA
-        self.purchase_amount_usd = self.config.get('purchase_amount_usd', 50)
-        self.interval_hours = self.config.get('interval_hours', 24)
+    def __init__(self, config: Dict[str, Any], exchange_adapter: BaseExchangeAdapter, logger: Logger):
+        super().__init__(config, exchange_adapter, logger)
+        # Configuración específica de DCA (bloque 'parameters' de strategies.yaml)
+        params = self.config.get('parameters') or {}
+        self.purchase_amount_usd = params.get('purchase_amount_usd', 50)
+        self.interval_hours = params.get('interval_hours', 24)
         
         # --- NUEVA LÓGICA DE GESTIÓN DE RIESGO ---
-        self.take_profit = self.config.get('take_profit')
-        self.stop_loss = self.config.get('stop_loss')
+        self.take_profit = params.get('take_profit')
+        self.stop_loss = params.get('stop_loss')
         self.last_purchase_time = 0
 
     def initialize(self):
@@ -30,6 +32,11 @@ class DCABotStrategy(BaseStrategy):
 
     def _check_risk_management(self, current_price: float):
         """Verifica si se deben tomar ganancias o cortar pérdidas."""
+        take_profit_hit = bool(self.take_profit) and current_price >= self.take_profit
+        stop_loss_hit = bool(self.stop_loss) and current_price <= self.stop_loss
+        if not (take_profit_hit or stop_loss_hit):
+            return # El balance solo se consulta cuando hay que vender (on_price llega cada pocos segundos)
+
         base_currency = self.symbol.replace('USDT', '')
         balance = self.exchange.get_account_balance().get(base_currency, {}).get('free', 0)
 
@@ -37,7 +44,7 @@ class DCABotStrategy(BaseStrategy):
             return # No hay nada que vender
 
         # --- Lógica de Take Profit ---
-        if self.take_profit and current_price >= self.take_profit:
+        if take_profit_hit:
             print(f"📈 TAKE PROFIT ALCANZADO para {self.symbol} a ${current_price:.2f}!")
             self.exchange.create_order(
                 symbol=self.symbol, order_type='MARKET', side='SELL', quantity=balance
@@ -45,13 +52,22 @@ class DCABotStrategy(BaseStrategy):
             self.stop() # Detener la estrategia después de tomar ganancias
 
         # --- Lógica de Stop Loss ---
-        elif self.stop_loss and current_price <= self.stop_loss:
+        elif stop_loss_hit:
             print(f"🛑 STOP LOSS ALCANZADO para {self.symbol} a ${current_price:.2f}!")
             self.exchange.create_order(
                 symbol=self.symbol, order_type='MARKET', side='SELL', quantity=balance
             )
             self.stop() # Detener la estrategia después de cortar pérdidas
 
+    def run(self):
+        """Punto de entrada usado por el StrategyManager en cada ciclo."""
+        self.run_logic()
+
+    def on_price(self, price: float):
+        """Con el motor de eventos, el stop loss se evalúa con cada tick del símbolo."""
+        if self.is_running:
+            self._check_risk_management(price)
+
     def run_logic(self):
         """Ejecuta la lógica principal de la estrategia DCA."""
         if not self.is_running:
@@ -66,7 +82,7 @@ class DCABotStrategy(BaseStrategy):
                 return
 
             # 2. Luego, ejecutar la compra periódica si aplica
-            now = time.time()
+            now = self.exchange.current_time()
             if (now - self.last_purchase_time) > (self.interval_hours * 3600):
                 print(f"Ejecutando ciclo de compra DCA para {self.symbol}...")
                 quantity_to_buy = self.purchase_amount_usd / current_price
@@ -1,5 +1,8 @@
 # src/strategies/grid_bot.py
 
+import bisect
+from logging import Logger
+from typing import Dict, Any, List, Optional, Tuple
 from .base_strategy import BaseStrategy
 from ..bot.adapters.base_exchange import BaseExchangeAdapter
 
@@ -8,17 +11,31 @@ class GridBotStrategy(BaseStrategy):
     Implementa una estrategia de Grid Trading.
     Coloca una serie de órdenes de compra y venta por encima y por debajo
     del precio actual, creando una "parrilla".
+
+    Las órdenes abiertas de la parrilla se indexan localmente por nivel
+    (nivel -> id de orden y id de orden -> nivel), así que detectar una
+    ejecución y reponer la orden contraria no requiere recorrer las órdenes
+    abiertas del exchange: cada ciclo solo consulta las órdenes ejecutadas
+    desde la orden abierta más antigua.
     """
 
-    def __init__(self, exchange_adapter: BaseExchangeAdapter, symbol: str, config: dict):
-        super().__init__(exchange_adapter, symbol, config)
-        # Configuración específica de Grid
-        self.lower_price = self.config.get('lower_price')
-        self.upper_price = self.config.get('upper_price')
-        self.grid_levels = self.config.get('grid_levels', 10)
-        self.investment_per_level_usd = self.config.get('investment_per_level_usd', 20)
+    def __init__(self, config: Dict[str, Any], exchange_adapter: BaseExchangeAdapter, logger: Logger):
+        super().__init__(config, exchange_adapter, logger)
+        # Configuración específica de Grid (bloque 'parameters' de strategies.yaml)
+        params = self.config.get('parameters') or {}
+        self.lower_price = params.get('lower_price')
+        self.upper_price = params.get('upper_price')
+        self.grid_levels = params.get('grid_levels', 10)
+        self.investment_per_level_usd = params.get('investment_per_level_usd', 20)
         self.grid_lines = []
-        self.stop_loss = self.config.get('stop_loss')
+        self.stop_loss = params.get('stop_loss')
+
+        # Índice local de órdenes abiertas: nivel -> id por lado, e id -> (lado, nivel).
+        self._buy_orders: Dict[int, str] = {}
+        self._sell_orders: Dict[int, str] = {}
+        self._level_by_order: Dict[str, Tuple[str, int]] = {}
+        # Instante de la última ejecución procesada (pista `updated_since` para el adaptador).
+        self._last_fill_time: Optional[int] = None
 
     def initialize(self):
         """Calcula los niveles de la parrilla y coloca las órdenes iniciales."""
@@ -27,7 +44,7 @@ class GridBotStrategy(BaseStrategy):
             print(f"   - Stop Loss global en: {self.stop_loss}")
         self._calculate_grid_lines()
         self._setup_initial_orders()
-        
+
 
     def _calculate_grid_lines(self):
         """Calcula los precios para cada nivel de la parrilla."""
@@ -36,56 +53,137 @@ class GridBotStrategy(BaseStrategy):
         self.grid_lines = [self.lower_price + i * step for i in range(self.grid_levels)]
         print(f"Niveles de la parrilla calculados: {self.grid_lines}")
 
+    # --- Índice de órdenes por nivel ---
+    def _nearest_level(self, price: float) -> Optional[int]:
+        """Nivel de la parrilla más cercano a `price` (búsqueda binaria sobre los niveles ordenados)."""
+        if not self.grid_lines:
+            return None
+        idx = bisect.bisect_left(self.grid_lines, price)
+        if idx == 0:
+            return 0
+        if idx == len(self.grid_lines):
+            return idx - 1
+        return idx if self.grid_lines[idx] - price < price - self.grid_lines[idx - 1] else idx - 1
+
+    def _orders_for(self, side: str) -> Dict[int, str]:
+        return self._buy_orders if side == 'BUY' else self._sell_orders
+
+    def _index_order(self, side: str, level: int, order_id):
+        order_id = str(order_id)
+        self._orders_for(side)[level] = order_id
+        self._level_by_order[order_id] = (side, level)
+
+    def _unindex_order(self, order_id) -> Optional[Tuple[str, int]]:
+        slot = self._level_by_order.pop(str(order_id), None)
+        if slot is not None:
+            self._orders_for(slot[0]).pop(slot[1], None)
+        return slot
+
+    def _place_level_order(self, side: str, level: int, quantity: float) -> bool:
+        """Coloca una orden LIMIT en un nivel y la indexa. Devuelve si se colocó."""
+        price = self.grid_lines[level]
+        try:
+            order = self.exchange.create_order(
+                symbol=self.symbol, order_type='LIMIT', side=side,
+                quantity=quantity, price=price
+            )
+        except Exception as e:
+            print(f"No se pudo colocar la orden en el nivel {price}: {e}")
+            return False
+        self._index_order(side, level, order['orderId'])
+        return True
+
+    def _adopt_open_orders(self):
+        """
+        Indexa las órdenes que ya estaban abiertas en el exchange (p. ej. tras
+        recargar la configuración), para no duplicarlas al colocar la parrilla.
+        """
+        for order in self.exchange.get_open_orders(self.symbol):
+            level = self._nearest_level(float(order['price']))
+            if level is None or abs(self.grid_lines[level] - float(order['price'])) > 1e-9 * self.grid_lines[level]:
+                continue # No pertenece a esta parrilla.
+            side = order['side'].upper()
+            if level not in self._orders_for(side):
+                self._index_order(side, level, order['orderId'])
+
     def _setup_initial_orders(self):
         """Coloca las órdenes de compra y venta iniciales según la parrilla."""
         current_price = self.exchange.get_price(self.symbol)
-        
-        for price in self.grid_lines:
+        self._adopt_open_orders()
+
+        pending = [] # (nivel, orden) que se envían juntas con create_orders
+        for level, price in enumerate(self.grid_lines):
             quantity = self.investment_per_level_usd / price
+            if price < current_price:
+                if level in self._buy_orders or level + 1 in self._sell_orders:
+                    continue # El nivel ya tiene su compra, o está a la espera de vender un nivel más arriba.
+                print(f"Colocando orden de compra en {price:.4f} por {quantity:.6f} {self.symbol}")
+                pending.append((level, {
+                    'symbol': self.symbol, 'order_type': 'LIMIT', 'side': 'BUY',
+                    'quantity': quantity, 'price': price,
+                }))
+            elif price > current_price:
+                # Colocar orden de venta (LIMIT SELL)
+                print(f"Colocando orden de venta en {price:.4f} por {quantity:.6f} {self.symbol}")
+                # Nota: Para vender, necesitas tener el activo. Esto asume que ya lo posees.
+                # En una implementación real, se compraría el activo base primero.
+                # Las ventas se colocan al reponer: cada compra ejecutada abre una venta un nivel más arriba.
+
+        if not pending:
+            return
+        result = self.exchange.create_orders([request for _, request in pending])
+        for (level, request), order in zip(pending, result['orders']):
+            if order is not None:
+                self._index_order(request['side'], level, order['orderId'])
+        for error in result['errors']:
+            print(f"No se pudo colocar la orden en el nivel {error['request']['price']}: {error['error']}")
+
+    def cancel_open_orders(self):
+        """Cancela solo las órdenes de esta parrilla (otras estrategias pueden operar el mismo símbolo)."""
+        for order_id in list(self._level_by_order):
             try:
-                if price < current_price:
-                    print(f"Colocando orden de compra en {price:.4f} por {quantity:.6f} {self.symbol}")
-                    self.exchange.create_order(
-                        symbol=self.symbol, order_type='LIMIT', side='BUY',
-                        quantity=quantity, price=price
-                    )
-                elif price > current_price:
-                    # Colocar orden de venta (LIMIT SELL)
-                    print(f"Colocando orden de venta en {price:.4f} por {quantity:.6f} {self.symbol}")
-                    # Nota: Para vender, necesitas tener el activo. Esto asume que ya lo posees.
-                    # En una implementación real, se compraría el activo base primero.
-                    # self.exchange.create_order(
-                    #     symbol=self.symbol, order_type='LIMIT', side='SELL',
-                    #     quantity=quantity, price=price
-                    # )
+                self.exchange.cancel_order(self.symbol, order_id)
             except Exception as e:
-                print(f"No se pudo colocar la orden en el nivel {price}: {e}")
+                print(f"No se pudo cancelar la orden {order_id} de la parrilla {self.symbol}: {e}")
+            self._unindex_order(order_id)
 
     # --- Lógica completa de Stop Loss ---
     def _check_risk_management(self, current_price: float):
         """Verifica si se alcanzó el stop loss y liquida la posición si es necesario."""
         if self.stop_loss and current_price <= self.stop_loss:
             print(f"🛑 STOP LOSS ALCANZADO para la parrilla {self.symbol} a ${current_price:.2f}!")
-            
-            # 1. Cancelar todas las órdenes abiertas de la parrilla
-            open_orders = self.exchange.get_open_orders(self.symbol)
-            for order in open_orders:
-                print(f"Cancelando orden {order['orderId']}...")
-                self.exchange.cancel_order(self.symbol, order['orderId'])
-            
+
+            # 1. Cancelar todas las órdenes abiertas del símbolo en una sola operación
+            result = self.exchange.cancel_all_orders(self.symbol)
+            print(f"Canceladas {len(result['orders'])} órdenes de {self.symbol}.")
+            for error in result['errors']:
+                print(f"No se pudo cancelar la orden {error['request'].get('orderId', '')}: {error['error']}")
+            self._buy_orders.clear()
+            self._sell_orders.clear()
+            self._level_by_order.clear()
+
             # 2. Vender toda la posición del activo base
             base_currency = self.symbol.replace('USDT', '')
             balance_info = self.exchange.get_account_balance()
             balance = balance_info.get(base_currency, {}).get('free', 0)
-            
+
             if balance > 0:
                 print(f"Vendiendo {balance} de {base_currency} por stop loss...")
                 self.exchange.create_order(
                     symbol=self.symbol, order_type='MARKET', side='SELL', quantity=balance
                 )
-            
+
             self.stop() # Detiene la estrategia para prevenir más acciones
 
+    def run(self):
+        """Punto de entrada usado por el StrategyManager en cada ciclo."""
+        self.run_logic()
+
+    def on_price(self, price: float):
+        """Con el motor de eventos, el stop loss se evalúa con cada tick del símbolo."""
+        if self.is_running:
+            self._check_risk_management(price)
+
     def run_logic(self):
         """
         Bucle principal de la estrategia:
@@ -94,7 +192,7 @@ class GridBotStrategy(BaseStrategy):
         """
         if not self.is_running:
             return
-        
+
         current_price = self.exchange.get_price(self.symbol)
         print(f"Monitoreando parrilla para {self.symbol}. Precio actual: ${current_price:.2f}")
 
@@ -103,27 +201,44 @@ class GridBotStrategy(BaseStrategy):
         self._check_risk_management(current_price)
         if not self.is_running: # Si el SL detuvo el bot, no continuar.
             return
-        
-        # 2. Tu lógica para reponer la parrilla.
-        # En una implementación real, este método necesitaría acceder al historial de trades
-        # para ver qué órdenes se completaron desde la última revisión.
-        # Por ahora, es un placeholder que demuestra cómo se estructuraría.
-        # trade_signals = self.get_trade_signals()
-        # for signal in trade_signals:
-        #     print(f"Nueva señal de trading generada por la parrilla: {signal}")
-        #     self.exchange.create_order(
-        #         symbol=self.symbol,
-        #         order_type='LIMIT',
-        #         side=signal['action'].upper(),
-        #         quantity=signal['quantity'],_price=signal['price']
-        #     )
-        pass # La lógica de reposición se desarrollará más adelante
-
-    def get_trade_signals(self):
+
+        # 2. Reponer la parrilla: por cada orden ejecutada, la contraria en el nivel adyacente.
+        for signal in self.get_trade_signals():
+            print(f"Nueva señal de trading generada por la parrilla: {signal}")
+            self._place_level_order(signal['action'], signal['level'], signal['quantity'])
+
+    def get_trade_signals(self) -> List[Dict[str, Any]]:
         """
         Devuelve una lista de señales de trading basadas en órdenes ejecutadas.
-        Cada señal es un diccionario con 'action', 'price' y 'quantity'.
+        Cada señal es un diccionario con 'action', 'price', 'quantity' y 'level'.
+
+        - Una compra ejecutada en el nivel i abre una venta en el nivel i+1.
+        - Una venta ejecutada en el nivel i vuelve a abrir la compra en el nivel i-1.
         """
-        
-        # Por ahora se dejara vacía
-        return []
\ No newline at end of file
+        if not self._level_by_order:
+            return []
+
+        oldest_open = min(int(order_id) for order_id in self._level_by_order)
+        signals = []
+        executed = self.exchange.get_executed_orders(self.symbol, from_order_id=oldest_open,
+                                                     updated_since=self._last_fill_time)
+        for order in executed:
+            if order.get('updateTime') is not None:
+                self._last_fill_time = max(self._last_fill_time or 0, int(order['updateTime']))
+            if str(order['orderId']) not in self._level_by_order:
+                continue # No es de esta parrilla o ya se procesó.
+            side, level = self._unindex_order(order['orderId'])
+            target = level + 1 if side == 'BUY' else level - 1
+            if not 0 <= target < len(self.grid_lines) or target in self._orders_for('SELL' if side == 'BUY' else 'BUY'):
+                continue
+            if side == 'BUY':
+                quantity = float(order.get('executedQty') or order['origQty'])
+            else:
+                quantity = self.investment_per_level_usd / self.grid_lines[target]
+            signals.append({
+                'action': 'SELL' if side == 'BUY' else 'BUY',
+                'price': self.grid_lines[target],
+                'quantity': quantity,
+                'level': target,
+            })
+        return signals
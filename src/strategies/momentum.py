@@ -1,24 +1,157 @@
+import time
 import traceback
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
 from ..bot.telegram_utils import send_telegram_message
 
+DEFAULT_CHANGE_THRESHOLD_PCT = 5.0
+DEFAULT_ZSCORE_THRESHOLD = 3.0
+DEFAULT_VOLUME_SPIKE_RATIO = 3.0
+DEFAULT_COOLDOWN_SECONDS = 3600
+VOLUME_BASELINE_ALPHA = 0.1 # Peso de cada escaneo en la media móvil exponencial del volumen
+
+
+class PriceAlertScanner:
+    """
+    Detecta alertas de precio para todo el universo de símbolos de una vez, a
+    partir de una sola instantánea de tickers de 24h (o de las velas locales).
+
+    Para cada símbolo calcula, como arrays de NumPy:
+    - el cambio porcentual de 24h,
+    - su z-score robusto frente al resto del universo (mediana y MAD),
+    - la relación entre el volumen actual y su media exponencial de escaneos previos.
+
+    Un símbolo que ya alertó no vuelve a alertar hasta pasados `cooldown_seconds`.
+    """
+
+    def __init__(self, change_threshold_pct: float = DEFAULT_CHANGE_THRESHOLD_PCT,
+                 zscore_threshold: float = DEFAULT_ZSCORE_THRESHOLD,
+                 volume_spike_ratio: float = DEFAULT_VOLUME_SPIKE_RATIO,
+                 cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS, clock=time.time):
+        self.change_threshold_pct = change_threshold_pct
+        self.zscore_threshold = zscore_threshold
+        self.volume_spike_ratio = volume_spike_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self._volume_baseline = pd.Series(dtype=float) # símbolo -> media exponencial del volumen
+        self._last_alert = pd.Series(dtype=float) # símbolo -> momento de la última alerta
+
+    def scan(self, symbols: np.ndarray, change_pct: np.ndarray, price: np.ndarray,
+             volume: np.ndarray, watched: np.ndarray = None) -> List[Dict[str, Any]]:
+        """
+        Evalúa arrays alineados (un elemento por símbolo) y devuelve las alertas nuevas.
+
+        La mediana y el MAD del z-score se calculan sobre todos los símbolos
+        recibidos; `watched` (máscara booleana) limita cuáles pueden alertar.
+        Con pocos símbolos tranquilos el MAD es diminuto y cualquier movimiento
+        pequeño daría un z-score enorme, así que conviene pasar el mercado entero.
+        """
+        symbols = np.asarray(symbols, dtype=object)
+        change_pct = np.asarray(change_pct, dtype=float)
+        price = np.asarray(price, dtype=float)
+        volume = np.asarray(volume, dtype=float)
+        if len(symbols) == 0:
+            return []
+        now = self.clock()
+
+        median = np.nanmedian(change_pct)
+        mad = np.nanmedian(np.abs(change_pct - median)) * 1.4826
+        with np.errstate(divide="ignore", invalid="ignore"):
+            zscore = (change_pct - median) / mad if mad > 0 else np.zeros_like(change_pct)
+            baseline = self._volume_baseline.reindex(symbols).to_numpy(dtype=float)
+            volume_ratio = volume / baseline
+
+        by_change = np.abs(change_pct) >= self.change_threshold_pct
+        by_zscore = np.abs(zscore) >= self.zscore_threshold
+        by_volume = np.nan_to_num(volume_ratio) >= self.volume_spike_ratio
+        last_alert = self._last_alert.reindex(symbols).to_numpy(dtype=float)
+        cooled = np.isnan(last_alert) | (now - last_alert >= self.cooldown_seconds)
+        if watched is not None:
+            cooled &= np.asarray(watched, dtype=bool)
+        triggered = np.flatnonzero((by_change | by_zscore | by_volume) & cooled)
+
+        # La media del volumen se actualiza después de comparar, con el volumen de este escaneo.
+        updated = np.where(np.isnan(baseline), volume,
+                           (1 - VOLUME_BASELINE_ALPHA) * baseline + VOLUME_BASELINE_ALPHA * volume)
+        self._volume_baseline = pd.Series(updated, index=symbols).combine_first(self._volume_baseline)
+
+        if len(triggered) == 0:
+            return []
+        self._last_alert = pd.Series(now, index=symbols[triggered]).combine_first(self._last_alert)
+
+        alerts = []
+        for i in triggered:
+            reasons = [name for name, hit in (("change", by_change[i]), ("zscore", by_zscore[i]), ("volume", by_volume[i])) if hit]
+            alerts.append({
+                "symbol": symbols[i],
+                "change_pct": float(change_pct[i]),
+                "price": float(price[i]),
+                "zscore": float(zscore[i]),
+                "volume_ratio": float(volume_ratio[i]) if np.isfinite(volume_ratio[i]) else None,
+                "reasons": reasons,
+            })
+        return alerts
+
+    def scan_tickers(self, tickers: List[Dict[str, Any]], symbols: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """
+        Alertas a partir de la respuesta de `get_ticker()` de Binance (estadísticas
+        de 24h de todos los símbolos). El z-score se mide contra todo el snapshot;
+        solo alertan los `symbols` indicados.
+        """
+        df = pd.DataFrame(tickers, columns=["symbol", "priceChangePercent", "lastPrice", "quoteVolume"])
+        watched = df["symbol"].isin(set(symbols)).to_numpy() if symbols is not None else None
+        return self.scan(df["symbol"].to_numpy(), pd.to_numeric(df["priceChangePercent"], errors="coerce").to_numpy(),
+                         pd.to_numeric(df["lastPrice"], errors="coerce").to_numpy(),
+                         pd.to_numeric(df["quoteVolume"], errors="coerce").to_numpy(), watched=watched)
+
+    def scan_store(self, store, symbols: Iterable[str], interval: str = "1d") -> List[Dict[str, Any]]:
+        """Alertas a partir de las dos últimas velas guardadas en KlineStore (sin llamadas al exchange)."""
+        rows = []
+        for symbol in symbols:
+            df = store.load(symbol, interval)
+            if len(df) >= 2:
+                prev_close, close = float(df["close"].iloc[-2]), float(df["close"].iloc[-1])
+                rows.append((symbol, (close - prev_close) / prev_close * 100, close, float(df["volume"].iloc[-1]) * close))
+        if not rows:
+            return []
+        symbols, change_pct, price, volume = map(np.array, zip(*rows))
+        return self.scan(symbols, change_pct, price, volume)
+
+
+def formatear_alerta(alert: Dict[str, Any], coin: str) -> str:
+    change = alert["change_pct"]
+    message = f"""📈 ALERTA DE PRECIO ({'🔺' if change > 0 else '🔻'}) - {coin.upper()}
+Cambio 24h: {change:.2f}%
+Precio actual: ${alert['price']:.2f}"""
+    if "volume" in alert["reasons"] and alert["volume_ratio"]:
+        message += f"\nVolumen: x{alert['volume_ratio']:.1f} sobre su media"
+    if "zscore" in alert["reasons"]:
+        message += f"\nZ-score frente al mercado: {alert['zscore']:.1f}"
+    return message
+
+
+_scanner: Optional[PriceAlertScanner] = None
+
+
 def check_price_alerts(coins, symbol_map, binance_client):
+    global _scanner
     try:
+        # Un único escáner conserva los enfriamientos y las medias de volumen entre llamadas.
+        _scanner = _scanner or PriceAlertScanner()
+        coin_by_symbol = {}
         for coin in coins:
             symbol = symbol_map.get(coin.lower())
-            if not symbol:
-                continue
-            klines = binance_client.get_klines(symbol=symbol, interval='1d', limit=2)
-            if len(klines) < 2:
-                continue
-            price_yesterday = float(klines[0][4])
-            price_today = float(klines[1][4])
-            change = ((price_today - price_yesterday) / price_yesterday) * 100
-
-            if abs(change) >= 5:
-                message = f"""📈 ALERTA DE PRECIO ({'🔺' if change > 0 else '🔻'}) - {coin.upper()}
-Cambio 24h: {change:.2f}%
-Precio actual: ${price_today:.2f}"""
-                send_telegram_message(message)
+            if symbol:
+                coin_by_symbol[symbol] = coin
+        if not coin_by_symbol:
+            return
+
+        tickers = binance_client.get_ticker() # Estadísticas de 24h de todos los símbolos en una sola llamada
+        for alert in _scanner.scan_tickers(tickers, coin_by_symbol):
+            send_telegram_message(formatear_alerta(alert, coin_by_symbol[alert["symbol"]]))
     except Exception as e:
         print(f"❌ Error al verificar alertas de precio: {e}")
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
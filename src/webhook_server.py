@@ -1,86 +1,100 @@
 # src/webhook_server.py
 
-from flask import Flask, request, jsonify
-import json
+import asyncio
+
+from aiohttp import web
+
 from .bot.strategy_manager import StrategyManager
+from .bot.webhook_pipeline import (
+    WebhookPipeline, parse_alert, ACCEPTED, DUPLICATE,
+    DEFAULT_WORKERS, DEFAULT_QUEUE_SIZE, DEFAULT_IDEMPOTENCY_TTL_SECONDS, DEFAULT_DUPLICATE_WINDOW_SECONDS,
+    DEFAULT_NETTING_WINDOW_MS, DEFAULT_MAX_LATENCY_MS,
+)
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 5000
+MAX_BODY_BYTES = 64 * 1024
 
-# Inicializamos la aplicación Flask
-app = Flask(__name__)
+PIPELINE_KEY = web.AppKey("pipeline", WebhookPipeline)
 
-# Esta es una referencia global a nuestro gestor de estrategias.
-# La inicializaremos desde nuestro runner principal.
-strategy_manager = None 
 
-@app.route('/webhook', methods=['POST'])
-def handle_webhook():
+async def handle_webhook(request: web.Request) -> web.Response:
     """
-    Este es el endpoint que recibirá las alertas de TradingView.
-    Debe ser accesible desde internet para que TradingView pueda enviarle datos.
+    Endpoint que recibe las alertas de TradingView, p. ej.
+    { "action": "buy", "symbol": "BTCUSDT", "quantity_usd": 50, "id": "..." }
+
+    Solo valida y encola: la orden se ejecuta en el pipeline y la respuesta
+    (202) no espera al exchange.
     """
-    global strategy_manager
-    if not strategy_manager:
-        return jsonify({"status": "error", "message": "Strategy Manager no inicializado"}), 500
+    pipeline = request.app[PIPELINE_KEY]
+    body = await request.read()
+    try:
+        alert, explicit_key = parse_alert(body, request.headers.get("X-Idempotency-Key"))
+    except ValueError as e:
+        pipeline.reject()
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+
+    result = pipeline.submit(alert, explicit_key)
+    if result == ACCEPTED:
+        return web.json_response({"status": "accepted", "key": alert.key}, status=202)
+    if result == DUPLICATE:
+        return web.json_response({"status": "duplicate", "key": alert.key}, status=200)
+    return web.json_response({"status": "error", "message": "Cola de alertas llena, reintenta más tarde."}, status=503)
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app[PIPELINE_KEY].snapshot())
+
 
-    print("\n🚀 ¡Webhook de TradingView recibido! 🚀")
-    
+def create_app(pipeline: WebhookPipeline) -> web.Application:
+    app = web.Application(client_max_size=MAX_BODY_BYTES)
+    app[PIPELINE_KEY] = pipeline
+    app.router.add_post("/webhook", handle_webhook)
+    app.router.add_get("/webhook/stats", handle_stats)
+    return app
+
+
+def create_pipeline(manager: StrategyManager) -> WebhookPipeline:
+    """Pipeline configurado con la sección 'webhook' de strategies.yaml."""
+    config = manager.config.get('webhook') or {}
+    return WebhookPipeline(
+        manager.exchange_for,
+        symbol_lock=manager.symbol_lock,
+        workers=int(config.get('workers', DEFAULT_WORKERS)),
+        queue_size=int(config.get('queue_size', DEFAULT_QUEUE_SIZE)),
+        idempotency_ttl_seconds=float(config.get('idempotency_ttl_seconds', DEFAULT_IDEMPOTENCY_TTL_SECONDS)),
+        duplicate_window_seconds=float(config.get('duplicate_window_seconds', DEFAULT_DUPLICATE_WINDOW_SECONDS)),
+        netting_window_ms=float(config.get('netting_window_ms', DEFAULT_NETTING_WINDOW_MS)),
+        max_latency_ms=float(config.get('max_latency_ms', DEFAULT_MAX_LATENCY_MS)),
+    )
+
+
+async def serve(app: web.Application, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready: asyncio.Event = None):
+    """Sirve `app` hasta que se cancele la tarea (sin instalar manejadores de señales)."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    if ready is not None:
+        ready.set()
     try:
-        # El mensaje de la alerta de TradingView viene en el cuerpo de la petición.
-        data = request.data.decode('utf-8')
-        
-        # Opcional: Si el mensaje es un JSON, lo procesamos.
-        try:
-            payload = json.loads(data)
-            print("Payload JSON:", payload)
-        except json.JSONDecodeError:
-            # Si no es JSON, lo tratamos como texto plano.
-            payload = {"message": data}
-            print("Payload de texto:", data)
-
-        # --- Lógica para procesar la alerta ---
-        # Aquí es donde traduces el mensaje en una acción de trading.
-        # Por ejemplo, el mensaje de TradingView podría ser:
-        # { "action": "buy", "symbol": "BTCUSDT", "quantity_usd": 50 }
-        
-        action = payload.get('action', '').lower()
-        symbol = payload.get('symbol', '').upper()
-        quantity_usd = payload.get('quantity_usd')
-
-        if not all([action, symbol, quantity_usd]):
-            return jsonify({"status": "error", "message": "Datos incompletos en el webhook"}), 400
-
-        # Obtenemos el adaptador del exchange desde el manager
-        exchange = strategy_manager.strategies[0].exchange
-        
-        # Calculamos la cantidad de cripto a comprar/vender
-        price = exchange.get_price(symbol)
-        quantity_crypto = float(quantity_usd) / price
-        
-        print(f"Ejecutando orden de webhook: {action} {quantity_crypto:.6f} de {symbol}")
-        
-        # Ejecutamos la orden
-        order_result = exchange.create_order(
-            symbol=symbol,
-            order_type='MARKET',
-            side=action.upper(),
-            quantity=quantity_crypto
-        )
-        
-        return jsonify({"status": "success", "order": order_result}), 200
-
-    except Exception as e:
-        print(f"Error al procesar el webhook: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
-
-def run_webhook_server(manager: StrategyManager):
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def run_webhook_server(manager: StrategyManager, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
     """
-    Función para iniciar el servidor Flask.
-    
+    Inicia el servidor de webhooks (bloqueante; pensado para su propio hilo).
+
     :param manager: Una instancia del StrategyManager para poder ejecutar órdenes.
     """
-    global strategy_manager
-    strategy_manager = manager
-    
-    print("\n--- 🌐 Iniciando servidor de Webhooks en http://0.0.0.0:5000/webhook ---")
+    pipeline = create_pipeline(manager)
+    pipeline.start()
+
+    print(f"\n--- 🌐 Iniciando servidor de Webhooks en http://{host}:{port}/webhook ---")
     print("El bot ahora está listo para recibir alertas de TradingView.")
-    # 'host="0.0.0.0"' hace que el servidor sea accesible desde fuera de tu máquina.
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    try:
+        asyncio.run(serve(create_app(pipeline), host, port))
+    finally:
+        pipeline.stop()
@@ -0,0 +1,32 @@
+from src.bot.account_snapshot import AccountSnapshot
+from src.bot.adapters.cached_adapter import CachedExchangeAdapter
+from src.bot.adapters.mock_adapter import MockExchangeAdapter
+from src.bot.event_engine import CANDLE, EventEngine, MarketEvent
+from src.bot.strategy_manager import StrategyManager
+
+
+def test_instantanea_caduca_por_antiguedad(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('src.bot.account_snapshot.time.monotonic', lambda: now[0])
+    calls = []
+    snapshot = AccountSnapshot(lambda: calls.append(1) or {'BTC': {'free': len(calls), 'locked': 0.0}},
+                               max_age_seconds=30)
+    assert snapshot.get()['BTC']['free'] == 1
+    now[0] += 10
+    assert snapshot.get()['BTC']['free'] == 1
+    now[0] += 25
+    assert snapshot.get()['BTC']['free'] == 2
+
+
+def test_modo_eventos_invalida_el_balance_en_cada_vela():
+    manager = StrategyManager.__new__(StrategyManager)
+    manager.exchange_adapter = CachedExchangeAdapter(MockExchangeAdapter())
+    manager.strategies, manager._subscriptions = [], {}
+    engine = EventEngine()
+    manager.attach_to_engine(engine)
+
+    manager.exchange_adapter.get_account_balance()
+    manager.exchange_adapter.get_account_balance()
+    engine.publish(MarketEvent(CANDLE, 'BTCUSDT', candle={}))
+    manager.exchange_adapter.get_account_balance()
+    assert manager.exchange_adapter.balance_snapshot.stats['fetches'] == 2
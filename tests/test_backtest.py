@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bot.backtest import run_backtest, simular_dca_rapido, simular_grid_rapido
+
+SYMBOL = 'BTCUSDT'
+
+
+@pytest.fixture(scope='module')
+def velas():
+    rng = np.random.default_rng(1)
+    n = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    open_time = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    return pd.DataFrame({
+        'open_time': open_time, 'close_time': open_time + 3_599_999,
+        'open': open_, 'high': np.maximum(open_, close) * 1.003, 'low': np.minimum(open_, close) * 0.997,
+        'close': close, 'volume': 1.0,
+    })
+
+
+def _completo(velas, strategy_type, parameters):
+    config = {'name': 'test', 'type': strategy_type, 'symbol': SYMBOL, 'parameters': parameters}
+    return run_backtest([config], {SYMBOL: velas}, initial_balances={'USDT': 100_000.0})
+
+
+def _assert_iguales(full, fast):
+    assert (full['buys'], full['sells']) == (fast['buys'], fast['sells'])
+    assert full['pnl'] == pytest.approx(fast['pnl'], abs=1e-6)
+    assert full['fees'] == pytest.approx(fast['fees'], abs=1e-6)
+
+
+@pytest.mark.parametrize('amount, hours, take_profit, stop_loss', [
+    (75, 5, None, None),
+    (50, 24, 110, None),
+    (0.3, 3, None, 80),
+    (75.075, 4, None, None),
+])
+def test_dca_rapido_coincide_con_backtest_completo(velas, amount, hours, take_profit, stop_loss):
+    full = _completo(velas, 'dca', {'purchase_amount_usd': amount, 'interval_hours': hours,
+                                    'take_profit': take_profit, 'stop_loss': stop_loss})
+    fast = simular_dca_rapido(velas['close_time'].to_numpy() / 1000, velas['close'].to_numpy(),
+                              amount, hours, take_profit, stop_loss)
+    _assert_iguales(full, fast)
+
+
+def test_dca_rapido_no_pierde_compras_con_capital_exacto(velas):
+    times, close = velas['close_time'].to_numpy() / 1000, velas['close'].to_numpy()
+    # 75.075 * 1.001 * 120 // (75.075 * 1.001) da 119 en coma flotante.
+    libre = simular_dca_rapido(times, close, 75.075, 4)
+    exacto = simular_dca_rapido(times, close, 75.075, 4, initial_capital=libre['initial_capital'])
+    assert exacto['buys'] == libre['buys'] == 120
+
+
+@pytest.mark.parametrize('lower, upper, levels', [(90, 110, 6), (95, 105, 11)])
+def test_grid_rapido_coincide_con_backtest_completo(velas, lower, upper, levels):
+    full = _completo(velas, 'grid', {'lower_price': lower, 'upper_price': upper,
+                                     'grid_levels': levels, 'investment_per_level_usd': 20})
+    fast = simular_grid_rapido(velas['open'].to_numpy(), velas['high'].to_numpy(), velas['low'].to_numpy(),
+                               velas['close'].to_numpy(), lower, upper, levels, 20)
+    _assert_iguales(full, fast)
+
+
+def test_ordenes_ejecutadas_por_cursor_y_por_instante(velas):
+    from src.bot.adapters.backtest_adapter import BacktestExchangeAdapter
+
+    adapter = BacktestExchangeAdapter({SYMBOL: velas}, initial_balances={'USDT': 100_000.0})
+    low = float(velas['low'].min())
+    # Una compra que nunca se ejecuta (id más antiguo) y compras que se van ejecutando.
+    adapter.create_order(SYMBOL, 'LIMIT', 'BUY', 0.01, price=low * 0.5)
+    seen, last_time = set(), None
+    while adapter.advance():
+        close = adapter.get_price(SYMBOL)
+        adapter.create_order(SYMBOL, 'LIMIT', 'BUY', 0.01, price=close * 0.999)
+        recent = adapter.get_executed_orders(SYMBOL, from_order_id=1, updated_since=last_time)
+        assert [o['orderId'] for o in recent] == sorted(o['orderId'] for o in recent)
+        seen.update(o['orderId'] for o in recent)
+        if recent:
+            last_time = max(o['updateTime'] for o in recent)
+
+    todas = adapter.get_executed_orders(SYMBOL, from_order_id=1)
+    assert len(todas) > 100
+    assert seen == {o['orderId'] for o in todas}
+    assert [o['orderId'] for o in adapter.get_executed_orders(SYMBOL, from_order_id=300)] == \
+        [o['orderId'] for o in todas if o['orderId'] >= 300]
@@ -0,0 +1,36 @@
+from src.bot.adapters.binance_adapter import BINANCE_ALL_ORDERS_LIMIT, BinanceAdapter
+
+
+class _ClienteOrdenes:
+    """GET /api/v3/allOrders: órdenes con id >= orderId, como mucho `limit` por página."""
+
+    def __init__(self, total):
+        self.orders = [{"orderId": i, "status": "FILLED" if i % 2 else "NEW"} for i in range(1, total + 1)]
+        self.requests = []
+
+    def get_all_orders(self, symbol, orderId=None, limit=500):
+        self.requests.append(orderId)
+        if orderId is None:
+            return self.orders[-limit:]
+        return [o for o in self.orders if o["orderId"] >= orderId][:limit]
+
+
+def _adapter(client):
+    adapter = BinanceAdapter.__new__(BinanceAdapter)
+    adapter.client = client
+    return adapter
+
+
+def test_ordenes_ejecutadas_se_paginan_desde_el_cursor():
+    client = _ClienteOrdenes(2 * BINANCE_ALL_ORDERS_LIMIT + 300)
+    executed = _adapter(client).get_executed_orders("BTCUSDT", from_order_id=5)
+
+    assert [o["orderId"] for o in executed] == list(range(5, 2 * BINANCE_ALL_ORDERS_LIMIT + 301, 2))
+    assert client.requests == [5, 5 + BINANCE_ALL_ORDERS_LIMIT, 5 + 2 * BINANCE_ALL_ORDERS_LIMIT]
+
+
+def test_ordenes_ejecutadas_sin_cursor_una_sola_pagina():
+    client = _ClienteOrdenes(1500)
+    executed = _adapter(client).get_executed_orders("BTCUSDT")
+    assert len(executed) == BINANCE_ALL_ORDERS_LIMIT // 2
+    assert client.requests == [None]
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bot.correlation_engine import RollingCorrelation
+from src.bot.kline_store import KlineStore
+
+HOUR_MS = 3_600_000
+START = 1_700_000_000_000
+
+
+def _guardar(store, symbol, closes, first=0):
+    store.append(symbol, "1h", [
+        {"open_time": START + i * HOUR_MS, "open": c, "high": c, "low": c, "close": c,
+         "volume": 1.0, "close_time": START + (i + 1) * HOUR_MS - 1}
+        for i, c in enumerate(closes) if i >= first
+    ])
+
+
+def test_simbolo_con_retraso_no_pierde_velas(tmp_path):
+    rng = np.random.default_rng(0)
+    a = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))
+    b = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))
+    store = KlineStore(str(tmp_path))
+    _guardar(store, "AUSDT", a)
+    _guardar(store, "BUSDT", b[:59]) # B va una vela por detrás
+
+    engine = RollingCorrelation(window=100)
+    assert engine.sync_from_store(store, ["AUSDT", "BUSDT"], "1h") == 59
+    _guardar(store, "BUSDT", b, first=59)
+    assert engine.sync_from_store(store, ["AUSDT", "BUSDT"], "1h") == 1
+
+    corr = engine.matrix(min_periods=2)
+    expected = pd.DataFrame({"AUSDT": np.diff(np.log(a)), "BUSDT": np.diff(np.log(b))}).corr()
+    assert corr.loc["AUSDT", "BUSDT"] == pytest.approx(expected.loc["AUSDT", "BUSDT"])
+    assert engine._n[0, 0] == engine._n[1, 1] == 59
+
+
+def test_sincronizaciones_concurrentes_no_duplican_velas(tmp_path):
+    rng = np.random.default_rng(1)
+    store = KlineStore(str(tmp_path))
+    for symbol in ("AUSDT", "BUSDT"):
+        _guardar(store, symbol, 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 50))))
+
+    class _StoreLento:
+        """Alarga la lectura para que las dos sesiones se solapen."""
+
+        def load(self, symbol, interval):
+            time.sleep(0.05)
+            return store.load(symbol, interval)
+
+    engine = RollingCorrelation(window=100)
+    barrier = threading.Barrier(2)
+    added = []
+
+    def sync():
+        barrier.wait()
+        added.append(engine.sync_from_store(_StoreLento(), ["AUSDT", "BUSDT"], "1h"))
+
+    threads = [threading.Thread(target=sync) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert sorted(added) == [0, 50]
+    assert engine._n[0, 0] == 49
+    assert engine._filled == 50
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.bot.data_fetcher import fetch_klines_concurrently, get_top_cryptos
+from src.bot.fetch_scheduler import FetchScheduler, TokenBucket
+
+TOTAL_COINS = 1000
+
+
+class _CoinGeckoStub(BaseHTTPRequestHandler):
+    """/coins/markets paginado; la primera petición de la página 2 responde 429 y las páginas de `broken`, 500."""
+
+    throttled = set()
+    broken = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/coins/markets":
+            self.send_response(404)
+            self.end_headers()
+            return
+        query = parse_qs(url.query)
+        page, per_page = int(query["page"][0]), int(query["per_page"][0])
+        with self.lock:
+            throttle = page == 2 and page not in self.throttled
+            self.throttled.add(page)
+        if page in self.broken:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "0.2")
+            self.end_headers()
+            return
+        first = (page - 1) * per_page
+        coins = [{"id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}"}
+                 for i in range(first, min(first + per_page, TOTAL_COINS))]
+        body = json.dumps(coins).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def coingecko_url():
+    _CoinGeckoStub.throttled = set()
+    _CoinGeckoStub.broken = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CoinGeckoStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_top_cryptos_en_paralelo_contra_el_stub(coingecko_url):
+    scheduler = FetchScheduler(max_workers=4, buckets={"coingecko": TokenBucket(capacity=100, refill_per_second=100)})
+    try:
+        coins = get_top_cryptos(limit=TOTAL_COINS, base_url=coingecko_url, scheduler=scheduler)
+    finally:
+        scheduler.shutdown()
+
+    assert [c["id"] for c in coins] == [f"coin-{i}" for i in range(TOTAL_COINS)]
+    stats = scheduler.stats()
+    assert stats["succeeded"] == 4
+    assert stats["throttle_events"] == 1
+
+
+def test_una_pagina_caida_no_devuelve_un_top_incompleto(coingecko_url):
+    _CoinGeckoStub.throttled = {2}  # sin 429: con un solo intento solo debe fallar la página 3
+    _CoinGeckoStub.broken = {3}
+    scheduler = FetchScheduler(max_workers=4, max_attempts=1,
+                               buckets={"coingecko": TokenBucket(capacity=100, refill_per_second=100)})
+    try:
+        coins = get_top_cryptos(limit=TOTAL_COINS, base_url=coingecko_url, scheduler=scheduler)
+    finally:
+        scheduler.shutdown()
+
+    assert coins == []
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_top_cryptos_en_serie_coincide(coingecko_url):
+    _CoinGeckoStub.throttled = {2}  # sin 429: la ruta en serie no reintenta
+    assert len(get_top_cryptos(limit=300, base_url=coingecko_url)) == 300
+
+
+def test_velas_de_varios_simbolos_en_paralelo():
+    class _Exchange:
+        def get_klines(self, symbol, interval='1d', limit=300):
+            if symbol == "BADUSDT":
+                raise ValueError("símbolo inválido")
+            return [{"symbol": symbol, "interval": interval, "limit": limit}]
+
+    klines = fetch_klines_concurrently(_Exchange(), ["BTCUSDT", "BADUSDT", "ETHUSDT"], interval='1h', limit=5)
+    assert klines["BTCUSDT"] == [{"symbol": "BTCUSDT", "interval": "1h", "limit": 5}]
+    assert klines["BADUSDT"] == []
+    assert list(klines) == ["BTCUSDT", "BADUSDT", "ETHUSDT"]
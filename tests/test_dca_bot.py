@@ -0,0 +1,43 @@
+import logging
+
+from src.strategies.dca_bot import DCABotStrategy
+
+
+class _Exchange:
+    def __init__(self):
+        self.balance_calls = 0
+        self.orders = []
+
+    def get_account_balance(self):
+        self.balance_calls += 1
+        return {'BTC': {'free': 0.5, 'locked': 0.0}}
+
+    def create_order(self, **order):
+        self.orders.append(order)
+        return {'status': 'FILLED'}
+
+
+def _estrategia(exchange):
+    config = {'name': 'dca', 'type': 'dca', 'symbol': 'BTCUSDT',
+              'parameters': {'take_profit': 110, 'stop_loss': 90}}
+    strategy = DCABotStrategy(config, exchange, logging.getLogger('test'))
+    strategy.start()
+    return strategy
+
+
+def test_ticks_entre_umbrales_no_consultan_el_balance():
+    exchange = _Exchange()
+    strategy = _estrategia(exchange)
+    for price in (95, 100, 105, 109.9):
+        strategy.on_price(price)
+    assert exchange.balance_calls == 0
+    assert exchange.orders == []
+
+
+def test_take_profit_vende_el_balance_libre():
+    exchange = _Exchange()
+    strategy = _estrategia(exchange)
+    strategy.on_price(111)
+    assert exchange.balance_calls == 1
+    assert exchange.orders == [{'symbol': 'BTCUSDT', 'order_type': 'MARKET', 'side': 'SELL', 'quantity': 0.5}]
+    assert not strategy.is_running
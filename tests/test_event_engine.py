@@ -0,0 +1,128 @@
+import time
+
+import yaml
+
+from src.bot.event_engine import CANDLE, PRICE, EventEngine, MarketEvent, ReplayEventSource
+from src.bot.strategy_manager import StrategyManager
+from src.strategies.base_strategy import BaseStrategy
+
+HOUR_MS = 3_600_000
+
+
+def _velas(first_close, n, start=1_700_000_000_000):
+    return [{"open_time": start + i * HOUR_MS, "open": first_close + i, "high": first_close + i,
+             "low": first_close + i, "close": first_close + i, "volume": 1.0,
+             "close_time": start + (i + 1) * HOUR_MS - 1} for i in range(n)]
+
+
+class _EstrategiaGrabadora(BaseStrategy):
+    """Anota cada callback que recibe del motor."""
+
+    def __init__(self, symbol, logger):
+        super().__init__({'symbol': symbol}, None, logger)
+        self.calls = []
+
+    def run(self):
+        self.calls.append(("run",))
+
+    def on_price(self, price):
+        self.calls.append(("price", price))
+
+    def on_candle(self, candle):
+        self.calls.append(("candle", candle["close"]))
+        super().on_candle(candle)
+
+
+def _gestor(tmp_path, symbols):
+    path = str(tmp_path / 'strategies.yaml')
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump({'exchange': 'mock', 'strategies': []}, f)
+    manager = StrategyManager(path, api_key=None, api_secret=None)
+    strategies = {}
+    for symbol in symbols:
+        strategy = strategies[symbol] = _EstrategiaGrabadora(symbol, manager.logger)
+        strategy.start()
+        manager.strategies.append(strategy)
+    return manager, strategies
+
+
+def _esperar(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_replay_entrega_a_cada_estrategia_solo_su_simbolo_en_orden(tmp_path):
+    manager, strategies = _gestor(tmp_path, ["BTCUSDT", "ETHUSDT"])
+    engine = EventEngine()
+    manager.attach_to_engine(engine)
+    btc = ReplayEventSource.from_klines("BTCUSDT", _velas(100.0, 3))._events
+    eth = ReplayEventSource.from_klines("ETHUSDT", _velas(10.0, 2))._events
+    # Velas grabadas de dos símbolos intercaladas.
+    source = ReplayEventSource([btc[0], btc[1], eth[0], eth[1], btc[2], btc[3], eth[2], eth[3], btc[4], btc[5]])
+
+    engine.run_source(source, background=False)
+
+    assert strategies["BTCUSDT"].calls == [
+        ("price", 100.0), ("candle", 100.0), ("run",),
+        ("price", 101.0), ("candle", 101.0), ("run",),
+        ("price", 102.0), ("candle", 102.0), ("run",),
+    ]
+    assert strategies["ETHUSDT"].calls == [
+        ("price", 10.0), ("candle", 10.0), ("run",),
+        ("price", 11.0), ("candle", 11.0), ("run",),
+    ]
+    assert engine.stats["errors"] == 0
+
+
+def test_estrategia_detenida_no_recibe_velas(tmp_path):
+    manager, strategies = _gestor(tmp_path, ["BTCUSDT"])
+    engine = EventEngine()
+    manager.attach_to_engine(engine)
+    strategies["BTCUSDT"].stop()
+
+    engine.run_source(ReplayEventSource.from_klines("BTCUSDT", _velas(100.0, 2)), background=False)
+
+    assert ("run",) not in strategies["BTCUSDT"].calls
+
+
+def test_precios_encolados_se_conflacionan_y_las_velas_no():
+    engine = EventEngine()
+    received = []
+    engine.subscribe("BTCUSDT", lambda e: received.append((PRICE, e.price)), PRICE)
+    engine.subscribe("BTCUSDT", lambda e: received.append((CANDLE, e.candle["close"])), CANDLE)
+
+    # Con el despachador parado, llegan 100 precios y 3 velas.
+    for i in range(100):
+        engine.post(MarketEvent(PRICE, "BTCUSDT", price=float(i)))
+    for kline in _velas(500.0, 3):
+        engine.post(MarketEvent(CANDLE, "BTCUSDT", price=kline["close"], candle=kline))
+    engine.start()
+    try:
+        assert _esperar(lambda: len(received) == 4)
+    finally:
+        engine.stop()
+
+    # Un solo precio (el último) y todas las velas, en el orden en que se encolaron.
+    assert received == [(PRICE, 99.0), (CANDLE, 500.0), (CANDLE, 501.0), (CANDLE, 502.0)]
+    assert engine.stats["conflated"] == 99
+
+
+def test_replay_en_segundo_plano_entrega_todas_las_velas(tmp_path):
+    manager, strategies = _gestor(tmp_path, ["BTCUSDT"])
+    engine = EventEngine()
+    manager.attach_to_engine(engine)
+    thread = engine.run_source(ReplayEventSource.from_klines("BTCUSDT", _velas(100.0, 50)))
+    try:
+        thread.join(5)
+        assert _esperar(lambda: strategies["BTCUSDT"].calls.count(("run",)) == 50)
+    finally:
+        engine.stop()
+
+    candles = [c[1] for c in strategies["BTCUSDT"].calls if c[0] == "candle"]
+    assert candles == [100.0 + i for i in range(50)]
+    prices = [c[1] for c in strategies["BTCUSDT"].calls if c[0] == "price"]
+    assert prices == sorted(prices) and prices[-1] == 149.0
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.bot.fetch_scheduler import BINANCE_KLINES_WEIGHT, FetchScheduler, TokenBucket, klines_weight
+
+RETRY_AFTER = 0.5
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """La primera petición de cada ruta responde 429 con Retry-After; las siguientes, 200."""
+
+    seen = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            first = self.path not in self.seen
+            self.seen.add(self.path)
+        if first:
+            self.send_response(429)
+            self.send_header("Retry-After", str(RETRY_AFTER))
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    _StubHandler.seen = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.mark.parametrize("with_bucket", [True, False])
+def test_un_429_cuenta_y_espera_una_sola_vez(stub_url, with_bucket):
+    buckets = {"api": TokenBucket(capacity=1000, refill_per_second=1000)} if with_bucket else {}
+    scheduler = FetchScheduler(max_workers=2, buckets=buckets)
+    try:
+        start = time.monotonic()
+        result = scheduler.submit(_get, f"{stub_url}/a", bucket="api" if with_bucket else None).result()
+        elapsed = time.monotonic() - start
+    finally:
+        scheduler.shutdown()
+
+    assert result == {"path": "/a"}
+    stats = scheduler.stats()
+    assert stats["throttle_events"] == 1
+    assert stats["retries"] == 1
+    assert RETRY_AFTER <= elapsed < 2 * RETRY_AFTER
+
+
+def test_map_descarga_en_paralelo_contra_el_stub(stub_url):
+    scheduler = FetchScheduler(max_workers=8, buckets={})
+    try:
+        results = scheduler.map(_get, [f"{stub_url}/p{i}" for i in range(20)])
+    finally:
+        scheduler.shutdown()
+    assert [r["path"] for r in results] == [f"/p{i}" for i in range(20)]
+    assert scheduler.stats()["succeeded"] == 20
+
+
+def test_los_schedulers_por_defecto_comparten_las_cubetas():
+    a, b = FetchScheduler(max_workers=1), FetchScheduler(max_workers=1)
+    try:
+        assert a.buckets["binance"] is b.buckets["binance"]
+        assert a.buckets["coingecko"] is b.buckets["coingecko"]
+    finally:
+        a.shutdown()
+        b.shutdown()
+
+
+def test_el_peso_de_las_velas_cuenta_cada_pagina_de_1000():
+    assert klines_weight("1d", 300) == BINANCE_KLINES_WEIGHT
+    assert klines_weight("1h", 30) == BINANCE_KLINES_WEIGHT  # 720 velas
+    assert klines_weight("1m", 30) == BINANCE_KLINES_WEIGHT * 44  # 43200 velas
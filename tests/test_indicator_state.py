@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bot.indicator_state import IndicatorStateStore, comparar_con_recalculo
+
+
+def _paseo(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def test_paso_a_paso_coincide_con_el_recalculo_en_un_paseo_aleatorio():
+    max_diff = comparar_con_recalculo(_paseo(400))
+    assert max(max_diff.values()) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_tramo_plano_coincide_con_el_recalculo():
+    # Paseo, meseta larga sin variaciones y otro paseo.
+    closes = np.concatenate([_paseo(220, seed=1), np.full(60, 150.0), _paseo(80, seed=2)])
+    max_diff = comparar_con_recalculo(closes)
+    assert max(max_diff.values()) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_estado_guardado_continua_igual_que_sin_interrupcion(tmp_path):
+    closes = _paseo(300, seed=3)
+    df = pd.DataFrame({"open_time": np.arange(len(closes)), "close": closes})
+    path = str(tmp_path / "state.json")
+
+    store = IndicatorStateStore(path)
+    store.update_from_klines("BTCUSDT", df.iloc[:250])
+    store.save()
+    resumed = IndicatorStateStore(path)
+    # Reenviar la ventana completa solo procesa las velas nuevas.
+    result = resumed.update_from_klines("BTCUSDT", df)
+
+    expected = IndicatorStateStore(str(tmp_path / "otro.json")).update_from_klines("BTCUSDT", df)
+    assert result == expected
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from src.bot.adapters.binance_adapter import BinanceAdapter
+from src.bot.kline_store import KlineStore
+
+HOUR_MS = 3_600_000
+
+
+def _vela(open_time):
+    return {"open_time": open_time, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+            "volume": 1.0, "close_time": open_time + HOUR_MS - 1}
+
+
+def test_appends_concurrentes_no_pierden_velas(tmp_path):
+    store = KlineStore(str(tmp_path))
+    hilos = [
+        threading.Thread(target=store.append, args=("BTCUSDT", "1h", [_vela(i * HOUR_MS) for i in range(k, 400, 8)]))
+        for k in range(8)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(store.load("BTCUSDT", "1h")) == 400
+
+
+class _ClienteFalso:
+    """Exchange con velas de 1h solo desde `listed_at` (símbolo listado hace poco)."""
+
+    def __init__(self, listed_at):
+        self.listed_at = listed_at
+        self.requests = []
+
+    def get_historical_klines(self, symbol, interval, start):
+        self.requests.append(start)
+        now = int(time.time() * 1000)
+        first = max(start, self.listed_at)
+        first += -first % HOUR_MS
+        return [[t, "1", "1", "1", "1", "1", t + HOUR_MS - 1] for t in range(first, now, HOUR_MS)]
+
+
+def test_simbolo_listado_tras_el_inicio_de_la_ventana_no_se_redescarga(tmp_path):
+    adapter = BinanceAdapter.__new__(BinanceAdapter)
+    adapter.kline_store = KlineStore(str(tmp_path))
+    listed_at = int(time.time() * 1000) - 10 * 86_400_000
+    adapter.client = _ClienteFalso(listed_at)
+
+    first = adapter.get_klines("NEWUSDT", "1h", limit=30)
+    second = adapter.get_klines("NEWUSDT", "1h", limit=30)
+
+    assert len(first) == len(second)
+    start_ms, incremental_from = adapter.client.requests
+    assert incremental_from > start_ms + 9 * 86_400_000 # La segunda solo pide velas nuevas.
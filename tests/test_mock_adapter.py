@@ -0,0 +1,86 @@
+import pytest
+
+from src.bot.adapters.mock_adapter import MockExchangeAdapter
+
+
+def _mock(**kwargs):
+    kwargs.setdefault("volatility", 0)
+    kwargs.setdefault("initial_balances", {"USDT": 10000.0, "BTC": 1.0})
+    kwargs.setdefault("initial_prices", {"BTCUSDT": 52000.0})
+    return MockExchangeAdapter(**kwargs)
+
+
+def _saldo(adapter, asset):
+    return adapter.get_account_balance().get(asset, {"free": 0.0, "locked": 0.0})
+
+
+def test_limit_en_reposo_se_ejecuta_al_cruzar_el_precio():
+    adapter = _mock()
+    order = adapter.create_order("BTCUSDT", "LIMIT", "SELL", 0.5, price=53000)
+    assert order["status"] == "NEW"
+    assert _saldo(adapter, "BTC") == {"free": 0.5, "locked": 0.5}
+    assert adapter.get_order_book("BTCUSDT")["asks"] == [[53000.0, 0.5]]
+
+    adapter.set_price("BTCUSDT", 52900)  # No llega al precio límite
+    assert adapter.get_open_orders("BTCUSDT")[0]["status"] == "NEW"
+
+    adapter.set_price("BTCUSDT", 53500)  # Cruza: se ejecuta al precio límite, no al de mercado
+    assert adapter.get_open_orders() == []
+    [executed] = adapter.get_executed_orders("BTCUSDT")
+    assert executed["orderId"] == order["orderId"]
+    assert executed["status"] == "FILLED"
+    assert executed["cummulativeQuoteQty"] == pytest.approx(26500.0)
+    assert _saldo(adapter, "BTC") == {"free": 0.5, "locked": 0.0}
+    assert _saldo(adapter, "USDT")["free"] == pytest.approx(36500.0)
+
+
+def test_ejecucion_parcial_con_liquidez_limitada():
+    adapter = _mock(liquidity_usd=1000)
+    first = adapter.create_order("BTCUSDT", "LIMIT", "BUY", 0.1, price=50000)
+    second = adapter.create_order("BTCUSDT", "LIMIT", "BUY", 0.1, price=50000)
+    assert _saldo(adapter, "USDT") == {"free": 0.0, "locked": 10000.0}
+
+    adapter.set_price("BTCUSDT", 49000)
+    open_orders = {o["orderId"]: o for o in adapter.get_open_orders("BTCUSDT")}
+    # Prioridad precio-tiempo: solo la primera recibe los 1000 USDT de liquidez.
+    assert open_orders[first["orderId"]]["status"] == "PARTIALLY_FILLED"
+    assert open_orders[first["orderId"]]["executedQty"] == pytest.approx(0.02)
+    assert open_orders[second["orderId"]]["executedQty"] == 0.0
+    assert _saldo(adapter, "USDT")["locked"] == pytest.approx(9000.0)
+    assert _saldo(adapter, "BTC")["free"] == pytest.approx(1.02)
+
+    for _ in range(4):
+        adapter.set_price("BTCUSDT", 49000)
+    assert [o["orderId"] for o in adapter.get_executed_orders("BTCUSDT")] == [first["orderId"]]
+    assert adapter.get_open_orders("BTCUSDT")[0]["orderId"] == second["orderId"]
+    assert adapter.stats["partial_fills"] == 4
+
+
+def test_cancelar_libera_el_saldo_reservado():
+    adapter = _mock(liquidity_usd=1000)
+    order = adapter.create_order("BTCUSDT", "LIMIT", "BUY", 0.1, price=50000)
+    adapter.set_price("BTCUSDT", 49000)  # Ejecuta 0.02 de los 0.1
+
+    canceled = adapter.cancel_order("BTCUSDT", order["orderId"])
+    assert canceled["status"] == "CANCELED"
+    assert adapter.get_open_orders() == []
+    assert adapter.get_order_book("BTCUSDT") == {"bids": [], "asks": []}
+    # Solo vuelve a estar libre lo que no se ejecutó.
+    assert _saldo(adapter, "USDT") == {"free": pytest.approx(9000.0), "locked": 0.0}
+    assert adapter.get_executed_orders("BTCUSDT") == []
+
+    adapter.set_price("BTCUSDT", 40000)  # Una orden cancelada ya no se ejecuta
+    assert _saldo(adapter, "BTC")["free"] == pytest.approx(1.02)
+    with pytest.raises(Exception):
+        adapter.cancel_order("BTCUSDT", order["orderId"])
+
+
+def test_la_misma_semilla_reproduce_la_sesion():
+    def _sesion(seed):
+        adapter = MockExchangeAdapter(seed=seed)
+        prices = [adapter.get_price("BTCUSDT") for _ in range(20)] + [adapter.get_all_prices()]
+        closes = [k["close"] for k in adapter.get_klines("ETHUSDT", interval="1h", limit=2)]
+        return prices, closes
+
+    assert _sesion(7) == _sesion(7)
+    assert _sesion(7) != _sesion(8)
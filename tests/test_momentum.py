@@ -0,0 +1,26 @@
+import numpy as np
+
+from src.strategies.momentum import PriceAlertScanner
+
+
+def _tickers(changes):
+    return [{"symbol": f"C{i}USDT", "priceChangePercent": str(c), "lastPrice": "1.0", "quoteVolume": "1000"}
+            for i, c in enumerate(changes)]
+
+
+def test_zscore_se_mide_contra_todo_el_mercado():
+    rng = np.random.default_rng(0)
+    changes = list(rng.normal(0, 3, 500)) # mercado con movimientos habituales de ±3%
+    changes[:10] = [0.1, -0.1, 0.2, -0.2, 0.05, -0.05, 0.15, -0.15, 0.0, 1.8] # monedas vigiladas, tranquilas
+    vigiladas = [f"C{i}USDT" for i in range(10)]
+
+    scanner = PriceAlertScanner(clock=lambda: 0.0)
+    assert scanner.scan_tickers(_tickers(changes), vigiladas) == []
+
+
+def test_cambio_grande_en_moneda_vigilada_alerta():
+    changes = [0.5, -0.5] * 50
+    changes[3] = 7.0
+    scanner = PriceAlertScanner(clock=lambda: 0.0)
+    alerts = scanner.scan_tickers(_tickers(changes), ["C3USDT", "C4USDT"])
+    assert [a["symbol"] for a in alerts] == ["C3USDT"]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from src.bot.backtest import run_backtest
+from src.bot.optimizer import optimizar
+
+SYMBOL = 'BTCUSDT'
+
+
+def _velas(n=1000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    open_time = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    return pd.DataFrame({
+        'open_time': open_time, 'close_time': open_time + 3_599_999,
+        'open': open_, 'high': np.maximum(open_, close) * 1.003, 'low': np.minimum(open_, close) * 0.997,
+        'close': close, 'volume': 1.0,
+    })
+
+
+def test_resultados_dca_coinciden_con_backtest_completo():
+    velas = _velas()
+    param_grid = {'purchase_amount_usd': [10, 75.075], 'interval_hours': [4, 24],
+                  'take_profit': [None, 110], 'stop_loss': [None, 90]}
+    resultados = optimizar('dca', velas, param_grid, max_workers=1, rungs=(1.0,))
+    assert len(resultados) == 16
+
+    for _, row in resultados.iterrows():
+        parameters = {key: None if pd.isna(row[key]) else row[key] for key in param_grid}
+        config = {'name': 'test', 'type': 'dca', 'symbol': SYMBOL, 'parameters': parameters}
+        full = run_backtest([config], {SYMBOL: velas}, initial_balances={'USDT': 1_000_000.0})
+        assert full['buys'] == row['buys'], parameters
+        assert abs(full['pnl'] - row['pnl']) < 1e-6, parameters
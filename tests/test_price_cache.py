@@ -0,0 +1,89 @@
+import threading
+import time
+
+from src.bot.adapters.cached_adapter import CachedExchangeAdapter
+from src.bot.adapters.mock_adapter import MockExchangeAdapter
+from src.bot.price_cache import PriceCache
+
+
+def test_precio_se_sirve_desde_cache_hasta_que_vence_el_ttl():
+    calls = []
+
+    def fetch_one(symbol):
+        calls.append(symbol)
+        return float(len(calls))
+
+    cache = PriceCache(fetch_one, ttl_seconds=0.1)
+    assert cache.get("btcusdt") == 1.0
+    assert cache.get("BTCUSDT") == 1.0
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    time.sleep(0.15)
+    assert cache.get("BTCUSDT") == 2.0
+    assert calls == ["BTCUSDT", "BTCUSDT"]
+
+
+def test_peticiones_simultaneas_comparten_una_consulta():
+    release = threading.Event()
+    calls = []
+
+    def fetch_one(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        return 100.0
+
+    cache = PriceCache(fetch_one)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("ETHUSDT"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats["misses"] + cache.stats["deduplicated"] < 8:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [100.0] * 8
+    assert len(calls) == 1
+    assert cache.stats["deduplicated"] == 7
+
+
+def test_error_de_la_consulta_llega_a_todos_y_no_se_cachea():
+    def fetch_one(symbol):
+        raise ConnectionError("sin red")
+
+    cache = PriceCache(fetch_one)
+    for _ in range(2):
+        try:
+            cache.get("BTCUSDT")
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("debía propagar el error")
+    assert cache.stats["misses"] == 2
+
+
+def test_refresh_all_carga_todo_en_una_llamada():
+    cache = PriceCache(lambda symbol: 0.0, lambda: {"btcusdt": 1.0, "ETHUSDT": 2.0})
+    assert cache.refresh_all() == 2
+    assert cache.get("BTCUSDT") == 1.0 and cache.get("ETHUSDT") == 2.0
+    assert cache.stats["bulk_refreshes"] == 1 and cache.stats["misses"] == 0
+
+
+def test_refresh_all_sin_ticker_masivo():
+    def fetch_all():
+        raise NotImplementedError
+
+    cache = PriceCache(lambda symbol: 5.0, fetch_all)
+    assert cache.refresh_all() == 0
+    assert cache.fetch_all is None
+    assert cache.get("BTCUSDT") == 5.0
+
+
+def test_precios_simulados_se_mueven_entre_ciclos_tras_la_cache():
+    adapter = CachedExchangeAdapter(MockExchangeAdapter(seed=7))
+    prices = []
+    for _ in range(4):
+        adapter.begin_cycle()
+        prices.append(adapter.get_price("BTCUSDT"))
+        assert adapter.get_price("BTCUSDT") == prices[-1]  # Dentro del ciclo, el mismo precio.
+    assert len(set(prices)) == 4
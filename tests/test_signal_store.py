@@ -0,0 +1,75 @@
+import os
+from datetime import date, datetime
+
+from src.bot.signal_store import COMPACTED_MANIFEST, SignalStore
+
+
+def _lote(store, n, hour):
+    store.append([{"Symbol": f"S{i % 3}", "Price": float(i)} for i in range(n)], timestamp=datetime(2024, 5, 1, hour))
+    store.flush()
+
+
+def _archivos(tmp_path):
+    return sorted(f for f in os.listdir(tmp_path / "date=2024-05-01") if f.endswith(".parquet"))
+
+
+def test_compactar_no_borra_los_originales_hasta_pasada_la_gracia(tmp_path):
+    store = SignalStore(str(tmp_path))
+    for hour in range(3):
+        _lote(store, 10, hour)
+    originales = _archivos(tmp_path)
+
+    assert store.compact() == 1
+    # Los originales siguen en disco para las lecturas en curso, pero no se leen dos veces.
+    assert set(originales) < set(_archivos(tmp_path))
+    assert len(store.read()) == 30
+    assert os.path.exists(tmp_path / "date=2024-05-01" / COMPACTED_MANIFEST)
+
+    # Sin archivos nuevos no hay nada que compactar; dentro de la gracia no se borra nada.
+    assert store.compact() == 0
+    assert len(_archivos(tmp_path)) == 4
+
+    assert store.compact(grace_seconds=0) == 0
+    assert len(_archivos(tmp_path)) == 1
+    assert not os.path.exists(tmp_path / "date=2024-05-01" / COMPACTED_MANIFEST)
+    assert len(store.read()) == 30
+
+
+def test_lectura_previa_a_la_compactacion_sigue_valida(tmp_path):
+    store = SignalStore(str(tmp_path))
+    for hour in range(2):
+        _lote(store, 5, hour)
+    # Un lector que listó los archivos antes de compactar aún puede abrirlos.
+    listados = [tmp_path / "date=2024-05-01" / f for f in _archivos(tmp_path)]
+    store.compact()
+    assert all(path.exists() for path in listados)
+
+    _lote(store, 5, 3)
+    assert store.compact() == 1
+    assert len(store.read()) == 15
+    assert sorted(store.read(symbols=["S1"])["Price"]) == [1.0, 1.0, 1.0, 4.0, 4.0, 4.0]
+
+
+def test_flush_compacta_al_llegar_al_umbral(tmp_path):
+    store = SignalStore(str(tmp_path), compact_after_parts=4)
+    for hour in range(3):
+        _lote(store, 3, hour)
+    assert len(_archivos(tmp_path)) == 3
+
+    _lote(store, 3, 3)
+    # Los 4 originales quedan en su periodo de gracia junto al compactado.
+    assert len(_archivos(tmp_path)) == 5
+    assert len(store._live_parts(str(tmp_path / "date=2024-05-01"))) == 1
+    assert len(store.read()) == 12
+
+
+def test_rango_de_fechas_incluye_todo_el_dia_final(tmp_path):
+    store = SignalStore(str(tmp_path))
+    store.append([{"Symbol": "BTC", "Price": 1.0}], timestamp=datetime(2024, 1, 5, 12))
+    store.append([{"Symbol": "BTC", "Price": 2.0}], timestamp=datetime(2024, 1, 6, 0))
+    store.flush()
+
+    assert list(store.read(end="2024-01-05")["Price"]) == [1.0]
+    assert list(store.read(end=date(2024, 1, 5))["Price"]) == [1.0]
+    assert list(store.read(start="2024-01-05", end="2024-01-06")["Price"]) == [1.0, 2.0]
+    assert store.read(end="2024-01-05 11:00").empty
@@ -0,0 +1,60 @@
+import os
+
+import yaml
+
+from src.bot.strategy_manager import StrategyManager
+
+
+def _escribir(path, config, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_recarga_aplica_el_ttl_de_la_cache_de_precios(tmp_path, caplog):
+    path = str(tmp_path / 'strategies.yaml')
+    config = {'exchange': 'mock', 'price_cache': {'enabled': True, 'ttl_seconds': 5}, 'strategies': []}
+    _escribir(path, config, 1_000_000)
+    manager = StrategyManager(path, api_key=None, api_secret=None)
+
+    config['price_cache'] = {'enabled': True, 'ttl_seconds': 2, 'balance_max_age_seconds': 10}
+    config['market_data'] = {'source': 'websocket'}
+    _escribir(path, config, 1_000_100)
+    assert manager.reload_if_changed()
+
+    assert manager.exchange_adapter.price_cache.ttl_seconds == 2
+    assert manager.exchange_adapter.balance_snapshot.max_age_seconds == 10
+    assert 'market_data' in caplog.text
+
+
+def _grid(lower, upper, **extra):
+    return {'type': 'grid', 'enabled': True, 'symbol': 'BTCUSDT', **extra,
+            'parameters': {'lower_price': lower, 'upper_price': upper, 'grid_levels': 5, 'investment_per_level_usd': 20}}
+
+
+def test_recarga_de_parrilla_cancela_sus_ordenes_anteriores(tmp_path):
+    path = str(tmp_path / 'strategies.yaml')
+    config = {'exchange': 'mock', 'strategies': [_grid(40000, 50000, name='grid')]}
+    _escribir(path, config, 1_000_000)
+    manager = StrategyManager(path, api_key=None, api_secret=None)
+    exchange = manager.exchange_adapter
+    viejas = {o['orderId'] for o in exchange.get_open_orders('BTCUSDT')}
+    assert viejas
+
+    config['strategies'] = [_grid(41000, 51000, name='grid')]
+    _escribir(path, config, 1_000_100)
+    assert manager.reload_if_changed()
+
+    abiertas = exchange.get_open_orders('BTCUSDT')
+    assert abiertas and not viejas & {o['orderId'] for o in abiertas}
+    assert {o['price'] for o in abiertas} <= set(manager.strategies[0].grid_lines)
+
+
+def test_estrategias_sin_nombre_en_el_mismo_simbolo_se_cargan_todas(tmp_path, caplog):
+    path = str(tmp_path / 'strategies.yaml')
+    _escribir(path, {'exchange': 'mock', 'strategies': [_grid(40000, 50000), _grid(30000, 39000)]}, 1_000_000)
+    manager = StrategyManager(path, api_key=None, api_secret=None)
+
+    assert len(manager.strategies) == 2
+    assert sorted(manager._strategies_by_key) == ['grid:BTCUSDT', 'grid:BTCUSDT#2']
+    assert "'name'" in caplog.text
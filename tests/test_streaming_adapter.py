@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+import time
+
+import websockets
+
+from src.bot.adapters.mock_adapter import MockExchangeAdapter
+from src.bot.adapters.streaming_adapter import StreamingExchangeAdapter
+from src.bot.kline_store import KlineStore
+
+MINUTE_MS = 60_000
+
+
+def _vela(open_time):
+    return {"open_time": open_time, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+            "volume": 1.0, "close_time": open_time + MINUTE_MS - 1}
+
+
+class _RestConCache(MockExchangeAdapter):
+    """Adaptador REST con KlineStore (como BinanceAdapter) que cuenta las consultas de velas."""
+
+    def __init__(self, store):
+        super().__init__()
+        self.kline_store = store
+        self.kline_requests = 0
+
+    def get_klines(self, symbol, interval='1d', limit=300):
+        self.kline_requests += 1
+        return []
+
+
+def test_velas_1m_combinan_disco_y_stream_sin_rest(tmp_path):
+    now = int(time.time() * 1000)
+    current = now - now % MINUTE_MS
+    store = KlineStore(str(tmp_path))
+    # En disco: los últimos 30 días hasta hace ~5 días; el stream tiene los últimos 10.000 minutos.
+    stored_until = current - 5 * 86_400_000
+    store.append("BTCUSDT", "1m", [_vela(t) for t in range(current - 31 * 86_400_000, stored_until, MINUTE_MS)])
+    inner = _RestConCache(store)
+    adapter = StreamingExchangeAdapter(inner, symbols=["BTCUSDT"], intervals=["1m"], autostart=False)
+    adapter._merge_klines("BTCUSDT", "1m", [_vela(t) for t in range(current - 9_999 * MINUTE_MS, current + 1, MINUTE_MS)])
+    adapter.connected = True
+
+    klines = adapter.get_klines("BTCUSDT", "1m", limit=30)
+
+    assert inner.kline_requests == 0
+    times = [k["open_time"] for k in klines]
+    assert times == sorted(set(times))
+    assert times[0] <= now - 30 * 86_400_000 + MINUTE_MS
+    assert all(b - a == MINUTE_MS for a, b in zip(times, times[1:]))
+
+
+class _StreamLocal:
+    """Sustituto local del stream combinado de Binance: un servidor websocket en 127.0.0.1."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.paths = []
+        self.ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._stop = None
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        assert self.ready.wait(5)
+
+    async def _handler(self, ws):
+        self.paths.append(ws.request.path)
+        for message in self.messages:
+            await ws.send(json.dumps(message))
+        await self._stop.wait()
+
+    async def _serve(self):
+        self._stop = asyncio.Event()
+        async with websockets.serve(self._handler, "127.0.0.1", 0) as server:
+            self.url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            self.ready.set()
+            await self._stop.wait()
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(5)
+
+
+class _MotorFalso:
+    def __init__(self):
+        self.events = []
+
+    def post(self, event):
+        self.events.append(event)
+
+
+def _esperar(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_precios_y_velas_desde_stream_local_y_rest_al_caer():
+    now = int(time.time() * 1000)
+    current = now - now % MINUTE_MS
+    kline = {"t": current, "o": "120", "h": "125", "l": "119", "c": "124", "v": "3",
+             "T": current + MINUTE_MS - 1, "i": "1m", "x": True}
+    server = _StreamLocal([
+        {"stream": "btcusdt@miniTicker", "data": {"e": "24hrMiniTicker", "s": "BTCUSDT", "c": "123"}},
+        {"stream": "ethusdt@kline_1m", "data": {"e": "kline", "s": "ETHUSDT", "k": kline}},
+    ])
+    inner = MockExchangeAdapter()
+    engine = _MotorFalso()
+    adapter = StreamingExchangeAdapter(inner, symbols=["btcusdt", "ETHUSDT"], ws_url=server.url, intervals=["1m"],
+                                       autostart=False, reconnect_max_seconds=1)
+    adapter.attach_engine(engine)
+    adapter.start()
+    try:
+        assert _esperar(lambda: adapter.stats["messages"] == 2)
+        assert server.paths == ["/stream?streams=btcusdt@miniTicker/btcusdt@kline_1m/ethusdt@miniTicker/ethusdt@kline_1m"]
+
+        assert adapter.get_price("BTCUSDT") == 123.0
+        assert adapter.get_price("ETHUSDT") == 124.0
+        assert adapter._klines[("ETHUSDT", "1m")][-1]["close"] == 124.0
+        assert adapter.stats["stream_prices"] == 2 and adapter.stats["rest_prices"] == 0
+        assert [e.symbol for e in engine.events if e.candle is not None] == ["ETHUSDT"]
+
+        server.close()
+        assert _esperar(lambda: not adapter.connected)
+        assert adapter.get_price("BTCUSDT") != 123.0
+        assert adapter.stats["rest_prices"] == 1
+    finally:
+        adapter.close()
+        server.close()
@@ -0,0 +1,113 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import telegram
+
+from src.bot.telegram_utils import MAX_MESSAGE_CHARS, TelegramDispatcher, _split_digest
+
+TOKEN = "123456:TEST-token"
+
+
+class _BotApiFalsa(BaseHTTPRequestHandler):
+    """Bot API local: guarda cada sendMessage y responde 429 a los `rate_limited` primeros."""
+
+    received = []
+    rate_limited = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length).decode()
+        if self.path != f"/bot{TOKEN}/sendMessage":
+            return self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+        if "json" in self.headers.get("Content-Type", ""):
+            params = json.loads(raw)
+        else:
+            params = {k: v[0] for k, v in parse_qs(raw).items()}
+        if _BotApiFalsa.rate_limited > 0:
+            _BotApiFalsa.rate_limited -= 1
+            return self._reply(429, {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                     "parameters": {"retry_after": 1}})
+        _BotApiFalsa.received.append(params["text"])
+        chat_id = int(params["chat_id"])
+        self._reply(200, {"ok": True, "result": {
+            "message_id": len(_BotApiFalsa.received), "date": 0,
+            "chat": {"id": chat_id, "type": "private"}, "text": params["text"],
+        }})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot():
+    _BotApiFalsa.received = []
+    _BotApiFalsa.rate_limited = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BotApiFalsa)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield telegram.Bot(token=TOKEN, base_url=f"http://127.0.0.1:{server.server_address[1]}/bot")
+    server.shutdown()
+    server.server_close()
+
+
+def _dispatcher(bot, **kwargs):
+    kwargs.setdefault("digest_window_seconds", 0.2)
+    kwargs.setdefault("min_send_interval_seconds", 0)
+    return TelegramDispatcher(send=lambda text: bot.send_message(chat_id=42, text=text), **kwargs)
+
+
+def test_rafaga_se_agrupa_en_un_resumen(bot):
+    dispatcher = _dispatcher(bot)
+    for i in range(5):
+        assert dispatcher.submit(f"alerta {i}")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert len(_BotApiFalsa.received) == 1
+    digest = _BotApiFalsa.received[0]
+    assert digest.startswith("🔔 5 notificaciones")
+    assert all(f"alerta {i}" in digest for i in range(5))
+    assert dispatcher.stats["digests"] == 1 and dispatcher.stats["sent"] == 1
+
+
+def test_retry_after_espera_y_reenvia(bot):
+    _BotApiFalsa.rate_limited = 1
+    dispatcher = _dispatcher(bot, digest_window_seconds=0)
+    dispatcher.submit("hola")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert _BotApiFalsa.received == ["hola"]
+    assert dispatcher.stats["retries"] == 1
+    assert dispatcher.stats["failed"] == 0
+
+
+def test_cola_llena_descarta_sin_bloquear():
+    release = threading.Event()
+    sent = []
+    dispatcher = TelegramDispatcher(send=lambda text: (release.wait(5), sent.append(text)), max_queue=2,
+                                    digest_window_seconds=0, min_send_interval_seconds=0)
+    results = [dispatcher.submit(f"m{i}") for i in range(10)]
+    release.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert results.count(False) == dispatcher.stats["dropped"] > 0
+    assert dispatcher.stats["queued"] + dispatcher.stats["dropped"] == 10
+    assert "m0" in sent[0]
+
+
+def test_resumen_largo_se_trocea_al_limite():
+    digests = _split_digest(["x" * 3000 for _ in range(3)])
+    assert len(digests) == 3
+    assert all(len(d) <= MAX_MESSAGE_CHARS for d in digests)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import socket
+
+import aiohttp
+
+from src.bot.webhook_pipeline import ACCEPTED, DUPLICATE, WebhookPipeline, parse_alert
+from src.webhook_server import create_app, serve
+
+
+class _ExchangeFalso:
+    def __init__(self):
+        self.orders = []
+
+    def get_price(self, symbol):
+        return 100.0
+
+    def create_order(self, **order):
+        self.orders.append(order)
+        return {'orderId': len(self.orders)}
+
+
+def _cuerpo(**campos):
+    return json.dumps({'action': 'buy', 'symbol': 'BTCUSDT', 'quantity_usd': 50, **campos}).encode()
+
+
+def test_alertas_iguales_sin_id_se_ejecutan_todas():
+    exchange = _ExchangeFalso()
+    pipeline = WebhookPipeline(lambda symbol: exchange, workers=2)
+    pipeline.start()
+    try:
+        assert [pipeline.submit(*parse_alert(_cuerpo())) for _ in range(2)] == [ACCEPTED, ACCEPTED]
+        assert pipeline.join(5)
+    finally:
+        pipeline.stop()
+    assert len(exchange.orders) == 2
+
+
+def test_alerta_con_id_repetido_es_duplicada():
+    pipeline = WebhookPipeline(lambda symbol: _ExchangeFalso(), workers=1)
+    assert pipeline.submit(*parse_alert(_cuerpo(id='a1'))) == ACCEPTED
+    assert pipeline.submit(*parse_alert(_cuerpo(id='a1'))) == DUPLICATE
+
+
+def test_deduplicacion_por_contenido_opcional():
+    pipeline = WebhookPipeline(lambda symbol: _ExchangeFalso(), workers=1, duplicate_window_seconds=2)
+    assert pipeline.submit(*parse_alert(_cuerpo())) == ACCEPTED
+    assert pipeline.submit(*parse_alert(_cuerpo())) == DUPLICATE
+
+
+def test_alerta_fallida_se_puede_reintentar():
+    exchange = _ExchangeFalso()
+    fallos = [RuntimeError("sin conexión")]
+
+    def get_price(symbol):
+        if fallos:
+            raise fallos.pop()
+        return 100.0
+
+    exchange.get_price = get_price
+    pipeline = WebhookPipeline(lambda symbol: exchange, workers=1)
+    pipeline.start()
+    try:
+        assert pipeline.submit(*parse_alert(_cuerpo(id='a1'))) == ACCEPTED
+        assert pipeline.join(5)
+        assert pipeline.submit(*parse_alert(_cuerpo(id='a1'))) == ACCEPTED
+        assert pipeline.join(5)
+    finally:
+        pipeline.stop()
+    assert len(exchange.orders) == 1
+    assert pipeline.stats['failed'] == 1
+
+
+
+def _puerto_libre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _lanzar_alertas(url, bodies, concurrency=64):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(session, body):
+        async with semaphore:
+            async with session.post(f"{url}/webhook", data=body) as response:
+                return response.status
+
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*(post(session, body) for body in bodies))
+
+
+def test_carga_local_del_servidor_de_webhooks():
+    """Miles de alertas contra el servidor en 127.0.0.1: todas se aceptan y se ejecutan en orden por símbolo."""
+    total, symbols = 2000, [f"C{i}USDT" for i in range(8)]
+    exchange = _ExchangeFalso()
+    pipeline = WebhookPipeline(lambda symbol: exchange, workers=4, queue_size=total, netting_window_ms=0)
+    pipeline.start()
+    port = _puerto_libre()
+    url = f"http://127.0.0.1:{port}"
+    # Por símbolo, los importes crecen con el orden de envío (precio 100 -> cantidad = usd / 100).
+    alerts = [_cuerpo(symbol=symbols[i % len(symbols)], quantity_usd=i + 1, id=f"a{i}") for i in range(total)]
+
+    async def scenario():
+        ready = asyncio.Event()
+        server = asyncio.create_task(serve(create_app(pipeline), "127.0.0.1", port, ready))
+        await ready.wait()
+        try:
+            # Una alerta por símbolo a la vez para fijar el orden de llegada; el resto, en paralelo entre símbolos.
+            statuses = []
+            for start in range(0, total, len(symbols)):
+                statuses += await _lanzar_alertas(url, alerts[start:start + len(symbols)])
+            repeated = await _lanzar_alertas(url, alerts[:10])
+            invalid = await _lanzar_alertas(url, [b"no es json", _cuerpo(action="hold")])
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{url}/webhook/stats") as response:
+                    stats = await response.json()
+            return statuses, repeated, invalid, stats
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+    try:
+        statuses, repeated, invalid, stats = asyncio.run(scenario())
+        assert pipeline.join(10)
+    finally:
+        pipeline.stop()
+
+    assert statuses == [202] * total
+    assert repeated == [200] * 10
+    assert invalid == [400, 400]
+    assert stats["accepted"] == total and stats["duplicates"] == 10 and stats["rejected"] == 2
+    assert pipeline.stats["executed"] == total and pipeline.stats["failed"] == 0
+    assert len(exchange.orders) == total
+    for symbol in symbols:
+        quantities = [o["quantity"] for o in exchange.orders if o["symbol"] == symbol]
+        assert len(quantities) == total // len(symbols)
+        assert quantities == sorted(quantities)